@@ -9,8 +9,18 @@ https://docs.djangoproject.com/en/4.0/howto/deployment/asgi/
 
 import os
 
-from django.core.asgi import get_asgi_application
+import django
+
+from sbyra_src.utils.asgi_handler import StreamingASGIHandler
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'sbyra_src.settings')
 
-application = get_asgi_application()
+# get_asgi_application() with a handler that streams database backed responses (result exports)
+django.setup(set_prefix=False)
+django_application = StreamingASGIHandler()
+
+# live leaderboard streams (/racing/live/<event>/<class>) are served next to Django, see racing.live
+# imported after django.setup(): it needs the app registry
+from sbyra_src.racing.live import live_application  # noqa: E402
+
+application = live_application(django_application)
@@ -1,9 +1,117 @@
-from django.contrib import admin
+import io
+
+from django.contrib import admin, messages
+from django.shortcuts import redirect
+from django.template.response import TemplateResponse
+from django.urls import path
 from sbyra_src.racing import models
+from sbyra_src.racing.forms import ResultImportFileForm, YachtAdminForm
+from sbyra_src.racing.imports import ResultImportError, import_results
+from sbyra_src.racing.seasons import set_archived
+
+
+class RatingCertificateInline(admin.TabularInline):
+    model = models.RatingCertificate
+    extra = 0
+
+
+class YachtAdmin(admin.ModelAdmin):
+    form = YachtAdminForm
+    inlines = [
+        RatingCertificateInline
+    ]  # rating history edited on the yacht page
+
+    def save_model(self, request, obj, form, change):
+        # read by racing.signals.yacht_rescore
+        obj._rating_effective_from = form.cleaned_data.get(
+            "rating_effective_from"
+        )
+        super().save_model(request, obj, form, change)
+
+
+class EventClassStartInline(admin.TabularInline):
+    model = models.EventClassStart
+    extra = 0
+
+
+class EventAdmin(admin.ModelAdmin):
+    inlines = [
+        EventClassStartInline
+    ]  # class starts edited on the event page
+
+
+class SeriesAdmin(admin.ModelAdmin):
+    list_display = ["name", "year", "current_year", "throwouts"]
+    list_filter = ["current_year", "year"]
+    actions = ["archive", "restore"]
+
+    @admin.action(description="Archive selected series")
+    def archive(self, request, queryset):
+        count = set_archived(queryset.values_list("pk", flat=True))
+        self.message_user(request, f"{count} series archived")
+
+    @admin.action(description="Restore selected series to current")
+    def restore(self, request, queryset):
+        count = set_archived(
+            queryset.values_list("pk", flat=True), archived=False
+        )
+        self.message_user(request, f"{count} series restored")
+
+
+class ResultAdmin(admin.ModelAdmin):
+    change_list_template = "admin/racing/result/change_list.html"
+
+    def get_urls(self):
+        return [
+            path(
+                "import/",
+                self.admin_site.admin_view(self.import_view),
+                name="racing_result_import",
+            ),
+        ] + super().get_urls()
+
+    def import_view(self, request):
+        """Imports results from an uploaded CSV (racing.imports): every bad row is listed, nothing is saved"""
+        if not self.has_add_permission(request):
+            return redirect("admin:racing_result_changelist")
+        errors = []
+        form = ResultImportFileForm(
+            request.POST or None, request.FILES or None
+        )
+        if request.method == "POST" and form.is_valid():
+            csv_file = io.TextIOWrapper(
+                form.cleaned_data["csv_file"], encoding="utf-8-sig"
+            )
+            try:
+                count = import_results(csv_file)
+            except ResultImportError as error:
+                errors = error.errors
+            else:
+                self.message_user(
+                    request,
+                    f"imported {count} results",
+                    messages.SUCCESS,
+                )
+                return redirect("admin:racing_result_changelist")
+
+        context = {
+            **self.admin_site.each_context(request),
+            "opts": self.model._meta,
+            "title": "Import results",
+            "form": form,
+            "errors": errors,
+        }
+        return TemplateResponse(
+            request, "admin/racing/result/import_results.html", context
+        )
+
 
-admin.site.register(models.Yacht)
-admin.site.register(models.Series)
-admin.site.register(models.Event)
-admin.site.register(models.Result)
+admin.site.register(models.Yacht, YachtAdmin)
+admin.site.register(models.Series, SeriesAdmin)
+admin.site.register(models.Event, EventAdmin)
+admin.site.register(models.Result, ResultAdmin)
 admin.site.register(models.YachtClub)
 admin.site.register(models.Spinnaker)
+admin.site.register(models.SeriesStanding)
+admin.site.register(models.YachtSeasonStats)
+admin.site.register(models.HeadToHead)
@@ -30,3 +30,11 @@ class SpinnakerClassChoice(models.TextChoices):
     S3 = "S3", "Spinnaker class 3"
     S4 = "S4", "Spinnaker class 4"
     S5 = "S5", "Spinnaker class 5"
+
+
+class HandicapSystemChoice(models.TextChoices):
+    """Handicap systems a Series can be scored with (registry in racing.handicaps)"""
+
+    TOT = "TOT", "Time on time"
+    TOD = "TOD", "Time on distance"
+    OD = "OD", "One design (no handicap)"
@@ -0,0 +1,64 @@
+import math
+
+import numpy as np
+from django.db.models import Case, FloatField, Value, When
+from django.db.models.functions import Cast, Ceil, Coalesce, Floor
+from django.db.models.lookups import GreaterThanOrEqual
+
+"""
+Rating and rounding rules shared by every scoring path (Result.calc_corrected_time, racing.scoring,
+Result.objects.with_corrected_time()) and every handicap system (racing.handicaps). Keep this arithmetic here so
+every path produces identical results. The *_expression variants build the same arithmetic as ORM expressions
+(float math in the database, truncation and rounding with Floor/Ceil so SQLite and PostgreSQL agree).
+
+- Effective phrf: phrf rating less the spinnaker class adjustment when a spinnaker was used, truncated to an int
+- Corrected seconds are rounded half up to whole seconds
+
+"""
+
+
+def effective_phrf(
+    phrf_rating, spinnaker_adjustment, used_spinnaker
+) -> int:
+    """phrf rating less the spinnaker class adjustment when a spinnaker was used, truncated to an int"""
+    if used_spinnaker:
+        return int(phrf_rating - spinnaker_adjustment)
+    return int(phrf_rating)
+
+
+def round_seconds(seconds) -> int:
+    """Rounds half up to whole seconds"""
+    return math.floor(seconds + 0.5)
+
+
+def round_seconds_array(seconds):
+    """Vectorized round_seconds(). NaN inputs stay NaN"""
+    return np.floor(seconds + 0.5)
+
+
+def effective_phrf_expression(
+    phrf="yacht__phrf_rating",
+    adjustment="yacht__spinnaker_class__adjustment_value",
+    used_spinnaker="used_spinnaker",
+):
+    """ORM version of effective_phrf() for Result querysets (float, truncated toward zero)"""
+    rating = Cast(phrf, FloatField()) - Case(
+        When(
+            **{used_spinnaker: True},
+            then=Cast(Coalesce(adjustment, 0), FloatField()),
+        ),
+        default=Value(0.0),
+        output_field=FloatField(),
+    )
+    return Case(
+        When(
+            GreaterThanOrEqual(rating, Value(0.0)), then=Floor(rating)
+        ),
+        default=Ceil(rating),
+        output_field=FloatField(),
+    )
+
+
+def round_seconds_expression(seconds):
+    """ORM version of round_seconds()"""
+    return Floor(seconds + Value(0.5), output_field=FloatField())
@@ -0,0 +1,93 @@
+import csv
+import json
+
+from django.conf import settings
+from django.db.models import F
+
+from sbyra_src.racing.models import Result
+
+"""
+Season result exports (CSV or newline-delimited JSON) for clubs and the published sailing instructions results.
+
+Exports stream: rows are read with values_list() (no model instances) through .iterator(chunk_size=...) and
+encoded one line at a time, so memory stays flat whatever the size of the season. Used by the export_results view
+(StreamingHttpResponse) and the export_results management command.
+
+1. results_for_export(): Result rows filtered by series, event and/or yacht class, ordered by event and class
+   position (unscored entries last)
+2. export_lines(): encodes the rows as CSV or NDJSON lines, header first for CSV
+
+"""
+
+# (column, lookup) in export order
+EXPORT_COLUMNS = [
+    ("series", "event__series__name"),
+    ("year", "event__series__year"),
+    ("event", "event_id"),
+    ("event_date", "event__event_date"),
+    ("yacht_class", "yacht__yacht_class"),
+    ("yacht", "yacht__yacht_name"),
+    ("sail_num", "yacht__sail_num"),
+    ("status", "completed_status"),
+    ("finish_time", "finish_time"),
+    ("elapsed_seconds", "elapsed_seconds"),
+    ("corrected_seconds", "corrected_seconds"),
+    ("posted_time", "posted_time"),
+    ("position", "position"),
+    ("points", "points"),
+]
+HEADER = [column for column, lookup in EXPORT_COLUMNS]
+
+EXPORT_FORMATS = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+}
+
+
+def results_for_export(series=None, event=None, yacht_class=None):
+    """values_list() of EXPORT_COLUMNS for the matching results (no filter exports everything)"""
+    results = Result.objects.all()
+    if series is not None:
+        results = results.filter(event__series=series)
+    if event is not None:
+        results = results.filter(event=event)
+    if yacht_class:
+        results = results.filter(yacht__yacht_class=yacht_class)
+    return results.order_by(
+        "event__event_date",
+        "event",
+        "yacht__yacht_class",
+        F("position").asc(nulls_last=True),
+        "yacht__yacht_name",
+    ).values_list(*[lookup for column, lookup in EXPORT_COLUMNS])
+
+
+class Echo:
+    """File-like object for csv.writer: write() returns the line instead of buffering it"""
+
+    def write(self, value):
+        return value
+
+
+def csv_lines(rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow(HEADER)
+    for row in rows:
+        yield writer.writerow(
+            ["" if value is None else value for value in row]
+        )
+
+
+def ndjson_lines(rows):
+    for row in rows:
+        yield json.dumps(dict(zip(HEADER, row)), default=str) + "\n"
+
+
+def export_lines(results, export_format="csv", chunk_size=None):
+    """Yields the export line by line, reading results chunk_size rows at a time"""
+    rows = results.iterator(
+        chunk_size=chunk_size or settings.EXPORT_CHUNK_SIZE
+    )
+    if export_format == "ndjson":
+        return ndjson_lines(rows)
+    return csv_lines(rows)
@@ -0,0 +1,93 @@
+from django.db import transaction
+from django.utils import timezone
+
+from sbyra_src.racing.models import Event, Result
+
+"""
+Batch finish recording for race committees (racing:record-finishes).
+
+A timekeeper submits many finishes at once. FinishFormSet validates the whole batch together (one query resolves
+every yacht), then save_finishes():
+
+1. Locks the event row, then the event's existing results for those yachts (select_for_update). The event lock
+   serializes batches of the same event, so two timekeepers entering the same new yacht cannot both insert it:
+   the second one sees the first one's result and is rejected as stale
+2. Rejects the batch if any result changed since the timekeeper loaded it (Result.version differs, or a finish
+   time was already recorded and no version was submitted): nothing is written
+3. bulk_update()s existing results and bulk_create()s new entries in one transaction
+4. Scores the event once (Result.objects.score_event)
+
+Every write bumps Result.version (Result.save() does the same for admin edits), so two timekeepers working from the
+same page cannot silently overwrite each other.
+
+"""
+
+
+class StaleFinishError(Exception):
+    """Raised when results in a batch changed since the timekeeper loaded them"""
+
+    def __init__(self, yachts):
+        self.yachts = yachts
+        names = ", ".join(str(yacht) for yacht in yachts)
+        super().__init__(f"changed by another timekeeper: {names}")
+
+
+def save_finishes(event, finishes):
+    """
+    Writes finishes [(yacht, finish_time, order_over_line, version), ...] for event and scores it once.
+    Returns the number of finishes written. Raises StaleFinishError (and writes nothing) on version conflicts.
+
+    """
+    with transaction.atomic():
+        Event.objects.select_for_update().get(pk=event.pk)
+        existing = {
+            result.yacht_id: result
+            for result in Result.objects.select_for_update()
+            .filter(
+                event=event,
+                yacht__in=[yacht for yacht, *rest in finishes],
+            )
+            .order_by()
+        }
+
+        stale = []
+        for yacht, finish_time, order, version in finishes:
+            result = existing.get(yacht.pk)
+            if result is None:
+                continue
+            if version is None:
+                if result.finish_time is not None:
+                    stale.append(yacht)
+            elif version != result.version:
+                stale.append(yacht)
+        if stale:
+            raise StaleFinishError(stale)
+
+        now = timezone.now()
+        updates, creates = [], []
+        for yacht, finish_time, order, version in finishes:
+            result = existing.get(yacht.pk)
+            if result is None:
+                creates.append(
+                    Result(
+                        event=event,
+                        yacht=yacht,
+                        archived=event.archived,
+                        finish_time=finish_time,
+                        order_over_line=order,
+                    )
+                )
+                continue
+            result.finish_time = finish_time
+            result.order_over_line = order
+            result.version += 1
+            result.updated = now
+            updates.append(result)
+
+        Result.objects.bulk_update(
+            updates,
+            ["finish_time", "order_over_line", "version", "updated"],
+        )
+        Result.objects.bulk_create(creates)
+        Result.objects.score_event(event)
+    return len(finishes)
@@ -1,5 +1,7 @@
 from django import forms
-from django.forms import ModelForm
+from django.db.models import Q
+from django.forms import ModelForm, formset_factory
+from django.utils.translation import gettext_lazy as _
 
 from .models import Event, Result, Series, Spinnaker, Yacht, YachtClub
 
@@ -21,26 +23,202 @@ class YachtForm(ModelForm):
         )
 
 
+class YachtAdminForm(ModelForm):
+    """
+    Admin Yacht form. A phrf_rating or spinnaker_class change is recorded as a RatingCertificate from
+    rating_effective_from (today when empty) and rescores the current season's results from that date on
+    (racing.signals). Ratings before the yacht's latest certificate are corrected in its certificates instead.
+
+    """
+
+    rating_effective_from = forms.DateField(
+        required=False,
+        help_text=_(
+            "date a phrf rating or spinnaker class change applies from: results sailed since then are rescored. "
+            "Empty: today, earlier results keep their rating"
+        ),
+    )
+
+    class Meta:
+        model = Yacht
+        fields = "__all__"
+
+    def clean_rating_effective_from(self):
+        since = self.cleaned_data["rating_effective_from"]
+        if since is None or self.instance.pk is None:
+            return since
+        latest = (
+            self.instance.certificates.order_by("-valid_from")
+            .values_list("valid_from", flat=True)
+            .first()
+        )
+        if latest is not None and since < latest:
+            raise forms.ValidationError(
+                _(
+                    "The latest rating certificate starts on %(date)s: "
+                    "edit the certificates to change earlier ratings"
+                ),
+                params={"date": latest},
+            )
+        return since
+
+
 class YachtClubForm(ModelForm):
     class Meta:
         model = YachtClub
+        fields = "__all__"
 
 
 class SeriesForm(ModelForm):
     class Meta:
         model = Series
+        fields = "__all__"
 
 
 class EventForm(ModelForm):
     class Meta:
         model = Event
+        fields = "__all__"
 
 
 class ResultForm(ModelForm):
     class Meta:
         model = Result
+        fields = "__all__"
 
 
 class SpinnakerForm(ModelForm):
+    class Meta:
+        model = Spinnaker
+        fields = "__all__"
+
+
+# ------------------- Batch finish recording ------------------- #
+
+
+def yacht_lookup(keys):
+    """{sail number or yacht name: Yacht} for keys, loaded with one query. Sail numbers win over names"""
+    keys = set(keys)
+    yachts = {}
+    for yacht in Yacht.objects.filter(
+        Q(sail_num__in=keys) | Q(yacht_name__in=keys)
+    ):
+        yachts.setdefault(yacht.yacht_name, yacht)
+        if yacht.sail_num:
+            yachts[yacht.sail_num] = yacht
+    return yachts
+
+
+class FinishForm(forms.Form):
+    """One finish in a batch (racing.finishes). version is the Result.version the timekeeper loaded"""
+
+    yacht = forms.CharField(
+        max_length=100, help_text=_("sail number or yacht name")
+    )
+    finish_time = forms.TimeField(help_text=_("Format: HH:MM:SS"))
+    order_over_line = forms.IntegerField(required=False, min_value=1)
+    version = forms.IntegerField(
+        required=False, min_value=0, widget=forms.HiddenInput
+    )
+
+
+class BaseFinishFormSet(forms.BaseFormSet):
+    """
+    Validates a batch of finishes together. All yachts are resolved with one query (sail number first, then
+    yacht name); unknown yachts, yachts entered twice and repeated order over line numbers are reported on their
+    rows. Valid batches are available as self.finishes [(yacht, finish_time, order_over_line, version), ...]
+
+    """
+
+    def __init__(self, *args, **kwargs):
+        self.finishes = []
+        super().__init__(*args, **kwargs)
+
+    def clean(self):
+        # batch checks also run when other rows have field errors, so every problem is reported at once
+        rows = [
+            form for form in self.forms if "yacht" in form.cleaned_data
+        ]
+        yachts = yacht_lookup(
+            form.cleaned_data["yacht"].strip() for form in rows
+        )
+
+        seen_yachts, seen_orders = set(), set()
+        for form in rows:
+            data = form.cleaned_data
+            yacht = yachts.get(data["yacht"].strip())
+            order = data.get("order_over_line")
+            if yacht is None:
+                form.add_error("yacht", _("unknown yacht"))
+                continue
+            if yacht.pk in seen_yachts:
+                form.add_error("yacht", _("entered more than once"))
+            if order is not None and order in seen_orders:
+                form.add_error(
+                    "order_over_line", _("entered more than once")
+                )
+            seen_yachts.add(yacht.pk)
+            seen_orders.add(order)
+            self.finishes.append(
+                (
+                    yacht,
+                    data.get("finish_time"),
+                    order,
+                    data.get("version"),
+                )
+            )
+        if not any(form.has_changed() for form in self.forms):
+            raise forms.ValidationError(_("no finishes entered"))
+
+
+FinishFormSet = formset_factory(
+    FinishForm, formset=BaseFinishFormSet, extra=10
+)
+
+
+def finish_formset_data(rows, prefix="form"):
+    """Converts a JSON list of finishes into FinishFormSet data (batch endpoint)"""
+    data = {
+        f"{prefix}-TOTAL_FORMS": len(rows),
+        f"{prefix}-INITIAL_FORMS": 0,
+    }
+    for i, row in enumerate(rows):
+        for field in FinishForm.base_fields:
+            value = row.get(field)
+            data[f"{prefix}-{i}-{field}"] = (
+                "" if value is None else value
+            )
+    return data
+
+
+# ------------------- CSV result import ------------------- #
+
+
+class ResultImportForm(ModelForm):
+    """
+    Field rules for imported result rows. racing.imports cleans each row with these fields directly (no form
+    instance per row); event and yacht are resolved from pre-built lookups, so validating a row makes no query.
+
+    """
+
     class Meta:
         model = Result
+        fields = (
+            "completed_status",
+            "finish_time",
+            "order_over_line",
+            "time_penalty",
+            "used_spinnaker",
+            "notes",
+        )
+
+
+class ResultImportFileForm(forms.Form):
+    """Upload form of the admin result import"""
+
+    csv_file = forms.FileField(
+        help_text=_(
+            "columns: event, sail_num or yacht, status, finish_time, "
+            "order_over_line, time_penalty, used_spinnaker, notes"
+        )
+    )
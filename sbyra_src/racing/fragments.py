@@ -0,0 +1,46 @@
+import time
+
+from django.core.cache import cache
+
+"""
+Template fragment cache keys for the racing home page ({% cache %} in racing/racing_home.html).
+
+Each cached section varies on a version token: the time its underlying models last changed. post_save and
+post_delete receivers in racing.signals call invalidate() for the sections a model appears in once the change
+commits (a request rendering before the commit would otherwise cache old data under the new version), so every
+cached copy of a section (all pages of the fleet, for instance) goes stale with one cache write instead of a key
+scan.
+RACING_HOME_CACHE_TTL bounds how long stale fragments stay in the cache.
+
+- fleet: active yachts with their club and spinnaker class (Yacht, YachtClub, Spinnaker)
+- events: upcoming and recent events (Event, Series; the page also varies on the date)
+- series: current series (Series)
+
+"""
+
+SECTIONS = ("fleet", "events", "series")
+
+
+def version_key(section):
+    return f"racing:home:{section}"
+
+
+def versions():
+    """{section: version token} for the cached sections of the racing home page (one cache read)"""
+    keys = {version_key(section): section for section in SECTIONS}
+    stored = cache.get_many(keys)
+    missing = {key: time.time_ns() for key in keys if key not in stored}
+    if missing:  # first use or evicted: cached copies may be stale
+        cache.set_many(missing, timeout=None)
+    return {
+        keys[key]: value for key, value in {**stored, **missing}.items()
+    }
+
+
+def invalidate(*sections):
+    """Starts a new version of sections: cached copies of the old one are no longer read"""
+    now = time.time_ns()
+    cache.set_many(
+        {version_key(section): now for section in sections},
+        timeout=None,
+    )
@@ -0,0 +1,170 @@
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Case, FloatField, Value, When
+from django.db.models.functions import Cast, Coalesce
+from django.db.models.lookups import LessThan
+
+from sbyra_src.racing.corrections import (
+    effective_phrf,
+    round_seconds,
+    round_seconds_array,
+    round_seconds_expression,
+)
+
+"""
+Registry of handicap systems, selected per Series (Series.handicap_system).
+
+Every system splits scoring into a per-yacht coefficient and a cheap per-result operation:
+
+- coefficient(phrf): computed once per yacht from its effective phrf rating (cached, see below)
+- correct(elapsed, coefficient, distance): corrected seconds for one result
+- correct_array(...): the same operation on NumPy arrays for the batch scorer
+- correct_expression(elapsed, phrf, distance): the same operation as an ORM expression from the effective phrf
+  (Result.objects.with_corrected_time())
+
+Registered systems:
+
+TOT  time on time: corrected = elapsed * numerator / (base + phrf), constants from HANDICAP_TIME_ON_TIME
+TOD  time on distance: corrected = elapsed - phrf (seconds per nautical mile) * Event.distance, never below 0
+OD   one design / no handicap: corrected = elapsed
+
+Coefficient cache: rating_coefficients() stores (without spinnaker, with spinnaker) coefficients per handicap
+system, phrf rating and spinnaker adjustment in the Django cache, so a scoring run is a table lookup plus a
+multiply. An entry only depends on its key, so it never goes stale and nothing deletes it: a rating or adjustment
+change simply reads another key, and yachts sharing a rating share an entry.
+
+"""
+
+
+class TimeOnTime:
+    label = "Time on time"
+
+    def __init__(self, numerator=650, base=520):
+        self.numerator = numerator
+        self.base = base
+        self.cache_key = f"TOT-{numerator}-{base}"
+
+    def coefficient(self, phrf):
+        return self.numerator / (self.base + phrf)
+
+    def correct(self, elapsed, coefficient, distance=None):
+        return round_seconds(elapsed * coefficient)
+
+    def correct_array(self, elapsed, coefficient, distance):
+        return round_seconds_array(elapsed * coefficient)
+
+    def correct_expression(self, elapsed, phrf, distance):
+        coefficient = Value(float(self.numerator)) / (
+            Value(float(self.base)) + phrf
+        )
+        return round_seconds_expression(elapsed * coefficient)
+
+
+class TimeOnDistance:
+    label = "Time on distance"
+    cache_key = "TOD"
+
+    def coefficient(self, phrf):
+        return float(phrf)  # seconds allowance per nautical mile
+
+    def correct(self, elapsed, coefficient, distance=None):
+        distance = float(distance or 0)
+        return round_seconds(max(elapsed - coefficient * distance, 0))
+
+    def correct_array(self, elapsed, coefficient, distance):
+        return round_seconds_array(
+            np.maximum(elapsed - coefficient * distance, 0)
+        )
+
+    def correct_expression(self, elapsed, phrf, distance):
+        corrected = elapsed - phrf * Cast(
+            Coalesce(distance, 0), FloatField()
+        )
+        return round_seconds_expression(
+            Case(
+                When(LessThan(corrected, Value(0.0)), then=Value(0.0)),
+                default=corrected,
+                output_field=FloatField(),
+            )
+        )
+
+
+class OneDesign:
+    label = "One design (no handicap)"
+    cache_key = "OD"
+
+    def coefficient(self, phrf):
+        return 1.0
+
+    def correct(self, elapsed, coefficient, distance=None):
+        return round_seconds(elapsed)
+
+    def correct_array(self, elapsed, coefficient, distance):
+        return round_seconds_array(elapsed)
+
+    def correct_expression(self, elapsed, phrf, distance):
+        return round_seconds_expression(elapsed)
+
+
+HANDICAP_SYSTEMS = {}
+
+
+def register(key, system):
+    HANDICAP_SYSTEMS[key] = system
+
+
+def get_system(key):
+    """Returns the registered handicap system for a HandicapSystemChoice value"""
+    return HANDICAP_SYSTEMS[key]
+
+
+register("TOT", TimeOnTime(*settings.HANDICAP_TIME_ON_TIME))
+register("TOD", TimeOnDistance())
+register("OD", OneDesign())
+
+
+# ------------------- Coefficient cache ------------------- #
+
+
+def coefficient_key(system, phrf_rating, spinnaker_adjustment):
+    rating = float(phrf_rating), float(spinnaker_adjustment or 0)
+    return f"racing:tcf:{system.cache_key}:{rating[0]!r}:{rating[1]!r}"
+
+
+def compute_coefficients(system, phrf_rating, spinnaker_adjustment):
+    """(without spinnaker, with spinnaker) coefficients, None if the yacht has no rating"""
+    if phrf_rating is None:
+        return None
+    return (
+        system.coefficient(effective_phrf(phrf_rating, 0, False)),
+        system.coefficient(
+            effective_phrf(phrf_rating, spinnaker_adjustment or 0, True)
+        ),
+    )
+
+
+def rating_coefficients(system, ratings):
+    """
+    Returns {(phrf_rating, spinnaker adjustment): (without spinnaker, with spinnaker)} for rating pairs (unrated
+    pairs are left out). Cached entries are read with one get_many; missing entries are computed and stored with one
+    set_many.
+
+    """
+    keys = {
+        rating: coefficient_key(system, *rating)
+        for rating in set(ratings)
+        if rating[0] is not None
+    }
+    cached = cache.get_many(set(keys.values()))
+
+    missing = {}
+    for rating, key in keys.items():
+        if key not in cached and key not in missing:
+            missing[key] = compute_coefficients(system, *rating)
+    if missing:
+        cache.set_many(missing, timeout=None)
+    return {
+        rating: cached.get(key) or missing[key]
+        for rating, key in keys.items()
+    }
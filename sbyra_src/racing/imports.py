@@ -0,0 +1,131 @@
+import csv
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+
+from sbyra_src.racing.forms import ResultImportForm, yacht_lookup
+from sbyra_src.racing.models import Event, Result
+
+"""
+CSV import of race results recorded on paper or in a spreadsheet (import_results command and the Result admin).
+
+Columns (header row required, extra columns are ignored, so a results export can be imported back):
+
+    event, sail_num or yacht, status, finish_time, order_over_line, time_penalty, used_spinnaker, notes
+
+import_results():
+
+1. Reads every row, then resolves all events with one query and all yachts with one lookup dict (sail number
+   first, then yacht name, racing.forms.yacht_lookup), plus the results those events already have
+2. Cleans each row with the fields of ResultImportForm (Result field rules). The fields are used directly: no
+   query and no form instance per row
+3. Reports every bad row at once (ResultImportError) and writes nothing if any row is bad
+4. bulk_create()s the results in one transaction and scores each event once (Result.objects.score_event)
+
+"""
+
+TRUE_VALUES = {"1", "true", "yes", "y", "x"}
+
+
+class ResultImportError(Exception):
+    """Raised with every bad row of an import: errors is [(line number, message), ...]"""
+
+    def __init__(self, errors):
+        self.errors = errors
+        super().__init__(f"{len(errors)} rows could not be imported")
+
+
+def row_data(row):
+    """ResultImportForm data for one CSV row"""
+    spinnaker = (row.get("used_spinnaker") or "").strip().lower()
+    return {
+        "completed_status": row.get("status") or "CMP",
+        "finish_time": row.get("finish_time") or "",
+        "order_over_line": row.get("order_over_line") or "",
+        "time_penalty": row.get("time_penalty") or "",
+        "used_spinnaker": spinnaker in TRUE_VALUES,
+        "notes": row.get("notes") or "",
+    }
+
+
+def clean_row(data):
+    """Cleans ResultImportForm data with the form's fields. Returns (cleaned data, error messages)"""
+    cleaned, errors = {}, []
+    for name, field in ResultImportForm.base_fields.items():
+        try:
+            cleaned[name] = field.clean(data[name])
+        except ValidationError as error:
+            errors.append(f"{name}: {' '.join(error.messages)}")
+    return cleaned, errors
+
+
+def event_key(row):
+    pk = (row.get("event") or "").strip()
+    return int(pk) if pk.isdigit() else None
+
+
+def yacht_key(row):
+    return (row.get("sail_num") or row.get("yacht") or "").strip()
+
+
+def import_results(csv_file, batch_size=1000):
+    """
+    Imports results from an open text file (CSV). Returns the number of results created. Raises
+    ResultImportError (and writes nothing) when any row is invalid.
+
+    """
+    reader = csv.DictReader(csv_file)
+    if reader.fieldnames is None or "event" not in reader.fieldnames:
+        raise ResultImportError(
+            [(1, "header row with an event column")]
+        )
+    rows = [(reader.line_num, row) for row in reader]
+
+    events = Event.objects.select_related("series").in_bulk(
+        {event_key(row) for line, row in rows} - {None}
+    )
+    yachts = yacht_lookup(yacht_key(row) for line, row in rows)
+    taken = set(
+        Result.objects.filter(event__in=events).values_list(
+            "event", "yacht"
+        )
+    )
+
+    errors, results, seen = [], [], set()
+    for line, row in rows:
+        event = events.get(event_key(row))
+        yacht = yachts.get(yacht_key(row))
+        cleaned, row_errors = clean_row(row_data(row))
+        if event is None:
+            row_errors.append(f"unknown event {row.get('event')!r}")
+        if yacht is None:
+            row_errors.append(f"unknown yacht {yacht_key(row)!r}")
+        if event is not None and yacht is not None:
+            if (event.pk, yacht.pk) in taken:
+                row_errors.append(f"{yacht} already has a result")
+            elif (event.pk, yacht.pk) in seen:
+                row_errors.append(f"{yacht} entered more than once")
+            seen.add((event.pk, yacht.pk))
+        if row_errors:
+            errors += [(line, message) for message in row_errors]
+            continue
+        results.append(
+            Result(
+                event=event,
+                yacht=yacht,
+                archived=event.archived,
+                **cleaned,
+            )
+        )
+
+    if errors:
+        raise ResultImportError(errors)
+
+    imported_events = {
+        result.event_id: result.event for result in results
+    }
+    with transaction.atomic():
+        Result.objects.bulk_create(results, batch_size=batch_size)
+        for event in imported_events.values():  # scored once each
+            Result.objects.score_event(event)
+    return len(results)
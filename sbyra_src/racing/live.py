@@ -0,0 +1,365 @@
+import asyncio
+import json
+import re
+import threading
+from collections import defaultdict
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections
+from django.db.models import F
+
+from sbyra_src.racing.models import Event, Result
+
+"""
+Live leaderboard over server-sent events, one channel per event and yacht class:
+
+    GET /racing/live/<event id>/<yacht class>   (text/event-stream)
+
+1. On connect the subscriber receives a "snapshot" event with every result of the class
+2. Whenever results of the event are saved, deleted or bulk scored, racing.signals calls publish_event() once the
+   transaction commits. The new leaderboard is compared with the last published one and only the rows that
+   changed are pushed as a "delta" event. Nothing is pushed when positions and times did not change. The last
+   published leaderboard is kept by the broker, next to the fan-out, so every publishing process compares with
+   the same one.
+3. Idle connections get a keep-alive comment every LIVE_KEEPALIVE seconds
+
+Subscribers are served by live_application (asgi.py) directly on the event loop: an idle subscriber is one
+asyncio.Queue, no thread and no database connection. Fan-out goes through a broker:
+
+- InProcessBroker (LIVE_BROKER = "memory"): publishers and subscribers in the same process, last published
+  leaderboards in the default Django cache
+- RedisBroker (LIVE_BROKER = "redis://..."): publishes to Redis; each process keeps one pattern subscription
+  and fans messages out to its local subscribers, so every process sees every finish. Last published
+  leaderboards are stored in Redis too (the default cache may be per process)
+
+A subscriber that falls LIVE_QUEUE_SIZE messages behind is resynced with a fresh snapshot instead of piling up
+deltas.
+
+"""
+
+LIVE_PATH = re.compile(
+    r"^/racing/live/(?P<event>\d+)/(?P<yacht_class>\w+)$"
+)
+RESYNC = "resync"  # queue marker: send a fresh snapshot
+
+
+def channel_name(event_id, yacht_class):
+    return f"leaderboard:{event_id}:{yacht_class}"
+
+
+# ------------------- Leaderboard snapshots and deltas ------------------- #
+
+
+def leaderboard(event_id, yacht_class):
+    """Rows of one event and class ordered by position (unscored last)"""
+    rows = (
+        Result.objects.filter(
+            event_id=event_id, yacht__yacht_class=yacht_class
+        )
+        .order_by(
+            F("position").asc(nulls_last=True), "yacht__yacht_name"
+        )
+        .values(
+            "id",
+            "yacht__yacht_name",
+            "yacht__sail_num",
+            "completed_status",
+            "position",
+            "points",
+            "corrected_seconds",
+        )
+    )
+    return [
+        {
+            "result": row["id"],
+            "yacht": row["yacht__yacht_name"],
+            "sail_num": row["yacht__sail_num"],
+            "status": row["completed_status"],
+            "position": row["position"],
+            "points": row["points"],
+            "corrected_seconds": row["corrected_seconds"],
+        }
+        for row in rows
+    ]
+
+
+def leaderboard_delta(previous, current):
+    """Changed or new rows and removed result ids between two leaderboards. None if nothing changed"""
+    before = {row["result"]: row for row in previous}
+    after = {row["result"]: row for row in current}
+    rows = [row for pk, row in after.items() if before.get(pk) != row]
+    removed = [pk for pk in before if pk not in after]
+    if not rows and not removed:
+        return None
+    return {"rows": rows, "removed": removed}
+
+
+def publish_leaderboard(event_id, yacht_class):
+    """Publishes the delta since the last published leaderboard. Returns the delta (None if unchanged)"""
+    channel = channel_name(event_id, yacht_class)
+    current = leaderboard(event_id, yacht_class)
+    broker = get_broker()
+    delta = leaderboard_delta(
+        broker.swap_snapshot(channel, current), current
+    )
+    if delta is not None:
+        broker.publish(channel, json.dumps(delta))
+    return delta
+
+
+def publish_event(event_id, yacht_classes=None):
+    """Publishes every class of an event (or only yacht_classes)"""
+    if yacht_classes is None:
+        yacht_classes = (
+            Result.objects.filter(event_id=event_id)
+            .exclude(yacht__yacht_class="")
+            .order_by()
+            .values_list("yacht__yacht_class", flat=True)
+            .distinct()
+        )
+    for yacht_class in yacht_classes:
+        publish_leaderboard(event_id, yacht_class)
+
+
+# ------------------- Brokers ------------------- #
+
+
+class Subscription:
+    """Queue of one subscriber, bound to the event loop it was created on"""
+
+    def __init__(self, broker, channel, maxsize):
+        self.broker = broker
+        self.channel = channel
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize)
+
+    def put(self, message):
+        """Thread safe: publishers run in request or worker threads"""
+        self.loop.call_soon_threadsafe(self._put, message)
+
+    def _put(self, message):
+        if self.queue.full():  # slow subscriber: drop backlog, resync
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            message = RESYNC
+        self.queue.put_nowait(message)
+
+    async def get(self):
+        return await self.queue.get()
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class InProcessBroker:
+    """Fan-out to subscribers of this process"""
+
+    def __init__(self, queue_size=None):
+        self.queue_size = queue_size or settings.LIVE_QUEUE_SIZE
+        self._channels = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def subscribe(self, channel):
+        subscription = Subscription(self, channel, self.queue_size)
+        with self._lock:
+            self._channels[channel].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscribers = self._channels.get(subscription.channel)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._channels[subscription.channel]
+
+    def publish(self, channel, message):
+        with self._lock:
+            subscribers = list(self._channels.get(channel, ()))
+        for subscription in subscribers:
+            subscription.put(message)
+        return len(subscribers)
+
+    def subscriber_count(self):
+        with self._lock:
+            return sum(len(s) for s in self._channels.values())
+
+    def swap_snapshot(self, channel, rows):
+        """Stores rows as the last published leaderboard of channel. Returns the previous one ([] if none)"""
+        key = f"racing:{channel}"
+        with self._lock:
+            previous = cache.get(key, [])
+            cache.set(key, rows, timeout=settings.LIVE_SNAPSHOT_TTL)
+        return previous
+
+
+class RedisBroker(InProcessBroker):
+    """Publishes through Redis pub/sub; one pattern subscription per process feeds the local subscribers"""
+
+    def __init__(self, url, queue_size=None):
+        import redis
+
+        super().__init__(queue_size)
+        self.url = url
+        self.client = redis.Redis.from_url(url)
+        self._listeners = {}  # event loop: listener task
+
+    def subscribe(self, channel):
+        loop = asyncio.get_running_loop()
+        listener = self._listeners.get(loop)
+        if listener is None or listener.done():
+            self._listeners[loop] = loop.create_task(self._listen())
+        return super().subscribe(channel)
+
+    def publish(self, channel, message):
+        return self.client.publish(channel, message)
+
+    def swap_snapshot(self, channel, rows):
+        """Same as InProcessBroker, stored in Redis with GETSET: one snapshot for every process"""
+        key = f"racing:snapshot:{channel}"
+        previous, _ = (
+            self.client.pipeline()
+            .getset(key, json.dumps(rows))
+            .expire(key, settings.LIVE_SNAPSHOT_TTL)
+            .execute()
+        )
+        return json.loads(previous) if previous else []
+
+    async def _listen(self):
+        import redis.asyncio
+
+        client = redis.asyncio.Redis.from_url(self.url)
+        pubsub = client.pubsub()
+        await pubsub.psubscribe(channel_name("*", "*"))
+        async for message in pubsub.listen():
+            if message["type"] == "pmessage":
+                super().publish(
+                    message["channel"].decode(),
+                    message["data"].decode(),
+                )
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    """Process wide broker selected by LIVE_BROKER"""
+    global _broker
+    with _broker_lock:
+        if _broker is None:
+            if settings.LIVE_BROKER.startswith("redis"):
+                _broker = RedisBroker(settings.LIVE_BROKER)
+            else:
+                _broker = InProcessBroker()
+        return _broker
+
+
+# ------------------- ASGI: server-sent events ------------------- #
+
+
+def _db(function):
+    """sync_to_async for ORM calls made outside Django's request handler (connection hygiene included)"""
+
+    def call(*args):
+        close_old_connections()
+        try:
+            return function(*args)
+        finally:
+            close_old_connections()
+
+    return sync_to_async(call)
+
+
+event_exists = _db(lambda pk: Event.objects.filter(pk=pk).exists())
+load_leaderboard = _db(leaderboard)
+
+
+def sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n".encode()
+
+
+async def stream_leaderboard(receive, send, event_id, yacht_class):
+    if not await event_exists(event_id):
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 404,
+                "headers": [(b"content-type", b"text/plain")],
+            }
+        )
+        await send({"type": "http.response.body", "body": b"not found"})
+        return
+
+    subscription = get_broker().subscribe(
+        channel_name(event_id, yacht_class)
+    )  # before the snapshot, so no delta is missed
+    disconnected = asyncio.ensure_future(_wait_disconnect(receive))
+    try:
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 200,
+                "headers": [
+                    (b"content-type", b"text/event-stream"),
+                    (b"cache-control", b"no-cache"),
+                    (b"x-accel-buffering", b"no"),
+                ],
+            }
+        )
+        rows = await load_leaderboard(event_id, yacht_class)
+        await _send(send, sse("snapshot", rows))
+
+        while not disconnected.done():
+            message = asyncio.ensure_future(subscription.get())
+            done, pending = await asyncio.wait(
+                {message, disconnected},
+                timeout=settings.LIVE_KEEPALIVE,
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+            if message not in done:
+                message.cancel()
+                if not disconnected.done():
+                    await _send(send, b": keep-alive\n\n")
+                continue
+            if message.result() == RESYNC:
+                rows = await load_leaderboard(event_id, yacht_class)
+                await _send(send, sse("snapshot", rows))
+            else:
+                await _send(
+                    send, sse("delta", json.loads(message.result()))
+                )
+    finally:
+        subscription.close()
+        disconnected.cancel()
+
+
+async def _send(send, body):
+    await send(
+        {"type": "http.response.body", "body": body, "more_body": True}
+    )
+
+
+async def _wait_disconnect(receive):
+    while (await receive())["type"] != "http.disconnect":
+        pass
+
+
+def live_application(django_application):
+    """Wraps the Django ASGI application: /racing/live/... streams are served here, everything else by Django"""
+
+    async def application(scope, receive, send):
+        if scope["type"] == "http" and scope["method"] == "GET":
+            match = LIVE_PATH.match(scope["path"])
+            if match:
+                return await stream_leaderboard(
+                    receive,
+                    send,
+                    int(match["event"]),
+                    match["yacht_class"],
+                )
+        return await django_application(scope, receive, send)
+
+    return application
@@ -0,0 +1,104 @@
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from sbyra_src.racing.choices import YachtClassChoice
+from sbyra_src.racing.models import Event, EventClassStart
+
+# legacy Event columns per yacht class: (first flag, start). A1 started with A, J had no first flag
+LEGACY_COLUMNS = {
+    YachtClassChoice.A: ("first_flag_A", "start_A"),
+    YachtClassChoice.A1: ("first_flag_A", "start_A"),
+    YachtClassChoice.B: ("first_flag_B", "start_B"),
+    YachtClassChoice.C: ("first_flag_C", "start_C"),
+    YachtClassChoice.J: (None, "start_J"),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Copies the legacy Event.start_A/B/C/J and first_flag_A/B/C columns into EventClassStart. Run it once the "
+        "EventClassStart table exists and before the migration removing the columns (safe to run again: existing "
+        "rows are kept)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="events read and written per transaction",
+        )
+
+    def handle(self, *args, **options):
+        table = Event._meta.db_table
+        with connection.cursor() as cursor:
+            present = {
+                column.name
+                for column in connection.introspection.get_table_description(
+                    cursor, table
+                )
+            }
+        legacy = sorted(
+            {
+                column
+                for columns in LEGACY_COLUMNS.values()
+                for column in columns
+                if column in present
+            }
+        )
+        if not legacy:
+            self.stdout.write(
+                "no legacy class start columns: nothing to do"
+            )
+            return
+
+        quote = connection.ops.quote_name
+        sql = (
+            f"SELECT {quote('id')}, {', '.join(map(quote, legacy))} "
+            f"FROM {quote(table)} WHERE {quote('id')} > %s "
+            f"ORDER BY {quote('id')} LIMIT %s"
+        )
+        to_time = EventClassStart._meta.get_field("start").to_python
+
+        last_pk, events, created = 0, 0, 0
+        # keyset chunks: each query starts after the last pk
+        while True:
+            with connection.cursor() as cursor:
+                cursor.execute(sql, [last_pk, options["batch_size"]])
+                rows = cursor.fetchall()
+            if not rows:
+                break
+            last_pk = rows[-1][0]
+            events += len(rows)
+
+            starts = []
+            for pk, *values in rows:
+                row = dict(zip(legacy, values))
+                for yacht_class, columns in LEGACY_COLUMNS.items():
+                    flag, start = (
+                        row.get(column) for column in columns
+                    )
+                    if flag is None and start is None:
+                        continue
+                    starts.append(
+                        EventClassStart(
+                            event_id=pk,
+                            yacht_class=yacht_class,
+                            first_flag=to_time(flag),
+                            start=to_time(start),
+                        )
+                    )
+            chunk = EventClassStart.objects.filter(
+                event__in=[row[0] for row in rows]
+            )
+            with transaction.atomic():
+                before = chunk.count()
+                EventClassStart.objects.bulk_create(
+                    starts, ignore_conflicts=True
+                )
+                created += chunk.count() - before
+            self.stdout.write(f"{events} events processed")
+
+        self.stdout.write(
+            f"backfilled {created} class starts from {events} events"
+        )
@@ -0,0 +1,43 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from sbyra_src.racing.models import Result
+from sbyra_src.racing.scoring import BatchScorer
+
+
+class Command(BaseCommand):
+    help = "Backfills Result.elapsed_seconds / corrected_seconds for results scored before the columns existed"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=settings.RESCORE_BATCH_SIZE,
+            help="results scored and written per transaction",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        pending = Result.objects.filter(
+            posted_time__isnull=False, corrected_seconds__isnull=True
+        ).order_by("pk")
+
+        last_pk, seen, changed = 0, 0, 0
+        while (
+            True
+        ):  # keyset chunks: each query starts after the last pk
+            chunk = list(
+                pending.filter(pk__gt=last_pk).values_list(
+                    "pk", flat=True
+                )[:batch_size]
+            )
+            if not chunk:
+                break
+            last_pk = chunk[-1]
+            seen += len(chunk)
+            changed += len(
+                BatchScorer(Result.objects.filter(pk__in=chunk)).run()
+            )
+            self.stdout.write(f"{seen} results processed")
+
+        self.stdout.write(f"backfilled {changed} of {seen} results")
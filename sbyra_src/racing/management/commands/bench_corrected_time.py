@@ -0,0 +1,172 @@
+import datetime
+import random
+import time
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from sbyra_src.racing.models import (
+    Event,
+    EventClassStart,
+    Result,
+    Series,
+    Spinnaker,
+    Yacht,
+)
+
+CLASS_STARTS = [("A", 0), ("A1", 0), ("B", 5), ("C", 10), ("J", 15)]
+
+
+class Rollback(Exception):
+    """Raised to discard the benchmark data"""
+
+
+class Command(BaseCommand):
+    help = "Benchmarks Result.objects.with_corrected_time() against scoring in a Python loop (data is rolled back)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--results",
+            type=int,
+            default=100000,
+            help="results created",
+        )
+        parser.add_argument(
+            "--fleet", type=int, default=500, help="results per event"
+        )
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self.create_results(
+                    options["results"], options["fleet"]
+                )
+                self.bench()
+                raise Rollback
+        except Rollback:
+            pass
+
+    def bench(self):
+        # Python loop: load models and score every result, best case (class starts loaded once per event)
+        start = time.perf_counter()
+        starts = defaultdict(dict)
+        class_starts = EventClassStart.objects.values_list(
+            "event", "yacht_class", "start"
+        )
+        for event_id, yacht_class, class_start in class_starts:
+            starts[event_id][yacht_class] = class_start
+        python = {}
+        for result in Result.objects.select_related(
+            "event__series", "yacht__spinnaker_class"
+        ):
+            result.event.starts = starts[result.event_id]
+            python[result.pk] = result.calc_seconds[1]
+        fastest = sorted(
+            (pk for pk in python if python[pk] is not None),
+            key=python.get,
+        )[:20]
+        python_time = time.perf_counter() - start
+
+        # Database: the same 20 fastest results in one annotated query
+        annotated = Result.objects.with_corrected_time()
+        start = time.perf_counter()
+        top = list(
+            annotated.filter(calc_corrected__isnull=False)
+            .order_by("calc_corrected", "pk")
+            .values_list("pk", flat=True)[:20]
+        )
+        top_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        database = dict(
+            annotated.order_by().values_list("pk", "calc_corrected")
+        )
+        all_time = time.perf_counter() - start
+
+        self.stdout.write(
+            f"{len(python)} results: python loop {python_time:.2f} s, "
+            f"annotated top 20 {top_time:.2f} s, "
+            f"annotated all {all_time:.2f} s"
+        )
+        same_top = [python[pk] for pk in top] == [
+            python[pk] for pk in fastest
+        ]  # compared by corrected time, ties may list other yachts
+        self.stdout.write(
+            f"identical: {database == python}, same top 20: {same_top}"
+        )
+
+    def create_results(self, results, fleet):
+        rng = random.Random(results)
+        spinnakers = [
+            Spinnaker.objects.create(
+                spinnaker_class_name=f"S{i}", adjustment_value=i * 3
+            )
+            for i in range(6)
+        ]
+        yachts = Yacht.objects.bulk_create(
+            Yacht(
+                yacht_name=f"bench corrected {i}",
+                slug=f"bench-corrected-{i}",
+                sail_num=f"bench-corrected-{i}",
+                yacht_class=rng.choice(CLASS_STARTS)[0],
+                phrf_rating=rng.randint(-300, 2500) / 10,
+                spinnaker_class=rng.choice(spinnakers),
+                is_active=rng.random() < 0.95,
+            )
+            for i in range(fleet)
+        )
+        events = []
+        for handicap_system in ["TOT", "TOD", "OD"]:
+            series = Series.objects.create(
+                name=f"bench corrected {handicap_system}",
+                year=2022,
+                notes="",
+                handicap_system=handicap_system,
+            )
+            events += Event.objects.bulk_create(
+                Event(
+                    event_date=datetime.date(2022, 5, 1)
+                    + datetime.timedelta(days=i),
+                    series=series,
+                    distance=rng.randint(200, 1500) / 100,
+                )
+                for i in range(-(-results // fleet // 3))
+            )
+        EventClassStart.objects.bulk_create(
+            EventClassStart(
+                event=event,
+                yacht_class=yacht_class,
+                start=datetime.time(18, minute),
+            )
+            for event in events
+            for yacht_class, minute in CLASS_STARTS
+        )
+
+        entries = [
+            (event, yacht) for event in events for yacht in yachts
+        ][:results]
+        Result.objects.bulk_create(
+            (
+                Result(
+                    event=event,
+                    yacht=yacht,
+                    finish_time=datetime.time(
+                        rng.randint(19, 21),
+                        rng.randint(0, 59),
+                        rng.randint(0, 59),
+                    ),
+                    time_penalty=(
+                        datetime.time(0, rng.randint(1, 5))
+                        if rng.random() < 0.05
+                        else None
+                    ),
+                    used_spinnaker=rng.random() < 0.5,
+                    completed_status=rng.choice(
+                        ["CMP"] * 8 + ["DNC", "DSQ"]
+                    ),
+                )
+                for event, yacht in entries
+            ),
+            batch_size=2000,
+        )
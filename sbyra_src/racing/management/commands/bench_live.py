@@ -0,0 +1,149 @@
+import asyncio
+import datetime
+import time
+import tracemalloc
+
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+
+from sbyra_src.racing import live
+from sbyra_src.racing.live import (
+    InProcessBroker,
+    channel_name,
+    live_application,
+    publish_leaderboard,
+)
+from sbyra_src.racing.models import (
+    Event,
+    EventClassStart,
+    Result,
+    Series,
+    Yacht,
+)
+
+
+class Command(BaseCommand):
+    help = "Load tests the live leaderboard: memory per idle subscriber and time to fan a finish out to all of them"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--subscribers",
+            type=int,
+            default=5000,
+            help="concurrent event streams",
+        )
+        parser.add_argument(
+            "--fleet", type=int, default=20, help="results in the class"
+        )
+
+    def handle(self, *args, **options):
+        live._broker = InProcessBroker(queue_size=10)
+        # subscribers read the leaderboard from their own thread: the data is committed and deleted afterwards
+        series, event, yachts = self.create_event(options["fleet"])
+        try:
+            asyncio.run(
+                self.bench(event, yachts, options["subscribers"])
+            )
+        finally:
+            series.delete()
+            Yacht.objects.filter(pk__in=[y.pk for y in yachts]).delete()
+            cache.delete(f"racing:{channel_name(event.pk, 'A')}")
+            live._broker = None
+
+    async def bench(self, event, yachts, subscribers):
+        path = f"/racing/live/{event.pk}/A"
+        app = live_application(None)
+        disconnect = asyncio.Event()
+        received = {"snapshot": 0, "delta": 0}
+
+        async def receive():
+            await disconnect.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            body = message.get("body", b"")
+            if body.startswith(b"event: snapshot"):
+                received["snapshot"] += 1
+            elif body.startswith(b"event: delta"):
+                received["delta"] += 1
+
+        async def until(kind, count):
+            while received[kind] < count:
+                await asyncio.sleep(0.001)
+
+        await sync_to_async(publish_leaderboard)(event.pk, "A")
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        streams = [
+            asyncio.ensure_future(
+                app(
+                    {"type": "http", "method": "GET", "path": path},
+                    receive,
+                    send,
+                )
+            )
+            for i in range(subscribers)
+        ]
+        await until("snapshot", subscribers)
+        connect_time = (
+            time.perf_counter() - start
+        )  # tracemalloc included
+        memory = tracemalloc.get_traced_memory()[0] - before
+        tracemalloc.stop()
+
+        def finish():
+            Result.objects.filter(event=event, yacht=yachts[-1]).update(
+                position=0
+            )  # new leader
+            return publish_leaderboard(event.pk, "A")
+
+        start = time.perf_counter()
+        await sync_to_async(finish)()
+        await until("delta", subscribers)
+        fanout_time = time.perf_counter() - start
+
+        disconnect.set()
+        await asyncio.gather(*streams)
+
+        self.stdout.write(
+            f"{subscribers} subscribers: connected with snapshots in "
+            f"{connect_time:.2f} s, {memory / subscribers / 1024:.1f} KiB "
+            f"per idle subscriber"
+        )
+        self.stdout.write(
+            f"one finish fanned out to all subscribers in "
+            f"{fanout_time * 1000:.0f} ms"
+        )
+
+    def create_event(self, fleet):
+        series = Series.objects.create(
+            name="bench live", year=2022, notes=""
+        )
+        event = Event.objects.create(
+            event_date=datetime.date(2022, 6, 1), series=series
+        )
+        EventClassStart.objects.create(
+            event=event, yacht_class="A", start=datetime.time(18, 0)
+        )
+        yachts = Yacht.objects.bulk_create(
+            Yacht(
+                yacht_name=f"bench live {i}",
+                slug=f"bench-live-{i}",
+                sail_num=f"bench-live-{i}",
+                yacht_class="A",
+                phrf_rating=100 + i,
+            )
+            for i in range(fleet)
+        )
+        Result.objects.bulk_create(
+            Result(
+                event=event,
+                yacht=yacht,
+                finish_time=datetime.time(19, i % 60),
+            )
+            for i, yacht in enumerate(yachts)
+        )
+        Result.objects.score_event(event)
+        return series, event, yachts
@@ -0,0 +1,148 @@
+import datetime
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from sbyra_src.racing.models import (
+    Event,
+    EventClassStart,
+    Result,
+    Series,
+    Spinnaker,
+    Yacht,
+)
+
+SCORED = ("pk", "elapsed_seconds", "corrected_seconds", "posted_time")
+
+
+class Rollback(Exception):
+    """Raised to discard the benchmark data"""
+
+
+class QueryCounter:
+    """connection.execute_wrapper counting executed queries (no query log size limit)"""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+    def __len__(self):
+        return self.count
+
+
+class Command(BaseCommand):
+    help = "Benchmarks per-row Result.save() scoring against Result.objects.score_event() (data is rolled back)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--entries",
+            nargs="+",
+            type=int,
+            default=[50, 500, 5000],
+            help="results per event",
+        )
+
+    def handle(self, *args, **options):
+        for entries in options["entries"]:
+            try:
+                with transaction.atomic():
+                    self.bench(entries)
+                    raise Rollback
+            except Rollback:
+                pass
+
+    def bench(self, entries):
+        event = self.create_event(entries)
+
+        row_queries = QueryCounter()
+        with connection.execute_wrapper(row_queries):
+            start = time.perf_counter()
+            for result in Result.objects.filter(event=event):
+                result.save()
+            row_time = time.perf_counter() - start
+        expected = set(
+            Result.objects.filter(event=event).values_list(*SCORED)
+        )
+
+        Result.objects.filter(event=event).update(
+            elapsed_seconds=None,
+            corrected_seconds=None,
+            posted_time=None,
+        )
+        bulk_queries = QueryCounter()
+        with connection.execute_wrapper(bulk_queries):
+            start = time.perf_counter()
+            Result.objects.score_event(event)
+            bulk_time = time.perf_counter() - start
+        scored = set(
+            Result.objects.filter(event=event).values_list(*SCORED)
+        )
+
+        self.stdout.write(
+            f"{entries} entries: per-row {row_time * 1000:.0f} ms "
+            f"({len(row_queries)} queries), score_event "
+            f"{bulk_time * 1000:.0f} ms ({len(bulk_queries)} queries), "
+            f"identical: {scored == expected}"
+        )
+
+    def create_event(self, entries):
+        rng = random.Random(entries)
+        spinnakers = [
+            Spinnaker.objects.create(
+                spinnaker_class_name=f"S{i}", adjustment_value=i * 3
+            )
+            for i in range(6)
+        ]
+        series = Series.objects.create(
+            name=f"bench {entries}", year=2022, notes=""
+        )
+        event = Event.objects.create(
+            event_date=datetime.date(2022, 6, 1),
+            series=series,
+        )
+        EventClassStart.objects.bulk_create(
+            EventClassStart(
+                event=event,
+                yacht_class=yacht_class,
+                start=datetime.time(18, minute),
+            )
+            for yacht_class, minute in [
+                ("A", 0),
+                ("A1", 0),
+                ("B", 5),
+                ("C", 10),
+                ("J", 15),
+            ]
+        )
+        yachts = Yacht.objects.bulk_create(
+            Yacht(
+                yacht_name=f"bench {entries} {i}",
+                slug=f"bench-{entries}-{i}",
+                sail_num=f"bench-{entries}-{i}",
+                yacht_class=rng.choice(["A", "A1", "B", "C", "J"]),
+                phrf_rating=rng.randint(-30, 250),
+                spinnaker_class=rng.choice(spinnakers),
+                is_active=True,
+            )
+            for i in range(entries)
+        )
+        Result.objects.bulk_create(
+            Result(
+                event=event,
+                yacht=yacht,
+                finish_time=datetime.time(
+                    19, rng.randint(0, 59), rng.randint(0, 59)
+                ),
+                used_spinnaker=rng.random() < 0.5,
+                completed_status=rng.choice(
+                    ["CMP"] * 8 + ["DNC", "DSQ"]
+                ),
+            )
+            for yacht in yachts
+        )
+        return event
@@ -0,0 +1,159 @@
+import datetime
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from sbyra_src.racing.management.commands.bench_scoring import (
+    QueryCounter,
+    Rollback,
+)
+from sbyra_src.racing.models import (
+    Event,
+    Result,
+    Series,
+    SeriesStanding,
+    Yacht,
+)
+from sbyra_src.racing.standings import (
+    compute_series_class,
+    refresh_series_class,
+    score_event_class,
+    update_standings,
+)
+
+STANDING = (
+    "yacht_id",
+    "points",
+    "gross_points",
+    "races_sailed",
+    "rank",
+)
+
+
+def standing_rows(standings):
+    return sorted(
+        tuple(getattr(s, f) for f in STANDING) for s in standings
+    )
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmarks series standings with throwouts: full recompute against the update run when one result is "
+        "saved (data is rolled back)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--boats", type=int, default=150, help="yachts in the class"
+        )
+        parser.add_argument(
+            "--races", type=int, default=40, help="races in the series"
+        )
+        parser.add_argument(
+            "--throwouts",
+            type=int,
+            default=4,
+            help="discards per yacht",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self.bench(
+                    options["boats"],
+                    options["races"],
+                    options["throwouts"],
+                )
+                raise Rollback
+        except Rollback:
+            pass
+
+    def bench(self, boats, races, throwouts):
+        series, events, last = self.create_series(
+            boats, races, throwouts
+        )
+
+        # full recompute: every race of the class scored, standings rewritten
+        full_queries = QueryCounter()
+        with connection.execute_wrapper(full_queries):
+            start = time.perf_counter()
+            with transaction.atomic():
+                for event in events:
+                    score_event_class(event.pk, "A")
+                SeriesStanding.objects.filter(series=series).delete()
+                refresh_series_class(series.pk, "A")
+            full_time = time.perf_counter() - start
+
+        # single result: the update the Result signals run when one finish is posted
+        Result.objects.bulk_create([last])
+        update_queries = QueryCounter()
+        with connection.execute_wrapper(update_queries):
+            start = time.perf_counter()
+            update_standings(events[-1].pk, series.pk, "A")
+            update_time = time.perf_counter() - start
+
+        stored = SeriesStanding.objects.filter(series=series)
+        identical = standing_rows(stored) == standing_rows(
+            compute_series_class(series.pk, "A")
+        )
+        self.stdout.write(
+            f"{boats} boats x {races} races, {throwouts} throwouts: "
+            f"full recompute {full_time * 1000:.0f} ms "
+            f"({len(full_queries)} queries), single result "
+            f"{update_time * 1000:.0f} ms ({len(update_queries)} queries), "
+            f"identical: {identical}"
+        )
+
+    def create_series(self, boats, races, throwouts):
+        """
+        Scored results (corrected_seconds set, one in ten DNC) for every boat in every race, except the last
+        result of the last race, which is returned unsaved
+
+        """
+        rng = random.Random(boats * races)
+        series = Series.objects.create(
+            name="bench standings",
+            year=2022,
+            notes="",
+            throwouts=throwouts,
+        )
+        Yacht.objects.bulk_create(
+            Yacht(
+                yacht_name=f"bench standings {i}",
+                slug=f"bench-standings-{i}",
+                sail_num=f"bench-standings-{i}",
+                yacht_class="A",
+                phrf_rating=rng.randint(-30, 250),
+                is_active=True,
+            )
+            for i in range(boats)
+        )
+        Event.objects.bulk_create(
+            Event(
+                event_date=datetime.date(2022, 4, 1)
+                + datetime.timedelta(days=race),
+                series=series,
+            )
+            for race in range(races)
+        )
+        # bulk_create does not set primary keys on every backend
+        yachts = Yacht.objects.filter(
+            sail_num__startswith="bench-standings-"
+        )
+        events = list(
+            Event.objects.filter(series=series).order_by("event_date")
+        )
+        results = [
+            Result(
+                event=event,
+                yacht=yacht,
+                corrected_seconds=rng.randint(3000, 6000),
+                completed_status=rng.choice(["CMP"] * 9 + ["DNC"]),
+            )
+            for event in events
+            for yacht in yachts
+        ]
+        Result.objects.bulk_create(results[:-1])
+        return series, events, results[-1]
@@ -0,0 +1,87 @@
+import asyncio
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.test import AsyncClient, Client, override_settings
+
+
+class Command(BaseCommand):
+    help = (
+        "Load comparison of the WSGI (worker threads) and ASGI (event loop, a thread per sync view) paths for "
+        "read-only racing pages"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "paths",
+            nargs="*",
+            default=["/racing/", "/racing/yachts/"],
+            help="urls to request",
+        )
+        parser.add_argument("--requests", type=int, default=200)
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=50,
+            help="simultaneous spectators",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=4,
+            help="WSGI worker threads",
+        )
+
+    @override_settings(ALLOWED_HOSTS=["testserver"])
+    def handle(self, *args, **options):
+        for path in options["paths"]:
+            wsgi = self.bench_wsgi(path, options)
+            asgi = self.bench_asgi(path, options)
+            self.report(path, "wsgi", wsgi)
+            self.report(path, "asgi", asgi)
+
+    def bench_wsgi(self, path, options):
+        client = Client()
+
+        def timed_get(i):
+            start = time.perf_counter()
+            client.get(path)
+            return time.perf_counter() - start
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options["workers"]) as pool:
+            latencies = list(
+                pool.map(timed_get, range(options["requests"]))
+            )
+        return latencies, time.perf_counter() - start
+
+    def bench_asgi(self, path, options):
+        async def run():
+            client = AsyncClient()
+            limit = asyncio.Semaphore(options["concurrency"])
+
+            async def timed_get():
+                async with limit:
+                    start = time.perf_counter()
+                    await client.get(path)
+                    return time.perf_counter() - start
+
+            start = time.perf_counter()
+            latencies = await asyncio.gather(
+                *(timed_get() for i in range(options["requests"]))
+            )
+            return latencies, time.perf_counter() - start
+
+        return asyncio.run(run())
+
+    def report(self, path, label, result):
+        latencies, elapsed = result
+        latencies = sorted(latencies)
+        p95 = latencies[int(len(latencies) * 0.95) - 1]
+        self.stdout.write(
+            f"{path} {label}: {len(latencies) / elapsed:.0f} req/s, "
+            f"p50 {statistics.median(latencies) * 1000:.1f} ms, "
+            f"p95 {p95 * 1000:.1f} ms"
+        )
@@ -0,0 +1,48 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from sbyra_src.racing.exports import (
+    EXPORT_FORMATS,
+    export_lines,
+    results_for_export,
+)
+
+
+class Command(BaseCommand):
+    help = "Streams results as CSV or newline-delimited JSON to stdout or a file (memory stays flat)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--series", type=int, help="series id")
+        parser.add_argument("--event", type=int, help="event id")
+        parser.add_argument(
+            "--class", dest="yacht_class", help="yacht class"
+        )
+        parser.add_argument(
+            "--format", choices=list(EXPORT_FORMATS), default="csv"
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=settings.EXPORT_CHUNK_SIZE,
+            help="rows fetched per database round trip",
+        )
+        parser.add_argument(
+            "--output", help="file to write (default: stdout)"
+        )
+
+    def handle(self, *args, **options):
+        results = results_for_export(
+            series=options["series"],
+            event=options["event"],
+            yacht_class=options["yacht_class"],
+        )
+        lines = export_lines(
+            results, options["format"], options["chunk_size"]
+        )
+        if options["output"] is None:
+            for line in lines:
+                self.stdout.write(line, ending="")
+            return
+
+        with open(options["output"], "w", newline="") as output:
+            output.writelines(lines)
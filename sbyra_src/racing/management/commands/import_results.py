@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from sbyra_src.racing.imports import ResultImportError, import_results
+
+
+class Command(BaseCommand):
+    help = "Imports results from a CSV file, validates every row first and scores each event once"
+
+    def add_arguments(self, parser):
+        parser.add_argument("csv_file", help="path to the CSV file")
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="results inserted per INSERT statement",
+        )
+
+    def handle(self, *args, **options):
+        with open(options["csv_file"], newline="") as csv_file:
+            try:
+                count = import_results(csv_file, options["batch_size"])
+            except ResultImportError as error:
+                for line, message in error.errors:
+                    self.stderr.write(f"line {line}: {message}")
+                raise CommandError(f"{error}, nothing imported")
+        self.stdout.write(f"imported {count} results")
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from sbyra_src.racing.rollups import rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = "Rebuilds yacht season stats and head-to-head records from scored results (backfills)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--year", type=int, help="only this season (series year)"
+        )
+
+    def handle(self, *args, **options):
+        stats, head_to_head = rebuild_rollups(options["year"])
+        self.stdout.write(
+            f"rebuilt {stats} season stats and {head_to_head} head-to-head records"
+        )
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from sbyra_src.racing.standings import (
+    rebuild_standings,
+    verify_standings,
+)
+
+
+class Command(BaseCommand):
+    help = "Rebuilds result points and SeriesStanding from scratch, then verifies consistency"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--verify-only",
+            action="store_true",
+            help="only compare stored standings with a fresh computation",
+        )
+
+    def handle(self, *args, **options):
+        if not options["verify_only"]:
+            count = rebuild_standings()
+            self.stdout.write(f"rebuilt {count} standings")
+
+        problems = verify_standings()
+        for problem in problems:
+            self.stderr.write(problem)
+        if problems:
+            raise CommandError(f"{len(problems)} inconsistencies found")
+        self.stdout.write("standings consistent")
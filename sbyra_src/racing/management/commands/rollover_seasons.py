@@ -0,0 +1,22 @@
+import datetime
+
+from django.core.management.base import BaseCommand
+
+from sbyra_src.racing.seasons import rollover
+
+
+class Command(BaseCommand):
+    help = "Archives every current series of a past year (run daily from cron or celery beat, safe to repeat)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--today",
+            type=datetime.date.fromisoformat,
+            help="date to roll over to, YYYY-MM-DD (default: today)",
+        )
+
+    def handle(self, *args, **options):
+        archived = rollover(options["today"])
+        for series in archived:
+            self.stdout.write(f"archived {series}")
+        self.stdout.write(f"{len(archived)} series archived")
@@ -1,4 +1,15 @@
 from django.db import models
+from django.db.models import (
+    Case,
+    Exists,
+    F,
+    OuterRef,
+    Q,
+    Subquery,
+    When,
+    Window,
+)
+from django.db.models.functions import Cast, Coalesce, Rank, RowNumber
 
 # ------------------- MODEL: Yacht ------------------- #
 
@@ -23,6 +34,32 @@ class DefaultYachtManager(models.Manager):
         return self.filter(is_active=True)
 
 
+# ------------------- MODEL: RatingCertificate ------------------- #
+
+
+class RatingCertificateQuerySet(models.QuerySet):
+    """RatingCertificate querysets with validity lookups (certificate_as_of_idx)"""
+
+    def as_of(self, date):  # RatingCertificate.objects.as_of(date)
+        """Certificates valid on date"""
+        return self.filter(valid_from__lte=date).filter(
+            Q(valid_to__isnull=True) | Q(valid_to__gt=date)
+        )
+
+    # RatingCertificate.objects.overlapping(first, last)
+    def overlapping(self, first, last):
+        """Certificates valid on any day from first to last (inclusive)"""
+        return self.filter(valid_from__lte=last).filter(
+            Q(valid_to__isnull=True) | Q(valid_to__gt=first)
+        )
+
+
+class RatingCertificateManager(
+    models.Manager.from_queryset(RatingCertificateQuerySet)
+):
+    """Default RatingCertificate.objects manager with as_of() and overlapping()"""
+
+
 # ------------------- MODEL: Series ------------------- #
 
 
@@ -38,3 +75,168 @@ class CurrentYearSeriesManager(models.Manager):
 
     def get_queryset(self):  # Series.current.all()
         return super().get_queryset().filter(current_year=True)
+
+
+# ------------------- MODEL: Result ------------------- #
+
+
+class ResultQuerySet(models.QuerySet):
+    """Result querysets with database side scoring annotations"""
+
+    def current(self):  # Result.objects.current()
+        """Results of current seasons only (archived seasons are read through racing.seasons)"""
+        return self.filter(archived=False)
+
+    # Result.objects.with_corrected_time()
+    def with_corrected_time(self):
+        """
+        Annotates calc_elapsed and calc_corrected (seconds, None where not scored) computed in the database, so
+        pages can order and filter on corrected time without loading models. Same arithmetic as
+        Result.calc_seconds:
+
+        1. Class start: EventClassStart of the event and the yacht's class (indexed subquery)
+        2. Elapsed: finish - start + penalty, in seconds
+        3. Rating valid on the event date (RatingCertificate subquery, else the yacht's current rating)
+        4. Effective phrf and the series handicap system (one CASE branch per registered system)
+
+        """
+        from sbyra_src.racing.corrections import (
+            effective_phrf_expression,
+        )
+        from sbyra_src.racing.handicaps import HANDICAP_SYSTEMS
+        from sbyra_src.racing.models import (
+            EventClassStart,
+            RatingCertificate,
+        )
+        from sbyra_src.utils.time_conversions import seconds_expression
+
+        start = Subquery(
+            EventClassStart.objects.filter(
+                event=OuterRef("event"),
+                yacht_class=OuterRef("yacht__yacht_class"),
+            )
+            .order_by()
+            .values_list(seconds_expression("start"))[:1],
+            output_field=models.IntegerField(),
+        )
+        elapsed = (
+            seconds_expression("finish_time")
+            - start
+            + Coalesce(seconds_expression("time_penalty"), 0)
+        )
+        # rating valid on the event date, else the yacht's current rating
+        certificate = RatingCertificate.objects.as_of(
+            OuterRef("event__event_date")
+        ).filter(yacht=OuterRef("yacht"))
+        phrf = effective_phrf_expression(
+            phrf=Coalesce(
+                Subquery(certificate.values("phrf_rating")[:1]),
+                "yacht__phrf_rating",
+            ),
+            adjustment=Case(
+                When(
+                    Exists(certificate),
+                    then=Subquery(
+                        certificate.values(
+                            "spinnaker_class__adjustment_value"
+                        )[:1]
+                    ),
+                ),
+                default=F("yacht__spinnaker_class__adjustment_value"),
+            ),
+        )
+        corrected = Case(
+            *[
+                When(
+                    event__series__handicap_system=key,
+                    then=system.correct_expression(
+                        elapsed, phrf, F("event__distance")
+                    ),
+                )
+                for key, system in HANDICAP_SYSTEMS.items()
+            ],
+            output_field=models.FloatField(),
+        )
+        scored = Q(
+            yacht__is_active=True,
+            completed_status="CMP",
+            finish_time__isnull=False,
+        )
+        return self.annotate(
+            calc_elapsed=Case(
+                When(scored, then=elapsed),
+                output_field=models.IntegerField(),
+            ),
+            calc_corrected=Case(
+                When(
+                    scored, then=Cast(corrected, models.IntegerField())
+                ),
+                output_field=models.IntegerField(),
+            ),
+        )
+
+    # Result.objects.with_class_rank()
+    def with_class_rank(self):
+        """
+        Annotates class_rank (RANK(), ties share a position) and class_row (ROW_NUMBER(), unique display order)
+        partitioned by event and yacht class. Finishers come first by corrected seconds, then unscored entries,
+        then DNC and DSQ in CompletionStatusChoice order. Computed by the database in the same query as the rows.
+
+        """
+        from sbyra_src.racing.choices import CompletionStatusChoice
+
+        status_order = Case(
+            When(
+                completed_status=CompletionStatusChoice.CMP,
+                corrected_seconds__isnull=False,
+                then=0,
+            ),
+            *[
+                When(completed_status=status, then=order)
+                for order, status in enumerate(
+                    CompletionStatusChoice.values, start=1
+                )
+            ],
+            output_field=models.IntegerField(),
+        )
+        partition = [F("event"), F("yacht__yacht_class")]
+        order = [
+            status_order.asc(),
+            F("corrected_seconds").asc(nulls_last=True),
+        ]
+        return self.annotate(
+            class_rank=Window(
+                Rank(), partition_by=partition, order_by=order
+            ),
+            class_row=Window(
+                RowNumber(),
+                partition_by=partition,
+                order_by=order + [F("yacht__yacht_name").asc()],
+            ),
+        )
+
+
+class DefaultResultManager(
+    models.Manager.from_queryset(ResultQuerySet)
+):
+    """Default Result.objects manager with bulk scoring and the with_corrected_time() / with_class_rank() annotations"""
+
+    def score_event(self, event):  # Result.objects.score_event(event)
+        """Scores every result of an event in one pass (racing.scoring.EventScorer). Returns updated results"""
+        from sbyra_src.racing.scoring import EventScorer
+
+        return EventScorer(event).run()
+
+    def rescore_series(
+        self, series
+    ):  # Result.objects.rescore_series(series)
+        """Vectorized rescoring of every result in a series (racing.scoring.BatchScorer). Returns updated results"""
+        from sbyra_src.racing.scoring import BatchScorer
+
+        return BatchScorer(self.filter(event__series=series)).run()
+
+    def rescore_year(self, year):  # Result.objects.rescore_year(2022)
+        """Vectorized rescoring of a whole season. Returns updated results"""
+        from sbyra_src.racing.scoring import BatchScorer
+
+        return BatchScorer(self.filter(event__series__year=year)).run()
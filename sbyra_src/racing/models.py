@@ -5,19 +5,25 @@ import datetime
 from django.conf import settings
 from django.db import models
 from django.urls import reverse
+from django.utils.functional import cached_property
 from django.utils.translation import gettext_lazy as _
 
 # Project level imports:
 from sbyra_src.racing.choices import (
     CompletionStatusChoice,
+    HandicapSystemChoice,
     SpinnakerClassChoice,
     YachtClassChoice,
 )
+from sbyra_src.racing.corrections import effective_phrf
+from sbyra_src.racing.handicaps import get_system
 from sbyra_src.racing.managers import (
     ActiveYachtManager,
     CurrentYearSeriesManager,
+    DefaultResultManager,
     DefaultSeriesManager,
     DefaultYachtManager,
+    RatingCertificateManager,
 )
 
 # Custom project level utility functions and validators:
@@ -26,8 +32,8 @@ from sbyra_src.utils.model_validators import (
     validate_year,
 )
 from sbyra_src.utils.time_conversions import (
+    convert_to_posted_time,
     convert_to_seconds,
-    convert_to_time_object,
 )
 
 User = settings.AUTH_USER_MODEL
@@ -239,6 +245,76 @@ class Yacht(RacingCommon):
         return int(value)
 
 
+class RatingCertificate(models.Model):
+    """
+    PHRF rating history of a yacht. A certificate applies to events from valid_from (inclusive) to valid_to
+    (exclusive, open-ended when null). Results are scored with the certificate valid on the event date, so
+    rescoring an old event uses the rating it was sailed with. Yachts without a certificate for a date are scored
+    with their current phrf_rating and spinnaker_class.
+
+    Yacht rating edits close the open certificate and open a new one from that day, or from the date entered as
+    rating_effective_from in the admin (racing.signals).
+
+    """
+
+    yacht = models.ForeignKey(
+        Yacht, related_name="certificates", on_delete=models.CASCADE
+    )  # Yacht.certificates.all()
+    phrf_rating = models.DecimalField(
+        max_digits=4, decimal_places=1, help_text=_("certified rating")
+    )
+    spinnaker_class = models.ForeignKey(
+        Spinnaker,
+        blank=True,
+        null=True,
+        on_delete=models.SET_NULL,
+        help_text=_("spinnaker class on the certificate"),
+    )
+    valid_from = models.DateField(help_text=_("first day of validity"))
+    valid_to = models.DateField(
+        blank=True,
+        null=True,
+        help_text=_("first day no longer valid, empty if current"),
+    )
+
+    objects = RatingCertificateManager()  # .as_of(date), .overlapping()
+
+    class Meta:
+        ordering = ["yacht", "-valid_from"]
+        indexes = [
+            models.Index(
+                fields=["yacht", "valid_from", "valid_to"],
+                name="certificate_as_of_idx",
+            ),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["yacht", "valid_from"],
+                name="certificate_yacht_from_unique",
+            ),
+            models.CheckConstraint(
+                check=models.Q(valid_to__isnull=True)
+                | models.Q(valid_to__gt=models.F("valid_from")),
+                name="certificate_valid_range",
+            ),
+        ]
+        verbose_name_plural = "rating certificates"
+
+    def __str__(self):
+        until = self.valid_to or "current"
+        return f"{self.yacht} {self.phrf_rating} ({self.valid_from} - {until})"
+
+    @property
+    def rating(self):
+        """(phrf rating, spinnaker adjustment) as used by scoring"""
+        adjustment = (
+            self.spinnaker_class.adjustment_value
+            if self.spinnaker_class
+            else None
+        )
+        return self.phrf_rating, adjustment
+
+
 class Series(RacingCommon):
     """Series class describing all attributes of a series and linking sets of events"""
 
@@ -259,11 +335,21 @@ class Series(RacingCommon):
         default=True,
         help_text=_(
             "archived if not current year"
-        ),  # needs celery script for periodic status check
+        ),  # flipped by the rollover_seasons command (racing.seasons)
     )
     notes = models.TextField(
         max_length=500, help_text=_("maximum 500 characters")
     )
+    handicap_system = models.CharField(
+        max_length=3,
+        choices=HandicapSystemChoice.choices,
+        default=HandicapSystemChoice.TOT,
+        help_text=_("handicap system used to score all events"),
+    )
+    throwouts = models.PositiveSmallIntegerField(
+        default=0,
+        help_text=_("worst races discarded from each yacht's total"),
+    )
 
     objects = DefaultSeriesManager()
     current = CurrentYearSeriesManager()
@@ -277,33 +363,88 @@ class Series(RacingCommon):
 
 
 class Event(RacingCommon):
-    """Event class describing all attributes of an event. Start times based on Yacht class field"""
+    """Event class describing all attributes of an event. Start times per yacht class are in EventClassStart"""
 
     event_date = models.DateField(blank=True)
     series = models.ForeignKey(
         Series, related_name="events", on_delete=models.CASCADE
     )  # Series.events.all()
-    first_flag_A = models.TimeField(blank=True, null=True)
-    first_flag_B = models.TimeField(blank=True, null=True)
-    first_flag_C = models.TimeField(blank=True, null=True)
-    start_A = models.TimeField(blank=True, null=True)
-    start_B = models.TimeField(blank=True, null=True)
-    start_C = models.TimeField(blank=True, null=True)
-    start_J = models.TimeField(blank=True, null=True)
+    distance = models.DecimalField(
+        max_digits=5,
+        decimal_places=2,
+        blank=True,
+        null=True,
+        help_text=_(
+            "course length in nautical miles (time on distance)"
+        ),
+    )
     notes = models.TextField(
         max_length=200,
         blank=True,
         help_text="Add general event comments",
     )
     yachts = models.ManyToManyField(Yacht, through="Result")
+    archived = models.BooleanField(
+        default=False,
+        editable=False,
+        help_text=_("past season (copy of not series.current_year)"),
+    )
 
     class Meta:
         ordering = ["event_date"]
+        indexes = [
+            models.Index(
+                fields=["event_date"],
+                name="event_current_date_idx",
+                condition=models.Q(archived=False),
+            ),
+        ]
         verbose_name_plural = "events"
 
     def __str__(self):
         return str(self.event_date)
 
+    @cached_property
+    def starts(self):
+        """{yacht class: start time} loaded once per instance (uses prefetch_related("class_starts") if present)"""
+        return {
+            class_start.yacht_class: class_start.start
+            for class_start in self.class_starts.all()
+        }
+
+    def class_start(self, yacht_class):
+        """Returns the start time for a yacht class, None if the class has no start"""
+        return self.starts.get(yacht_class)
+
+
+class EventClassStart(models.Model):
+    """Start time and first flag of one yacht class in an event. Each class has its own row (A1 included)"""
+
+    event = models.ForeignKey(
+        Event,
+        related_name="class_starts",  # Event.class_starts.all()
+        on_delete=models.CASCADE,
+    )
+    yacht_class = models.CharField(
+        max_length=2,
+        choices=YachtClassChoice.choices,
+        help_text=_("class starting"),
+    )
+    first_flag = models.TimeField(
+        blank=True, null=True, help_text=_("Format: HH:MM:SS")
+    )
+    start = models.TimeField(
+        blank=True, null=True, help_text=_("Format: HH:MM:SS")
+    )
+
+    class Meta:
+        ordering = ["event", "start"]
+        unique_together = [["event", "yacht_class"]]
+        verbose_name_plural = "event class starts"
+
+    def __str__(self):
+        return f"{self.event}: {self.yacht_class} {self.start}"
+
 
 class Result(RacingCommon):
     """Custom Through table linking Many to Many relationship between Yacht and Event"""
@@ -328,59 +469,131 @@ class Result(RacingCommon):
     posted_time = models.TimeField(
         blank=True,
         null=True,
-        help_text=_("Format: HH:MM:SS"),
+        help_text=_("Format: HH:MM:SS (display only)"),
+    )
+    elapsed_seconds = models.IntegerField(
+        blank=True,
+        null=True,
+        help_text=_("elapsed time incl. penalty (set by scoring)"),
+    )
+    corrected_seconds = models.IntegerField(
+        blank=True,
+        null=True,
+        help_text=_("corrected time (set by scoring)"),
     )
     used_spinnaker = models.BooleanField(
         default=False, help_text=_("spinnaker used during event")
     )
+    position = models.IntegerField(
+        blank=True,
+        null=True,
+        help_text=_("finishing position in class (set by scoring)"),
+    )
+    points = models.IntegerField(
+        blank=True,
+        null=True,
+        help_text=_("low point score in class (set by scoring)"),
+    )
     notes = models.TextField(
         max_length=100, blank=True, help_text=_("add any result notes")
     )
+    version = models.PositiveIntegerField(
+        default=0,
+        help_text=_("incremented on every edit (optimistic locking)"),
+    )
+    archived = models.BooleanField(
+        default=False,
+        editable=False,
+        help_text=_("past season (copy of event.archived)"),
+    )
+    scored_phrf_rating = models.DecimalField(
+        max_digits=4,
+        decimal_places=1,
+        blank=True,
+        null=True,
+        editable=False,
+        help_text=_("phrf rating scored with (set by scoring)"),
+    )
+    scored_spinnaker_adjustment = models.IntegerField(
+        blank=True,
+        null=True,
+        editable=False,
+        help_text=_("spinnaker adjustment scored with"),
+    )
+
+    objects = DefaultResultManager()  # Result.objects.score_event()
 
     class Meta:
-        ordering = ["-posted_time"]
+        ordering = ["event_id", "corrected_seconds"]
         unique_together = [["event", "yacht"]]
+        indexes = [
+            models.Index(
+                fields=["event", "corrected_seconds"],
+                name="result_event_corrected_idx",
+            ),  # every season: scoring, default ordering and archives read results by event
+        ]
         verbose_name_plural = "results"
 
     def __str__(self):
         return f"{self.event}: {self.yacht}"
 
+    @cached_property
+    def certificate(self):
+        """
+        RatingCertificate valid on the event date, None if there is none (or the yacht is not saved). The scorers
+        assign it for a whole event or selection from one range query instead.
+
+        """
+        if self.yacht_id is None or self.event.event_date is None:
+            return None
+        return (
+            RatingCertificate.objects.as_of(self.event.event_date)
+            .filter(yacht_id=self.yacht_id)
+            .select_related("spinnaker_class")
+            .first()
+        )
+
+    @property
+    def rating(self):
+        """(phrf rating, spinnaker adjustment) valid on the event date: certificate, else the yacht's current"""
+        if self.certificate is not None:
+            return self.certificate.rating
+        yacht = self.yacht
+        if yacht.spinnaker_class is None:
+            return yacht.phrf_rating, None
+        return yacht.phrf_rating, yacht.spinnaker_class.adjustment_value
+
     @property
     def yacht_class_start(self):
         """
         Returns racing class start time for a specific yacht in a specific event based on yacht racing class.
-        Called by calc_corrected_time property/method. Class start times are in Event model.
+        Called by calc_corrected_time property/method. Class start times are in EventClassStart (one dictionary
+        lookup in Event.starts).
 
         """
-        yacht_class = self.yacht.yacht_class
-        if yacht_class == "A" or "A1":
-            class_start = self.event.start_A
-        elif yacht_class == "B":
-            class_start = self.event.start_B
-        elif yacht_class == "C":
-            class_start = self.event.start_C
-        elif yacht_class == "J":
-            class_start = self.event.start_J
-        return class_start
+        return self.event.class_start(self.yacht.yacht_class)
 
     @property
-    def calc_corrected_time(self):
+    def calc_seconds(self):
         """
-        Returns the yacht's corrected time based on its elapsed time and time correction factors (phrf rating, penalties, etc.).
-        Returns result only for active yachts that have completed the event. Returns None for all other yachts.
+        Returns (elapsed seconds, corrected seconds) based on the yacht's elapsed time and time correction factors
+        (phrf rating, penalties, etc.). Returns result only for active yachts that have completed the event with a
+        class start and finish time. Returns (None, None) for all other yachts.
 
-        *sbyra time correction factor used: 650/(520 + phrf_rating)*
+        *sbyra time correction factor used: 650/(520 + phrf_rating)* (default series handicap system, see
+        racing.handicaps for the registered systems)
 
         Corrected Time Algorithm:
 
         1. Establish start time based on yach's racing class and event's corresponding start time
         2. Convert start time and finish time to seconds for processing
         3. Calculate elapsed time in seconds between start time and finish time
-        4. Apply time correction factor based on phrf_rating and yacht club's formula (may vary)
-        5. Convert corrected time above (seconds) into datetime.time object for model TimeField()
-        6. Save final datetime.time object into Result.posted_time
+        4. Apply time correction factor based on phrf_rating and the series handicap system (may vary)
+        5. Save elapsed and corrected seconds into Result.elapsed_seconds / Result.corrected_seconds (ranking,
+           ordering and aggregation run on these integer columns)
+        6. Save the corrected time as a datetime.time object into Result.posted_time for display
 
-        Method called by save() to enter corrected time in posted_time field
+        Method called by save(). Reference implementation for the bulk scoring engines (see racing.scoring).
 
         """
 
@@ -393,44 +606,202 @@ class Result(RacingCommon):
         # Establish all other inputs:
         active_status = self.yacht.is_active
         used_spinnaker = self.used_spinnaker
-        # Additional phrf adjustment based on spinnaker use and yacht's spinnaker class:
-        if used_spinnaker:
-            phrf_rating = int(
-                (self.yacht.phrf_rating)
-                - (self.yacht.spinnaker_class.adjustment_value)
-            )
-        else:
-            phrf_rating = int(self.yacht.phrf_rating)
-
-        time_correction_factor = 650 / (520 + phrf_rating)
         start_time = self.yacht_class_start
         finish_time = self.finish_time
-        penalty = self.time_penalty
-
-        if active_status and completed:
 
-            # Convert all times to seconds:
-            start = convert_to_seconds(start_time)
-            finish = convert_to_seconds(finish_time)
-            if self.time_penalty is not None:
-                penalty = convert_to_seconds(self.time_penalty)
-            else:
-                penalty = 0
+        if not (active_status and completed):
+            return None, None
+        if start_time is None or finish_time is None:
+            return None, None
 
-            # Calculate elapsed time and apply Time Correction Factor:
-            elapsed_time = (finish - start) + penalty
-            corrected_time = elapsed_time * time_correction_factor
+        # Rating valid on the event date (RatingCertificate) and spinnaker adjustment of its spinnaker class:
+        rated_phrf, adjustment = self.rating
+        if used_spinnaker:
+            spinnaker_adjustment = adjustment or 0
+        else:
+            spinnaker_adjustment = 0
+        phrf_rating = effective_phrf(
+            rated_phrf, spinnaker_adjustment, used_spinnaker
+        )
+
+        # Convert all times to seconds:
+        start = convert_to_seconds(start_time)
+        finish = convert_to_seconds(finish_time)
+        if self.time_penalty is not None:
+            penalty = convert_to_seconds(self.time_penalty)
+        else:
+            penalty = 0
 
-            # Convert seconds into datetime.time object:
-            corrected_time_obj = convert_to_time_object(corrected_time)
+        # Calculate elapsed time and apply the series handicap system (racing.handicaps):
+        elapsed_time = (finish - start) + penalty
+        system = get_system(self.event.series.handicap_system)
+        corrected_time = system.correct(
+            elapsed_time,
+            system.coefficient(phrf_rating),
+            self.event.distance,
+        )
 
-            # Return datetime.time object:
-            return corrected_time_obj
+        return elapsed_time, corrected_time
 
-        else:
-            return None
+    @property
+    def calc_corrected_time(self):
+        """Returns the corrected time as a datetime.time object (None if not scored or 24 hours or more)"""
+        return convert_to_posted_time(self.calc_seconds[1])
 
     def save(self, *args, **kwargs):
-        """override default save() method to capture posted_time by calling the calc_corrected_time @property/function"""
-        self.posted_time = self.calc_corrected_time
+        """override default save() method to capture elapsed, corrected and posted times and the rating used"""
+        self.elapsed_seconds, self.corrected_seconds = self.calc_seconds
+        (
+            self.scored_phrf_rating,
+            self.scored_spinnaker_adjustment,
+        ) = self.rating
+        self.posted_time = convert_to_posted_time(
+            self.corrected_seconds
+        )
+        if (
+            self.pk is not None
+        ):  # edits invalidate batch finish entries based on the old version
+            self.version += 1
         super(Result, self).save(*args, **kwargs)
+
+
+class SeriesStanding(models.Model):
+    """
+    Materialized series standings per yacht class, maintained incrementally by racing.standings whenever results
+    of an event are saved, deleted or bulk scored, ranked on points after the series throwouts with countback
+    (racing.scoreboard). Rebuild with: py manage.py rebuild_standings
+
+    """
+
+    series = models.ForeignKey(
+        Series,
+        related_name="standings",  # Series.standings.all()
+        on_delete=models.CASCADE,
+    )
+    yacht = models.ForeignKey(
+        Yacht, related_name="standings", on_delete=models.CASCADE
+    )
+    yacht_class = models.CharField(
+        max_length=2,
+        choices=YachtClassChoice.choices,
+        help_text=_("class the points were scored in"),
+    )
+    points = models.IntegerField(
+        default=0, help_text=_("low point score after throwouts")
+    )
+    gross_points = models.IntegerField(
+        default=0, help_text=_("total low point score")
+    )
+    races_sailed = models.IntegerField(
+        default=0, help_text=_("completed races")
+    )
+    rank = models.IntegerField(help_text=_("position in class"))
+
+    class Meta:
+        ordering = ["series", "yacht_class", "rank"]
+        unique_together = [["series", "yacht", "yacht_class"]]
+        indexes = [
+            models.Index(
+                fields=["series", "yacht_class", "rank"],
+                name="standing_class_rank_idx",
+            ),
+        ]
+        verbose_name_plural = "series standings"
+
+    def __str__(self):
+        return f"{self.series} {self.yacht_class}: {self.rank}. {self.yacht}"
+
+
+class YachtSeasonStats(models.Model):
+    """
+    Per yacht season (series year) aggregates in one class, maintained by racing.rollups whenever results of an
+    event are scored, so the yacht page reads them by index. Rebuild with: py manage.py rebuild_rollups
+
+    """
+
+    yacht = models.ForeignKey(
+        Yacht,
+        related_name="season_stats",  # Yacht.season_stats.all()
+        on_delete=models.CASCADE,
+    )
+    year = models.IntegerField(help_text=_("series year"))
+    yacht_class = models.CharField(
+        max_length=2,
+        choices=YachtClassChoice.choices,
+        help_text=_("class the races were sailed in"),
+    )
+    races = models.IntegerField(default=0, help_text=_("races entered"))
+    finishes = models.IntegerField(
+        default=0, help_text=_("races with a position")
+    )
+    wins = models.IntegerField(default=0, help_text=_("first places"))
+    total_corrected_seconds = models.BigIntegerField(
+        default=0, help_text=_("sum over finishes")
+    )
+    total_position = models.IntegerField(
+        default=0, help_text=_("sum over finishes")
+    )
+
+    class Meta:
+        ordering = ["yacht", "-year", "yacht_class"]
+        unique_together = [["yacht", "year", "yacht_class"]]
+        indexes = [
+            models.Index(
+                fields=["year", "yacht_class"],
+                name="season_stats_slice_idx",
+            ),
+        ]
+        verbose_name_plural = "yacht season stats"
+
+    def __str__(self):
+        return f"{self.yacht} {self.year} {self.yacht_class}"
+
+    @property
+    def avg_corrected_seconds(self):
+        if self.finishes:
+            return self.total_corrected_seconds / self.finishes
+
+    @property
+    def avg_position(self):
+        if self.finishes:
+            return self.total_position / self.finishes
+
+
+class HeadToHead(models.Model):
+    """
+    Season record of a yacht against one rival of its class: races both entered and how often it scored better
+    or worse. Stored once per direction so a yacht's records are one indexed read. Maintained by racing.rollups.
+
+    """
+
+    yacht = models.ForeignKey(
+        Yacht,
+        related_name="head_to_head",  # Yacht.head_to_head.all()
+        on_delete=models.CASCADE,
+    )
+    rival = models.ForeignKey(
+        Yacht, related_name="+", on_delete=models.CASCADE
+    )
+    year = models.IntegerField(help_text=_("series year"))
+    yacht_class = models.CharField(
+        max_length=2, choices=YachtClassChoice.choices
+    )
+    races = models.IntegerField(
+        default=0, help_text=_("races both yachts entered")
+    )
+    wins = models.IntegerField(default=0, help_text=_("scored better"))
+    losses = models.IntegerField(default=0, help_text=_("scored worse"))
+
+    class Meta:
+        ordering = ["yacht", "-year", "yacht_class", "-races"]
+        unique_together = [["yacht", "rival", "year", "yacht_class"]]
+        indexes = [
+            models.Index(
+                fields=["year", "yacht_class"],
+                name="head_to_head_slice_idx",
+            ),
+        ]
+        verbose_name_plural = "head to head records"
+
+    def __str__(self):
+        return f"{self.yacht} v {self.rival} {self.year}: {self.wins}-{self.losses}"
@@ -0,0 +1,63 @@
+from django.conf import settings
+
+from sbyra_src.racing.models import Result
+from sbyra_src.racing.scoring import BatchScorer
+
+"""
+Targeted rescoring after scoring-relevant edits (see racing.signals):
+
+- Yacht yacht_class changed: that yacht's current season results
+- Yacht phrf_rating or spinnaker_class changed: that yacht's current season results from the day of the change
+  (earlier results keep the rating of their RatingCertificate)
+- RatingCertificate saved or deleted: that yacht's current season results in its validity range
+- Spinnaker adjustment_value changed: current season results sailed with that spinnaker class
+
+Archived seasons (racing.seasons) are never rescored.
+
+Only the affected result ids are rescored, in RESCORE_BATCH_SIZE chunks with the vectorized BatchScorer, once the
+edit is committed (transaction.on_commit). The rescore runs inline on the request that made the edit:
+
+- the admin save waits for it (one yacht's season or one spinnaker class: a few chunks, each a handful of queries)
+- nothing is lost on a restart and no process runs a worker thread: there is no in-memory queue to drain
+- a rescore that fails after the commit leaves the edit saved with stale scores and the request reports the error;
+  Result.objects.rescore_year() and the rebuild_standings command repair them
+
+"""
+
+
+def yacht_results(yacht_id, since=None, until=None):
+    """Current season results of a yacht, optionally of events from since (inclusive) to until (exclusive)"""
+    results = Result.objects.filter(yacht_id=yacht_id, archived=False)
+    if since is not None:
+        results = results.filter(event__event_date__gte=since)
+    if until is not None:
+        results = results.filter(event__event_date__lt=until)
+    return results
+
+
+def spinnaker_results(spinnaker_id):
+    return Result.objects.filter(
+        used_spinnaker=True,
+        yacht__spinnaker_class_id=spinnaker_id,
+        archived=False,
+    )
+
+
+def rescore_in_batches(result_ids, batch_size=None):
+    """Rescores result_ids chunk by chunk. Returns the number of results whose scored times changed"""
+    batch_size = batch_size or settings.RESCORE_BATCH_SIZE
+    changed = 0
+    for i in range(0, len(result_ids), batch_size):
+        chunk = result_ids[i : i + batch_size]
+        changed += len(
+            BatchScorer(Result.objects.filter(pk__in=chunk)).run()
+        )
+    return changed
+
+
+def rescore_results(results):
+    """Rescores the results queryset in RESCORE_BATCH_SIZE chunks. Returns the number of results changed"""
+    result_ids = list(results.values_list("pk", flat=True))
+    if not result_ids:
+        return 0
+    return rescore_in_batches(result_ids)
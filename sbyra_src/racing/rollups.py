@@ -0,0 +1,283 @@
+import threading
+
+import numpy as np
+from django.db import transaction
+
+from sbyra_src.racing.models import HeadToHead, Result, YachtSeasonStats
+
+"""
+Per-yacht season rollups (YachtSeasonStats) and head-to-head records (HeadToHead), materialized so the yacht page
+reads them by index instead of joining every Result of the season with itself.
+
+Rollups are sliced by season (series year) and yacht class, like SeriesStanding:
+
+1. season_rows(): the scored results of the season and class with one query (optionally of some yachts only)
+2. compute_rollups(): per yacht totals, and head-to-head counts for every pair of yachts with NumPy (per race:
+   every yacht against every other yacht in one matrix operation)
+3. refresh_rollups(): replace that season/class slice of both tables in one transaction, or, given the events
+   that changed, update only the yachts of those events and the pairs between them
+
+An event only changes the totals of the yachts that sailed it, and only the records of pairs that both sailed it.
+refresh_rollups(year, yacht_class, events) reads the season rows of those yachts, recomputes their totals and
+mutual records, and writes the rows that differ from the stored ones: recording a finish rewrites that yacht's
+records and the few whose order changed, not the whole slice (about 22k head-to-head rows for a 150 boat class).
+
+Receivers in racing.signals queue the (season, class) slices a saved, deleted or scored result touches with
+schedule_rollups(), with the events (and yachts, for a deleted result) that changed. They are refreshed once the
+transaction commits (points and positions are final by then, and scoring does not wait for the rollups), each
+slice once however many results of it the transaction wrote. Changes that touch every race of a slice (a yacht
+changing class, an event deleted) queue the whole slice. rebuild_rollups() backs the rebuild_rollups command.
+
+"""
+
+
+def season_rows(year, yacht_class, yachts=None):
+    """(event, yacht, points, position, corrected seconds) of the scored results of a season and class"""
+    results = Result.objects.filter(
+        event__series__year=year,
+        yacht__yacht_class=yacht_class,
+        points__isnull=False,
+    )
+    if yachts is not None:
+        results = results.filter(yacht__in=yachts)
+    return list(
+        results.order_by("event").values_list(
+            "event", "yacht", "points", "position", "corrected_seconds"
+        )
+    )
+
+
+def compute_rollups(year, yacht_class, rows=None):
+    """Returns unsaved (YachtSeasonStats, HeadToHead) instances for a season and class"""
+    rows = season_rows(year, yacht_class) if rows is None else rows
+    yachts = sorted({row[1] for row in rows})
+    index = {yacht_id: i for i, yacht_id in enumerate(yachts)}
+    n = len(yachts)
+
+    stats = {
+        yacht_id: YachtSeasonStats(
+            yacht_id=yacht_id, year=year, yacht_class=yacht_class
+        )
+        for yacht_id in yachts
+    }
+    races = {}
+    for event_id, yacht_id, points, position, corrected in rows:
+        stat = stats[yacht_id]
+        stat.races += 1
+        if position is not None:
+            stat.finishes += 1
+            stat.wins += position == 1
+            stat.total_position += position
+            stat.total_corrected_seconds += corrected or 0
+        race = races.setdefault(event_id, ([], []))
+        race[0].append(index[yacht_id])
+        race[1].append(points)
+
+    met = np.zeros((n, n), dtype=np.int32)
+    wins = np.zeros((n, n), dtype=np.int32)
+    for entries, points in races.values():
+        entries = np.array(entries, dtype=np.intp)
+        points = np.array(points)
+        pair = np.ix_(entries, entries)
+        met[pair] += 1
+        wins[pair] += points[:, None] < points[None, :]
+    np.fill_diagonal(met, 0)
+
+    head_to_head = [
+        HeadToHead(
+            yacht_id=yachts[i],
+            rival_id=yachts[j],
+            year=year,
+            yacht_class=yacht_class,
+            races=int(met[i, j]),
+            wins=int(wins[i, j]),
+            losses=int(wins[j, i]),
+        )
+        for i, j in zip(*np.nonzero(met))
+    ]
+    return list(stats.values()), head_to_head
+
+
+STATS_FIELDS = (
+    "races",
+    "finishes",
+    "wins",
+    "total_corrected_seconds",
+    "total_position",
+)
+HEAD_TO_HEAD_FIELDS = ("races", "wins", "losses")
+
+
+def write_changed(model, stored, computed, key, fields):
+    """Brings the stored rows in line with the computed ones: deletes, updates and creates only what differs"""
+    stored = {key(row): row for row in stored}
+    changed, created = [], []
+    for row in computed:
+        current = stored.pop(key(row), None)
+        if current is None:
+            created.append(row)
+            continue
+        row.pk = current.pk
+        if any(getattr(row, f) != getattr(current, f) for f in fields):
+            changed.append(row)
+    if stored:
+        model.objects.filter(
+            pk__in=[row.pk for row in stored.values()]
+        ).delete()
+    if changed:
+        model.objects.bulk_update(changed, fields)
+    if created:
+        model.objects.bulk_create(created)
+
+
+def refresh_rollups(year, yacht_class, events=None, yachts=()):
+    """
+    Replaces the YachtSeasonStats and HeadToHead rows of a season and class. Given events (and yachts that left
+    them), updates only the yachts of those events and the records between them
+
+    """
+    if events is None:
+        return replace_rollups(year, yacht_class)
+
+    scope = set(yachts)
+    scope.update(
+        Result.objects.filter(
+            event__in=events, yacht__yacht_class=yacht_class
+        ).values_list("yacht", flat=True)
+    )
+    stats, head_to_head = compute_rollups(
+        year, yacht_class, season_rows(year, yacht_class, scope)
+    )
+    stored_stats = YachtSeasonStats.objects.filter(
+        year=year, yacht_class=yacht_class, yacht__in=scope
+    )
+    stored_pairs = HeadToHead.objects.filter(
+        year=year,
+        yacht_class=yacht_class,
+        yacht__in=scope,
+        rival__in=scope,
+    )
+    with transaction.atomic():
+        write_changed(
+            YachtSeasonStats,
+            stored_stats,
+            stats,
+            lambda row: row.yacht_id,
+            STATS_FIELDS,
+        )
+        write_changed(
+            HeadToHead,
+            stored_pairs,
+            head_to_head,
+            lambda row: (row.yacht_id, row.rival_id),
+            HEAD_TO_HEAD_FIELDS,
+        )
+    return stats, head_to_head
+
+
+def replace_rollups(year, yacht_class):
+    """Replaces the whole season/class slice of both tables"""
+    stats, head_to_head = compute_rollups(year, yacht_class)
+    with transaction.atomic():
+        YachtSeasonStats.objects.filter(
+            year=year, yacht_class=yacht_class
+        ).delete()
+        HeadToHead.objects.filter(
+            year=year, yacht_class=yacht_class
+        ).delete()
+        YachtSeasonStats.objects.bulk_create(stats)
+        HeadToHead.objects.bulk_create(head_to_head)
+    return stats, head_to_head
+
+
+class RollupBatch:
+    """
+    on_commit callback refreshing the (year, yacht class) slices queued during one transaction, each once. slices
+    maps a slice to the (events, yachts) that changed in it, or to None when the whole slice is refreshed
+
+    """
+
+    def __init__(self):
+        self.slices = {}
+        self.done = False
+
+    def add(self, slices, events=None, yachts=()):
+        for key in slices:
+            if events is None:
+                self.slices[key] = None
+            elif key not in self.slices:
+                self.slices[key] = (set(events), set(yachts))
+            elif self.slices[key] is not None:
+                self.slices[key][0].update(events)
+                self.slices[key][1].update(yachts)
+
+    def __call__(self):
+        self.done = True
+        for (year, yacht_class), scope in sorted(self.slices.items()):
+            if scope is None:
+                refresh_rollups(year, yacht_class)
+            else:
+                refresh_rollups(year, yacht_class, *scope)
+
+
+_batch = threading.local()
+
+
+def schedule_rollups(slices, events=None, yachts=()):
+    """
+    Queues a refresh of (year, yacht class) slices for when the current transaction commits (at once outside a
+    transaction): of the yachts of events (plus yachts, which left them) or, with events None, of whole slices.
+    Every transaction registers a single RollupBatch: a batch dropped by a rollback is no longer in the
+    connection's on_commit callbacks, and the next slice starts a new one.
+
+    """
+    slices = {
+        (year, yacht_class)
+        for year, yacht_class in slices
+        if year is not None and yacht_class
+    }
+    connection = transaction.get_connection()
+    batch = getattr(_batch, "current", None)
+    queued = (
+        batch is not None
+        and not batch.done
+        and connection.in_atomic_block
+        and any(
+            callback[1] is batch
+            for callback in connection.run_on_commit
+        )
+    )
+    if queued:
+        batch.add(slices, events, yachts)
+    elif slices:
+        _batch.current = RollupBatch()
+        _batch.current.add(slices, events, yachts)
+        transaction.on_commit(_batch.current)
+
+
+def rebuild_rollups(year=None):
+    """Recomputes every rollup (of one season) from scratch. Returns (stats rows, head-to-head rows)"""
+    results = Result.objects.exclude(yacht__yacht_class="").filter(
+        event__series__year__isnull=False
+    )
+    if year is not None:
+        results = results.filter(event__series__year=year)
+    slices = set(
+        results.order_by()
+        .values_list("event__series__year", "yacht__yacht_class")
+        .distinct()
+    )
+    counts = [0, 0]
+    with transaction.atomic():
+        stale = YachtSeasonStats.objects.all()
+        stale_pairs = HeadToHead.objects.all()
+        if year is not None:
+            stale = stale.filter(year=year)
+            stale_pairs = stale_pairs.filter(year=year)
+        stale.delete()
+        stale_pairs.delete()
+        for season, yacht_class in slices:
+            stats, head_to_head = refresh_rollups(season, yacht_class)
+            counts[0] += len(stats)
+            counts[1] += len(head_to_head)
+    return tuple(counts)
@@ -0,0 +1,131 @@
+import numpy as np
+
+"""
+Low point series scoring with throwouts for one series and yacht class (racing.standings).
+
+Scoreboard keeps every yacht's race points in one yachts x races int32 matrix (races in event order, 0 where the
+yacht has no result), plus gross and net totals per yacht:
+
+1. Throwouts: each yacht discards its worst Series.throwouts scores, never all of them (a yacht keeps at least
+   one race). The worst scores of every row are selected at once with np.partition (no sort of the whole row)
+2. Ranking: by net points. Yachts tied on net points are separated by countback (RRS A8): their kept scores best
+   to worst, then their scores in the last race, the race before and so on (discards included). Yachts still
+   tied share the better rank
+3. Races without a result are not scored, the same as a series without throwouts
+
+"""
+
+
+def competition_ranks(values):
+    """Ranks already sorted values; equal values share the better rank (1, 2, 2, 4)"""
+    ranks = []
+    for index, value in enumerate(values):
+        if index and value == values[index - 1]:
+            ranks.append(ranks[-1])
+        else:
+            ranks.append(index + 1)
+    return ranks
+
+
+class Scoreboard:
+    """Race points of one series and class in compact arrays, with throwouts and countback"""
+
+    missing = np.iinfo(np.int32).max  # no result, last in countback
+
+    def __init__(self, yacht_ids=(), race_ids=(), throwouts=0):
+        self.throwouts = throwouts
+        self.yachts = list(yacht_ids)
+        self.races = list(race_ids)
+        self.row = {
+            yacht_id: i for i, yacht_id in enumerate(self.yachts)
+        }
+        self.col = {race_id: j for j, race_id in enumerate(self.races)}
+        shape = (len(self.yachts), len(self.races))
+        self.points = np.zeros(shape, dtype=np.int32)
+        self.finished = np.zeros(shape, dtype=bool)
+        self.gross = np.zeros(len(self.yachts), dtype=np.int64)
+        self.net = np.zeros(len(self.yachts), dtype=np.int64)
+
+    @classmethod
+    def from_rows(cls, rows, throwouts=0):
+        """Scoreboard of (yacht id, race id, points, position) rows in race order"""
+        columns = list(zip(*rows))
+        if not columns:
+            return cls(throwouts=throwouts)
+        yacht, race, points, position = columns
+        yachts, i = np.unique(yacht, return_inverse=True)
+        races = list(dict.fromkeys(race))  # race order, not id order
+        race_ids, j = np.unique(race, return_inverse=True)
+        order = np.empty(len(races), dtype=np.intp)
+        order[np.searchsorted(race_ids, races)] = np.arange(len(races))
+        board = cls(yachts.tolist(), races, throwouts)
+        board.points[i, order[j]] = points
+        board.finished[i, order[j]] = np.not_equal(
+            np.array(position, dtype=object), None
+        )
+        board.compute()
+        return board
+
+    def allowed(self, entered):
+        """Number of discards for yachts with entered scored races (never all of them)"""
+        return np.clip(np.minimum(self.throwouts, entered - 1), 0, None)
+
+    def compute(self):
+        """Gross and net points of every yacht, worst scores selected with np.partition"""
+        self.gross = self.points.sum(axis=1, dtype=np.int64)
+        self.net = self.gross.copy()
+        k = min(self.throwouts, len(self.races))
+        if not k:
+            return self.net
+        kth = len(self.races) - k  # k largest scores end up after kth
+        worst = np.partition(self.points, kth, axis=1)[:, kth:]
+        worst = -np.sort(-worst, axis=1)  # k worst scores, worst first
+        entered = np.count_nonzero(self.points, axis=1)
+        kept = np.arange(k) < self.allowed(entered)[:, None]
+        self.net -= (worst * kept).sum(axis=1)
+        return self.net
+
+    def countback(self, i):
+        """RRS A8 tie-break key of row i: kept scores best to worst, then scores from the last race backwards"""
+        row = self.points[i]
+        scores = sorted(row[row > 0].tolist())
+        kept = scores[: len(scores) - int(self.allowed(len(scores)))]
+        latest = np.where(row > 0, row, self.missing)[::-1]
+        return kept, latest.tolist()
+
+    def ranking(self):
+        """[(row, rank), ...] best first: net points, then countback; yacht id orders full ties"""
+        order = np.lexsort((self.yachts, self.net)).tolist()
+        ranked, keys = [], []
+        start = 0
+        while start < len(order):
+            end = start
+            net = self.net[order[start]]
+            while end < len(order) and self.net[order[end]] == net:
+                end += 1
+            group = order[start:end]
+            if len(group) == 1:
+                group_keys = [(net,)]
+            else:  # tie on net points
+                group_keys = [(net, *self.countback(i)) for i in group]
+                group, group_keys = zip(
+                    *sorted(zip(group, group_keys), key=lambda x: x[1])
+                )
+            ranked += group
+            keys += group_keys
+            start = end
+        return list(zip(ranked, competition_ranks(keys)))
+
+    def standings(self):
+        """[(yacht id, net points, gross points, races finished, rank), ...] best first"""
+        races_sailed = self.finished.sum(axis=1)
+        return [
+            (
+                self.yachts[i],
+                int(self.net[i]),
+                int(self.gross[i]),
+                int(races_sailed[i]),
+                rank,
+            )
+            for i, rank in self.ranking()
+        ]
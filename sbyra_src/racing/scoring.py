@@ -0,0 +1,381 @@
+from bisect import bisect_right
+
+import numpy as np
+from django.db import transaction
+from django.utils import timezone
+
+from sbyra_src.racing.handicaps import (
+    get_system,
+    rating_coefficients,
+)
+from sbyra_src.racing.models import (
+    Event,
+    EventClassStart,
+    RatingCertificate,
+    Result,
+)
+from sbyra_src.racing.signals import results_scored
+from sbyra_src.utils.time_conversions import (
+    convert_to_posted_time,
+    convert_to_seconds,
+)
+
+"""
+Bulk scoring engines. Result.save() scores one row at a time and pays extra queries for the yacht, its spinnaker
+class and the event on every result. The engines here load everything an event needs in a constant number of
+queries, score in memory with the same code as the per-row path and write back in one transaction.
+
+EventScorer (Result.objects.score_event(event)):
+
+1. Load the event (if given a pk) and all of its results with yachts and spinnaker classes in one joined query
+2. Load the event's class starts (EventClassStart) into a {yacht class: start} dict with one query and attach the
+   event to every result, so each start lookup is a dictionary access
+3. Load the rating certificates valid on the event date with one query and attach them to the results
+4. Compute elapsed and corrected seconds in memory with Result.calc_seconds (reference implementation)
+5. bulk_update only the rows whose scores or rating snapshot changed, inside one transaction
+
+BatchScorer (Result.objects.rescore_series(series) / rescore_year(year)):
+
+1. Load the scoring inputs of every result as flat rows with one values_list() query, and all class starts of the
+   events involved into a {(event, yacht class): start} dict with a second one
+2. Load the rating certificates of those yachts overlapping the selection's event dates with a third query (one
+   range join) and resolve the certificate of each row by event date in memory (bisect on valid_from)
+3. Look up correction coefficients per handicap system and distinct rating in the coefficient cache
+   (racing.handicaps), one get_many per system
+4. Pack start, finish and penalty seconds, coefficients and distances into NumPy arrays
+5. Compute elapsed and corrected seconds for the whole selection at once, one vectorized operation per system
+6. bulk_update only the rows whose scores or rating snapshot changed, inside one transaction
+
+Both engines store the rating each result was scored with (Result.scored_phrf_rating and
+scored_spinnaker_adjustment) and send racing.signals.results_scored for the events they touched (standings and
+other derived data).
+
+Result.calc_seconds remains the reference implementation; the handicap systems' vectorized operations
+reproduce its arithmetic.
+
+"""
+
+
+class EventScorer:
+    """Scores all results of one event in a constant number of queries"""
+
+    fields = [
+        "elapsed_seconds",
+        "corrected_seconds",
+        "posted_time",
+        "scored_phrf_rating",
+        "scored_spinnaker_adjustment",
+        "updated",
+    ]
+
+    def __init__(self, event):
+        if not isinstance(event, Event):
+            event = Event.objects.select_related("series").get(pk=event)
+        self.event = event
+        self.results = []
+
+    def load(self):
+        self.results = list(
+            Result.objects.filter(event=self.event).select_related(
+                "yacht__spinnaker_class"
+            )
+        )
+        # one query for all class starts, shared by every result below
+        self.event.starts = dict(
+            self.event.class_starts.values_list("yacht_class", "start")
+        )
+        # one query for the certificates valid on the event date
+        certificates = {
+            certificate.yacht_id: certificate
+            for certificate in RatingCertificate.objects.as_of(
+                self.event.event_date
+            )
+            .filter(
+                yacht__in=[result.yacht_id for result in self.results]
+            )
+            .select_related("spinnaker_class")
+        }
+        for result in self.results:
+            result.event = self.event  # cached instance, no query
+            result.certificate = certificates.get(result.yacht_id)
+        return self.results
+
+    def score(self):
+        """Computes elapsed and corrected seconds in memory. Returns the results that changed"""
+        now = timezone.now()
+        changed = []
+        for result in self.results:
+            elapsed, corrected = result.calc_seconds
+            rating = result.rating
+            if (elapsed, corrected, *rating) != (
+                result.elapsed_seconds,
+                result.corrected_seconds,
+                result.scored_phrf_rating,
+                result.scored_spinnaker_adjustment,
+            ):
+                result.elapsed_seconds = elapsed
+                result.corrected_seconds = corrected
+                result.posted_time = convert_to_posted_time(corrected)
+                (
+                    result.scored_phrf_rating,
+                    result.scored_spinnaker_adjustment,
+                ) = rating
+                result.updated = now
+                changed.append(result)
+        return changed
+
+    def save(self, changed):
+        with transaction.atomic():
+            Result.objects.bulk_update(changed, self.fields)
+            results_scored.send(sender=Result, events=[self.event])
+
+    def run(self):
+        self.load()
+        changed = self.score()
+        if changed:
+            self.save(changed)
+        return changed
+
+
+class BatchScorer:
+    """Vectorized rescoring of any Result selection (a series, a season) with NumPy"""
+
+    fields = [
+        "elapsed_seconds",
+        "corrected_seconds",
+        "posted_time",
+        "scored_phrf_rating",
+        "scored_spinnaker_adjustment",
+        "updated",
+    ]
+    columns = (
+        "pk",
+        "elapsed_seconds",
+        "corrected_seconds",
+        "scored_phrf_rating",
+        "scored_spinnaker_adjustment",
+        "completed_status",
+        "finish_time",
+        "time_penalty",
+        "used_spinnaker",
+        "yacht",
+        "yacht__is_active",
+        "yacht__yacht_class",
+        "yacht__phrf_rating",
+        "yacht__spinnaker_class__adjustment_value",
+        "event__distance",
+        "event__series__handicap_system",
+        "event",
+        "event__event_date",
+    )
+
+    def __init__(self, results):
+        self.results = results
+        self.rows = []
+        self.class_starts = {}
+        self.certificates = {}
+        self.col = {name: i for i, name in enumerate(self.columns)}
+
+    def load(self):
+        self.rows = list(
+            self.results.order_by().values_list(*self.columns)
+        )
+        starts = EventClassStart.objects.filter(
+            event__in=self.results.order_by().values("event")
+        ).values_list("event", "yacht_class", "start")
+        self.class_starts = {
+            (event_id, yacht_class): start
+            for event_id, yacht_class, start in starts
+        }
+        self.load_certificates()
+        return self.rows
+
+    def load_certificates(self):
+        """
+        {yacht id: ([valid_from, ...], [(valid_to, (phrf, adjustment)), ...])} of the certificates overlapping the
+        loaded event dates, sorted by valid_from, from one query
+
+        """
+        dates = [
+            row[self.col["event__event_date"]]
+            for row in self.rows
+            if row[self.col["event__event_date"]] is not None
+        ]
+        self.certificates = {}
+        if not dates:
+            return self.certificates
+        certificates = (
+            RatingCertificate.objects.overlapping(
+                min(dates), max(dates)
+            )
+            .filter(
+                yacht__in={row[self.col["yacht"]] for row in self.rows}
+            )
+            .order_by("yacht", "valid_from")
+            .values_list(
+                "yacht",
+                "valid_from",
+                "valid_to",
+                "phrf_rating",
+                "spinnaker_class__adjustment_value",
+            )
+        )
+        for yacht_id, valid_from, valid_to, *rating in certificates:
+            starts, entries = self.certificates.setdefault(
+                yacht_id, ([], [])
+            )
+            starts.append(valid_from)
+            entries.append((valid_to, tuple(rating)))
+        return self.certificates
+
+    def rating(self, row):
+        """(phrf rating, adjustment) of a row on its event date: certificate, else the yacht's current rating"""
+        col = self.col
+        current = (
+            row[col["yacht__phrf_rating"]],
+            row[col["yacht__spinnaker_class__adjustment_value"]],
+        )
+        date = row[col["event__event_date"]]
+        certificates = self.certificates.get(row[col["yacht"]])
+        if certificates is None or date is None:
+            return current
+        starts, entries = certificates
+        i = bisect_right(starts, date) - 1
+        if i < 0:
+            return current
+        valid_to, rating = entries[i]
+        if valid_to is not None and valid_to <= date:
+            return current
+        return rating
+
+    def coefficients(self, ratings):
+        """{(system key, rating): coefficient pair} for the rows' ratings, from the coefficient cache (racing.handicaps)"""
+        col = self.col
+        wanted = {}
+        for row, rating in zip(self.rows, ratings):
+            key = row[col["event__series__handicap_system"]]
+            wanted.setdefault(key, set()).add(rating)
+
+        coefficients = {}
+        for key, system_ratings in wanted.items():
+            cached = rating_coefficients(
+                get_system(key), system_ratings
+            )
+            for rating, pair in cached.items():
+                coefficients[key, rating] = pair
+        return coefficients
+
+    def arrays(self, ratings):
+        """Packs the loaded rows into float arrays (NaN for missing values) and masks"""
+        col = self.col
+        coefficients = self.coefficients(ratings)
+
+        def seconds(value):
+            return (
+                np.nan if value is None else convert_to_seconds(value)
+            )
+
+        starts, finishes, penalties = [], [], []
+        coefficient, distance, systems, scorable = [], [], [], []
+        for row, rating in zip(self.rows, ratings):
+            start = self.class_starts.get(
+                (row[col["event"]], row[col["yacht__yacht_class"]])
+            )
+            starts.append(seconds(start))
+            finishes.append(seconds(row[col["finish_time"]]))
+            penalty = row[col["time_penalty"]]
+            penalties.append(0 if penalty is None else seconds(penalty))
+
+            key = row[col["event__series__handicap_system"]]
+            pair = coefficients.get((key, rating))
+            if pair is None:  # yacht without rating
+                coefficient.append(np.nan)
+            else:
+                coefficient.append(pair[row[col["used_spinnaker"]]])
+            distance.append(float(row[col["event__distance"]] or 0))
+            systems.append(key)
+            scorable.append(
+                row[col["yacht__is_active"]]
+                and row[col["completed_status"]] == "CMP"
+            )
+
+        return {
+            "start": np.array(starts, dtype=np.float64),
+            "finish": np.array(finishes, dtype=np.float64),
+            "penalty": np.array(penalties, dtype=np.float64),
+            "coefficient": np.array(coefficient, dtype=np.float64),
+            "distance": np.array(distance, dtype=np.float64),
+            "system": np.array(systems, dtype=object),
+            "scorable": np.array(scorable, dtype=bool),
+        }
+
+    def score(self, ratings):
+        """Returns (elapsed, corrected) seconds arrays for the loaded rows (NaN where the row is not scored)"""
+        a = self.arrays(ratings)
+        elapsed = (a["finish"] - a["start"]) + a["penalty"]
+        corrected = np.full(len(self.rows), np.nan)
+        for key in set(a["system"].tolist()):
+            mask = a["system"] == key
+            corrected[mask] = get_system(key).correct_array(
+                elapsed[mask],
+                a["coefficient"][mask],
+                a["distance"][mask],
+            )
+        return (
+            np.where(a["scorable"], elapsed, np.nan),
+            np.where(a["scorable"], corrected, np.nan),
+        )
+
+    def changed(self, ratings, elapsed, corrected):
+        """Builds Result instances for rows whose scores or rating snapshot differ from the stored ones"""
+        col = self.col
+        now = timezone.now()
+        changed = []
+        for row, rating, *scored in zip(
+            self.rows, ratings, elapsed.tolist(), corrected.tolist()
+        ):
+            scored = [None if np.isnan(x) else int(x) for x in scored]
+            stored = [
+                row[col["elapsed_seconds"]],
+                row[col["corrected_seconds"]],
+                row[col["scored_phrf_rating"]],
+                row[col["scored_spinnaker_adjustment"]],
+            ]
+            if scored + list(rating) != stored:
+                changed.append(
+                    Result(
+                        pk=row[col["pk"]],
+                        elapsed_seconds=scored[0],
+                        corrected_seconds=scored[1],
+                        posted_time=convert_to_posted_time(scored[1]),
+                        scored_phrf_rating=rating[0],
+                        scored_spinnaker_adjustment=rating[1],
+                        updated=now,
+                    )
+                )
+        return changed
+
+    def save(self, changed):
+        changed_pks = {result.pk for result in changed}
+        event_ids = {
+            row[self.col["event"]]
+            for row in self.rows
+            if row[self.col["pk"]] in changed_pks
+        }
+        with transaction.atomic():
+            Result.objects.bulk_update(changed, self.fields)
+            results_scored.send(
+                sender=Result,
+                # receivers read event.series.year: no query per event
+                events=Event.objects.filter(
+                    pk__in=event_ids
+                ).select_related("series"),
+            )
+
+    def run(self):
+        self.load()
+        ratings = [self.rating(row) for row in self.rows]
+        changed = self.changed(ratings, *self.score(ratings))
+        if changed:
+            self.save(changed)
+        return changed
@@ -0,0 +1,115 @@
+import datetime
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+from sbyra_src.racing import fragments
+from sbyra_src.racing.models import Event, Result, Series
+
+"""
+Season rollover and archived seasons.
+
+Past seasons stay in the same tables but are flagged: Series.current_year = False, and a copy of the flag on every
+Event and Result (archived = True). Current season queries filter on the local flag (Result.objects.current(),
+racing_home, list_results, rescoring). Events are found by a partial date index that only covers current rows, so
+it does not grow with the history; their results are then read by event on result_event_corrected_idx.
+
+1. rollover(): archives every series of a year before the current one. Run daily by the rollover_seasons command
+   (cron, celery beat); already archived seasons are skipped, so it is safe to repeat
+2. set_archived(): flips the flags of some series and their events and results in three UPDATE queries. Also used
+   by the Series admin actions and the Series post_save receiver (racing.signals)
+3. archived_series() / archived_results(): read-only path for archived seasons. Archived data does not change, so
+   it is cached in the "archive" cache (ARCHIVE_CACHE_TTL) apart from live data; set_archived() drops the entries
+   of the series it touches
+
+"""
+
+archive_cache = caches["archive"]
+
+
+def archive_key(series_id):
+    return f"racing:archive:{series_id}"
+
+
+def set_archived(series_ids, archived=True):
+    """Flags series_ids (and their events and results) as archived or current. Returns the number of series changed"""
+    series_ids = list(series_ids)
+    with transaction.atomic():
+        changed = (
+            Series.objects.filter(pk__in=series_ids)
+            .exclude(current_year=not archived)
+            .update(current_year=not archived)
+        )
+        Event.objects.filter(series__in=series_ids).exclude(
+            archived=archived
+        ).update(archived=archived)
+        Result.objects.filter(event__series__in=series_ids).exclude(
+            archived=archived
+        ).update(archived=archived)
+    archive_cache.delete_many([archive_key(pk) for pk in series_ids])
+    archive_cache.delete(archive_key("index"))
+    transaction.on_commit(  # UPDATEs send no post_save
+        lambda: fragments.invalidate("events", "series")
+    )
+    return changed
+
+
+def rollover(today=None):
+    """Archives current series of past years. Returns the archived series"""
+    year = (today or datetime.date.today()).year
+    past = list(Series.current.filter(year__lt=year))
+    set_archived([series.pk for series in past])
+    return past
+
+
+def archived_series():
+    """[{"id", "name", "year"}, ...] of archived series, newest first (cached)"""
+    return archive_cache.get_or_set(
+        archive_key("index"),
+        lambda: list(
+            Series.objects.filter(current_year=False)
+            .order_by("-year", "name")
+            .values("id", "name", "year")
+        ),
+        timeout=settings.ARCHIVE_CACHE_TTL,
+    )
+
+
+def archived_results(series_id):
+    """
+    Results of an archived series as plain rows (cached). Returns None if the series does not exist or is still
+    current.
+
+    """
+    key = archive_key(series_id)
+    rows = archive_cache.get(key)
+    if rows is not None:
+        return rows
+    if not Series.objects.filter(
+        pk=series_id, current_year=False
+    ).exists():
+        return None
+    rows = list(
+        Result.objects.filter(archived=True, event__series=series_id)
+        .order_by(
+            "event__event_date",
+            "event",
+            "yacht__yacht_class",
+            "position",
+            "yacht__yacht_name",
+        )
+        .values(
+            "event_id",
+            "event__event_date",
+            "yacht__yacht_class",
+            "yacht__yacht_name",
+            "yacht__sail_num",
+            "completed_status",
+            "posted_time",
+            "position",
+            "points",
+        )
+    )
+    archive_cache.set(key, rows, timeout=settings.ARCHIVE_CACHE_TTL)
+    return rows
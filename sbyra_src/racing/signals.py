@@ -1,8 +1,41 @@
-from django.db.models.signals import post_save, pre_save
-from django.dispatch import receiver
+import datetime
+import threading
+
+from django.db import transaction
+from django.db.models.signals import (
+    post_delete,
+    post_save,
+    pre_delete,
+    pre_save,
+)
+from django.dispatch import Signal, receiver
+from django.utils import timezone
 from django.utils.text import slugify
 
-from .models import Yacht, YachtClub
+from . import fragments
+from .live import publish_event, publish_leaderboard
+from .rollups import schedule_rollups
+from .models import (
+    Event,
+    RatingCertificate,
+    Result,
+    Series,
+    Spinnaker,
+    Yacht,
+    YachtClub,
+)
+from .seasons import set_archived
+from .standings import (
+    refresh_series,
+    refresh_series_class,
+    update_event_standings,
+    update_standings,
+    update_yacht_class_standings,
+)
+
+# Sent by the bulk scorers (racing.scoring) after writing posted times, which bypasses post_save.
+# Receivers get events=[Event, ...] for every event that had results rescored.
+results_scored = Signal()
 
 # --------------------- MODEL: Yacht --------------------- #
 
@@ -24,6 +57,177 @@ def yacht_is_active(sender, instance, *args, **kwargs):
             instance.is_active = True
 
 
+# fields that change a yacht's corrected times
+YACHT_SCORING_FIELDS = (
+    "phrf_rating",
+    "yacht_class",
+    "spinnaker_class_id",
+)
+
+
+@receiver(pre_save, sender=Yacht)
+def yacht_scoring_changed(sender, instance, raw=False, **kwargs):
+    """flags the instance when a scoring-relevant field differs from the stored row"""
+    instance._scoring_changed = False
+    instance._stored_scoring = None
+    if raw or instance.pk is None:
+        return
+    stored = (
+        Yacht.objects.filter(pk=instance.pk)
+        .values_list(*YACHT_SCORING_FIELDS)
+        .first()
+    )
+    current = tuple(getattr(instance, f) for f in YACHT_SCORING_FIELDS)
+    instance._scoring_changed = stored is not None and stored != current
+    instance._stored_scoring = stored
+
+
+def record_rating_change(yacht, phrf_rating, spinnaker_class_id, since):
+    """
+    Closes the yacht's open RatingCertificate at since and opens one for its new rating (a second change from the
+    same day updates that certificate). A yacht without history first gets a certificate for the rating it had
+    until since, so results sailed before keep it. bulk_create() and update() only: the certificate receivers
+    below do not fire.
+
+    """
+    certificates = RatingCertificate.objects.filter(yacht=yacht)
+    new = RatingCertificate(
+        yacht=yacht,
+        phrf_rating=yacht.phrf_rating,
+        spinnaker_class_id=yacht.spinnaker_class_id,
+        valid_from=since,
+    )
+    if not certificates.exists():
+        old = RatingCertificate(
+            yacht=yacht,
+            phrf_rating=phrf_rating,
+            spinnaker_class_id=spinnaker_class_id,
+            valid_from=datetime.date.min,
+            valid_to=since,
+        )
+        RatingCertificate.objects.bulk_create([old, new])
+    elif not certificates.filter(valid_from=since).update(
+        phrf_rating=new.phrf_rating,
+        spinnaker_class_id=new.spinnaker_class_id,
+    ):
+        certificates.filter(
+            valid_from__lt=since, valid_to__isnull=True
+        ).update(valid_to=since)
+        RatingCertificate.objects.bulk_create([new])
+
+
+@receiver(post_save, sender=Yacht)
+def yacht_rescore(sender, instance, **kwargs):
+    """
+    rescores the yacht's current year results once committed. A rating change is recorded as a new RatingCertificate
+    from instance._rating_effective_from (set by the admin form), today in the local time zone by default, and only
+    rescores results from that date on.
+
+    """
+    if not getattr(instance, "_scoring_changed", False):
+        return
+    from .rescoring import rescore_results, yacht_results
+
+    phrf_rating, yacht_class, spinnaker_class_id = (
+        instance._stored_scoring
+    )
+    since = None
+    if (phrf_rating, spinnaker_class_id) != (
+        instance.phrf_rating,
+        instance.spinnaker_class_id,
+    ):
+        if None not in (phrf_rating, instance.phrf_rating):
+            since = (
+                getattr(instance, "_rating_effective_from", None)
+                or timezone.localdate()
+            )
+            record_rating_change(
+                instance, phrf_rating, spinnaker_class_id, since
+            )
+    if yacht_class != instance.yacht_class:
+        since = None  # class starts differ for every result
+        update_yacht_class_standings(
+            instance.pk, yacht_class, instance.yacht_class
+        )
+        years = (
+            Result.objects.filter(yacht=instance)
+            .order_by()
+            .values_list("event__series__year", flat=True)
+            .distinct()
+        )
+        schedule_rollups(
+            (year, c)
+            for year in years
+            for c in (yacht_class, instance.yacht_class)
+        )
+
+    transaction.on_commit(
+        lambda: rescore_results(yacht_results(instance.pk, since))
+    )
+
+
+# ------------------- MODEL: RatingCertificate ------------------- #
+
+
+@receiver(pre_save, sender=RatingCertificate)
+def certificate_range_stored(sender, instance, raw=False, **kwargs):
+    """keeps the stored yacht and validity range: results an edit moves out of the range are rescored too"""
+    instance._stored_range = None
+    if raw or instance.pk is None:
+        return
+    instance._stored_range = (
+        RatingCertificate.objects.filter(pk=instance.pk)
+        .values_list("yacht", "valid_from", "valid_to")
+        .first()
+    )
+
+
+@receiver(post_save, sender=RatingCertificate)
+@receiver(post_delete, sender=RatingCertificate)
+def certificate_rescore(sender, instance, raw=False, **kwargs):
+    """rescores the yacht's current results in the certificate's old and new validity ranges once committed (admin edits)"""
+    if raw:
+        return
+    from .rescoring import rescore_results, yacht_results
+
+    results = yacht_results(
+        instance.yacht_id, instance.valid_from, instance.valid_to
+    )
+    stored = getattr(instance, "_stored_range", None)
+    if stored is not None:
+        results = results | yacht_results(*stored)
+    transaction.on_commit(lambda: rescore_results(results))
+
+
+# ------------------- MODEL: Spinnaker ------------------- #
+
+
+@receiver(pre_save, sender=Spinnaker)
+def spinnaker_adjustment_changed(sender, instance, raw=False, **kwargs):
+    instance._scoring_changed = False
+    if raw or instance.pk is None:
+        return
+    stored = (
+        Spinnaker.objects.filter(pk=instance.pk)
+        .values_list("adjustment_value", flat=True)
+        .first()
+    )
+    instance._scoring_changed = (
+        stored is not None and stored != instance.adjustment_value
+    )
+
+
+@receiver(post_save, sender=Spinnaker)
+def spinnaker_rescore(sender, instance, **kwargs):
+    """rescores results sailed with this spinnaker class once committed"""
+    if getattr(instance, "_scoring_changed", False):
+        from .rescoring import rescore_results, spinnaker_results
+
+        transaction.on_commit(
+            lambda: rescore_results(spinnaker_results(instance.pk))
+        )
+
+
 # ------------------- MODEL: YachtClub ------------------- #
 
 
@@ -32,3 +236,165 @@ def slug_pre_save(sender, instance, *args, **kwargs):
     """Signal sets slug to match name as a web safe url. Updating name will result in updated slug"""
     name = instance.yacht_club_name
     instance.slug = slugify(name)
+
+
+# ------------------- Archived seasons ------------------- #
+
+
+@receiver(post_save, sender=Series)
+def series_archived_post_save(
+    sender, instance, created=False, raw=False, **kwargs
+):
+    """copies a changed current_year to the series' events and results (admin edits; rollover uses racing.seasons)"""
+    # flag set by series_stored_values (pre_save)
+    if getattr(instance, "_archived_changed", False):
+        set_archived([instance.pk], archived=not instance.current_year)
+
+
+@receiver(pre_save, sender=Event)
+def event_archived_pre_save(sender, instance, raw=False, **kwargs):
+    if not raw:
+        instance.archived = not instance.series.current_year
+
+
+@receiver(pre_save, sender=Result)
+def result_archived_pre_save(sender, instance, raw=False, **kwargs):
+    if not raw:
+        instance.archived = instance.event.archived
+
+
+# ------------------- MODEL: Series ------------------- #
+
+
+@receiver(pre_save, sender=Series)
+def series_stored_values(sender, instance, raw=False, **kwargs):
+    """flags throwouts and current_year changes against the stored row (one query)"""
+    instance._throwouts_changed = instance._archived_changed = False
+    if raw or instance.pk is None:
+        return
+    stored = (
+        Series.objects.filter(pk=instance.pk)
+        .values_list("throwouts", "current_year")
+        .first()
+    )
+    if stored is not None:
+        throwouts, current_year = stored
+        instance._throwouts_changed = throwouts != instance.throwouts
+        instance._archived_changed = (
+            current_year != instance.current_year
+        )
+
+
+@receiver(post_save, sender=Series)
+def series_standings_post_save(sender, instance, **kwargs):
+    """recomputes the series standings when the number of throwouts changes"""
+    if getattr(instance, "_throwouts_changed", False):
+        refresh_series(instance.pk)
+
+
+# ------------------- Racing home fragments ------------------- #
+
+# sections of the racing home page each model is shown in (racing.fragments)
+HOME_SECTIONS = {
+    Yacht: ("fleet",),
+    YachtClub: ("fleet",),
+    Spinnaker: ("fleet",),
+    Event: ("events",),
+    Series: ("events", "series"),
+}
+
+
+def home_sections_changed(sender, **kwargs):
+    """invalidates the cached racing home sections showing sender once the change is committed"""
+    sections = HOME_SECTIONS[sender]
+    transaction.on_commit(lambda: fragments.invalidate(*sections))
+
+
+for model in HOME_SECTIONS:
+    post_save.connect(home_sections_changed, sender=model)
+    post_delete.connect(home_sections_changed, sender=model)
+
+
+# ------------------- MODEL: Result ------------------- #
+
+# {event pk: yacht classes} of events being deleted by this thread: post_delete of their results (cascade) skips
+# the per-result update, and the series standings of those classes are refreshed once the event is gone
+_deleting = threading.local()
+
+
+def deleting_events():
+    return _deleting.__dict__.setdefault("events", {})
+
+
+@receiver(pre_delete, sender=Event)
+def event_pre_delete(sender, instance, **kwargs):
+    deleting_events()[instance.pk] = set(
+        Result.objects.filter(event=instance)
+        .exclude(yacht__yacht_class="")
+        .order_by()
+        .values_list("yacht__yacht_class", flat=True)
+    )
+
+
+@receiver(post_delete, sender=Event)
+def event_post_delete(sender, instance, **kwargs):
+    classes = deleting_events().pop(instance.pk, ())
+    for yacht_class in classes:
+        refresh_series_class(instance.series_id, yacht_class)
+    if classes:
+        year = instance.series.year
+        schedule_rollups((year, c) for c in classes)
+
+
+@receiver(post_save, sender=Result)
+def result_standings_post_save(sender, instance, raw=False, **kwargs):
+    """updates points for the result's event and class, the series standings and season rollups, then the live leaderboard"""
+    if raw:  # loaddata
+        return
+    event_id, yacht_class = (
+        instance.event_id,
+        instance.yacht.yacht_class,
+    )
+    update_standings(event_id, instance.event.series_id, yacht_class)
+    if yacht_class:
+        schedule_rollups(
+            [(instance.event.series.year, yacht_class)], [event_id]
+        )
+        transaction.on_commit(
+            lambda: publish_leaderboard(event_id, yacht_class)
+        )
+
+
+@receiver(post_delete, sender=Result)
+def result_standings_post_delete(sender, instance, **kwargs):
+    """same as post_save, skipped when the event itself is being deleted (cascade)"""
+    if instance.event_id in deleting_events():
+        return
+    event = (
+        Event.objects.filter(pk=instance.event_id)
+        .select_related("series")
+        .first()
+    )
+    yacht = Yacht.objects.filter(pk=instance.yacht_id).first()
+    if event is None or yacht is None:
+        return
+    update_standings(event.pk, event.series_id, yacht.yacht_class)
+    if yacht.yacht_class:
+        schedule_rollups(
+            [(event.series.year, yacht.yacht_class)],
+            [event.pk],
+            [yacht.pk],
+        )
+        transaction.on_commit(
+            lambda: publish_leaderboard(event.pk, yacht.yacht_class)
+        )
+
+
+@receiver(results_scored)
+def results_scored_standings(sender, events, **kwargs):
+    for event in events:
+        classes = update_event_standings(event)
+        schedule_rollups(
+            ((event.series.year, c) for c in classes), [event.pk]
+        )
+        transaction.on_commit(lambda pk=event.pk: publish_event(pk))
@@ -0,0 +1,259 @@
+from django.db import transaction
+from django.db.models import F
+
+from sbyra_src.racing.choices import CompletionStatusChoice
+from sbyra_src.racing.models import Result, Series, SeriesStanding
+from sbyra_src.racing.scoreboard import Scoreboard, competition_ranks
+
+"""
+Low point series standings, materialized in SeriesStanding and maintained incrementally.
+
+When results of an event change only the affected (event, yacht class) and (series, yacht class) are recomputed:
+
+1. score_event_class(): rank the event's results in that class by corrected seconds (ordered in SQL). Finishers
+   score their position (ties share the better position), DNC/DSQ or unscored entries score entries in class + 1.
+2. refresh_series_class(): load the race points of the series and class with one query into a Scoreboard
+   (racing.scoreboard: throwouts and countback) and write the SeriesStanding rows of that series and class whose
+   points or rank changed.
+
+Receivers in racing.signals call update_standings() on Result save/delete, update_event_standings() when the
+bulk scorers send results_scored and update_yacht_class_standings() when a yacht changes class. rebuild_standings() and verify_standings() back the rebuild_standings command.
+
+"""
+
+
+def compute_event_class(event_id, yacht_class):
+    """Returns {result pk: (position, points)} for one event and class"""
+    results = list(
+        Result.objects.filter(
+            event_id=event_id, yacht__yacht_class=yacht_class
+        )
+        .order_by(F("corrected_seconds").asc(nulls_last=True))
+        .values_list("pk", "completed_status", "corrected_seconds")
+    )
+    finishers = [
+        r
+        for r in results
+        if r[1] == CompletionStatusChoice.CMP and r[2] is not None
+    ]
+    scores = {pk: (None, len(results) + 1) for pk, *rest in results}
+    ranks = competition_ranks([r[2] for r in finishers])
+    for result, rank in zip(finishers, ranks):
+        scores[result[0]] = (rank, rank)
+    return scores
+
+
+def score_event_class(event_id, yacht_class):
+    """Stores positions and points for one event and class. Only changed rows are written"""
+    scores = compute_event_class(event_id, yacht_class)
+    current = Result.objects.filter(pk__in=scores).values_list(
+        "pk", "position", "points"
+    )
+    changed = [
+        Result(pk=pk, position=scores[pk][0], points=scores[pk][1])
+        for pk, position, points in current
+        if (position, points) != scores[pk]
+    ]
+    if changed:
+        Result.objects.bulk_update(changed, ["position", "points"])
+
+
+def series_scoreboard(series_id, yacht_class):
+    """Scoreboard of the race points of one series and class (one query, plus one for the throwouts)"""
+    throwouts = (
+        Series.objects.filter(pk=series_id)
+        .values_list("throwouts", flat=True)
+        .first()
+    )
+    rows = (
+        Result.objects.filter(
+            event__series_id=series_id,
+            yacht__yacht_class=yacht_class,
+            points__isnull=False,
+        )
+        .order_by("event__event_date", "event")
+        .values_list("yacht", "event", "points", "position")
+    )
+    return Scoreboard.from_rows(rows, throwouts or 0)
+
+
+def compute_series_class(series_id, yacht_class):
+    """Returns SeriesStanding instances (unsaved) for one series and class, ranked by points after throwouts"""
+    return [
+        SeriesStanding(
+            series_id=series_id,
+            yacht_id=yacht_id,
+            yacht_class=yacht_class,
+            points=points,
+            gross_points=gross_points,
+            races_sailed=races_sailed,
+            rank=rank,
+        )
+        for yacht_id, points, gross_points, races_sailed, rank in (
+            series_scoreboard(series_id, yacht_class).standings()
+        )
+    ]
+
+
+STANDING_FIELDS = ("points", "gross_points", "races_sailed", "rank")
+
+
+def refresh_series_class(series_id, yacht_class):
+    """Brings the SeriesStanding rows of one series and class up to date. Only changed rows are written"""
+    standings = compute_series_class(series_id, yacht_class)
+    stored = {
+        standing.yacht_id: standing
+        for standing in SeriesStanding.objects.filter(
+            series_id=series_id, yacht_class=yacht_class
+        )
+    }
+    changed, created = [], []
+    for standing in standings:
+        current = stored.pop(standing.yacht_id, None)
+        if current is None:
+            created.append(standing)
+            continue
+        standing.pk = current.pk
+        if any(
+            getattr(standing, f) != getattr(current, f)
+            for f in STANDING_FIELDS
+        ):
+            changed.append(standing)
+    if stored or changed or created:
+        with transaction.atomic():
+            SeriesStanding.objects.filter(
+                pk__in=[s.pk for s in stored.values()]
+            ).delete()
+            SeriesStanding.objects.bulk_update(changed, STANDING_FIELDS)
+            SeriesStanding.objects.bulk_create(created)
+    return standings
+
+
+def update_standings(event_id, series_id, yacht_class):
+    """Incremental update after a result of event_id in yacht_class was saved or deleted"""
+    if not yacht_class:
+        return
+    with transaction.atomic():
+        score_event_class(event_id, yacht_class)
+        refresh_series_class(series_id, yacht_class)
+
+
+def update_event_standings(event):
+    """Incremental update for every class of an event (after bulk scoring). Returns the classes"""
+    classes = list(
+        Result.objects.filter(event=event)
+        .order_by()
+        .values_list("yacht__yacht_class", flat=True)
+        .distinct()
+    )
+    for yacht_class in classes:
+        update_standings(event.pk, event.series_id, yacht_class)
+    return classes
+
+
+def update_yacht_class_standings(yacht_id, *yacht_classes):
+    """
+    Incremental update after a yacht changed class: rescores every event it sailed in each of yacht_classes (the
+    old class drops its results, the new class gains them) and refreshes each series once per class
+
+    """
+    events = list(
+        Result.objects.filter(yacht_id=yacht_id)
+        .order_by()
+        .values_list("event", "event__series")
+        .distinct()
+    )
+    series = {series_id for event_id, series_id in events}
+    with transaction.atomic():
+        for yacht_class in filter(None, yacht_classes):
+            for event_id, series_id in events:
+                score_event_class(event_id, yacht_class)
+            for series_id in series:
+                refresh_series_class(series_id, yacht_class)
+
+
+def refresh_series(series_id):
+    """Replaces the SeriesStanding rows of every class of a series (throwouts changed)"""
+    classes = (
+        Result.objects.filter(event__series_id=series_id)
+        .exclude(yacht__yacht_class="")
+        .order_by()
+        .values_list("yacht__yacht_class", flat=True)
+        .distinct()
+    )
+    with transaction.atomic():
+        for yacht_class in classes:
+            refresh_series_class(series_id, yacht_class)
+
+
+def scored_pairs():
+    """All (event, series, class) combinations that have results"""
+    return (
+        Result.objects.order_by()
+        .exclude(yacht__yacht_class="")
+        .values_list("event", "event__series", "yacht__yacht_class")
+        .distinct()
+    )
+
+
+def rebuild_standings():
+    """Recomputes every result score and every standing from scratch. Returns the number of standings rows"""
+    pairs = list(scored_pairs())
+    with transaction.atomic():
+        for event_id, series_id, yacht_class in pairs:
+            score_event_class(event_id, yacht_class)
+        SeriesStanding.objects.all().delete()
+        count = 0
+        for series_id, yacht_class in {(s, c) for e, s, c in pairs}:
+            count += len(refresh_series_class(series_id, yacht_class))
+    return count
+
+
+def verify_standings():
+    """Compares stored scores and standings with a fresh computation. Returns a list of mismatch descriptions"""
+    problems = []
+    pairs = list(scored_pairs())
+    for event_id, series_id, yacht_class in pairs:
+        scores = compute_event_class(event_id, yacht_class)
+        stored = Result.objects.filter(pk__in=scores).values_list(
+            "pk", "position", "points"
+        )
+        for pk, position, points in stored:
+            if (position, points) != scores[pk]:
+                problems.append(
+                    f"result {pk}: stored {(position, points)}, expected {scores[pk]}"
+                )
+
+    fields = (
+        "yacht_id",
+        "yacht_class",
+        "points",
+        "gross_points",
+        "races_sailed",
+        "rank",
+    )
+    for series_id, yacht_class in {(s, c) for e, s, c in pairs}:
+        expected = {
+            tuple(getattr(s, f) for f in fields)
+            for s in compute_series_class(series_id, yacht_class)
+        }
+        stored = set(
+            SeriesStanding.objects.filter(
+                series_id=series_id, yacht_class=yacht_class
+            ).values_list(*fields)
+        )
+        if stored != expected:
+            problems.append(
+                f"series {series_id} class {yacht_class}: standings out of date"
+            )
+
+    stale = set(
+        SeriesStanding.objects.order_by()
+        .values_list("series", "yacht_class")
+        .distinct()
+    ) - {(s, c) for e, s, c in pairs}
+    for series_id, yacht_class in stale:
+        problems.append(
+            f"series {series_id} class {yacht_class}: standings without results"
+        )
+    return problems
@@ -20,4 +20,17 @@ urlpatterns = [
     path(
         "yachts/<slug:slug>", views.yacht_details, name="yacht-details"
     ),
+    path("results/", views.list_results, name="list-results"),
+    path("results/export", views.export_results, name="export-results"),
+    path("archive/", views.season_archive, name="season-archive"),
+    path(
+        "archive/<int:series_id>",
+        views.season_archive,
+        name="archived-series",
+    ),
+    path(
+        "events/<int:event_id>/finishes",
+        views.record_finishes,
+        name="record-finishes",
+    ),
 ]
@@ -1,36 +1,118 @@
+import datetime
+import json
+
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
+from django.core.paginator import Paginator
 from django.forms import formset_factory
-from django.http import Http404, HttpResponse
-from django.shortcuts import get_object_or_404, render
+from django.http import (
+    Http404,
+    HttpResponse,
+    HttpResponseBadRequest,
+    JsonResponse,
+    StreamingHttpResponse,
+)
+from django.shortcuts import get_object_or_404, redirect, render
+from django.utils.cache import (
+    get_conditional_response,
+    patch_cache_control,
+)
+from django.utils.functional import SimpleLazyObject
+from django.utils.http import http_date
+
+from sbyra_src.utils.pagination import KeysetPage, page_validators
 
-from .forms import YachtForm
+from . import fragments
+from .exports import EXPORT_FORMATS, export_lines, results_for_export
+from .finishes import StaleFinishError, save_finishes
+from .forms import FinishFormSet, YachtForm, finish_formset_data
 from .models import Event, Result, Series, Yacht, YachtClub
+from .seasons import archived_results, archived_series
 
 
 def racing_home(request):
-    yachts = Yacht.objects.all()
-    events = Event.objects.all()
-    series = Series.objects.all()
+    """
+    Read-only view (see NOTES). Every section is bounded (a page of the active fleet, the next and last few
+    events, current series) and fragment cached (racing.fragments): lazy querysets and the fleet page only run on
+    a cache miss.
+
+    """
+    today = datetime.date.today()
+    events = Event.objects.filter(archived=False).select_related(
+        "series"
+    )  # current seasons
+    upcoming = events.filter(event_date__gte=today).order_by(
+        "event_date"
+    )[: settings.RACING_HOME_EVENTS]
+    recent = events.filter(event_date__lt=today).order_by(
+        "-event_date"
+    )[: settings.RACING_HOME_EVENTS]
+    series = Series.current.all()
+
+    page_number = request.GET.get("page", "1")
+    if not page_number.isdigit():
+        page_number = "1"
+    fleet = Yacht.active.select_related(
+        "yacht_club", "spinnaker_class"
+    ).order_by("yacht_name", "pk")
+    paginator = Paginator(fleet, settings.RACING_HOME_PAGE_SIZE)
+    # count and page queries run only if the fleet fragment is rendered
+    fleet_page = SimpleLazyObject(
+        lambda: paginator.get_page(page_number)
+    )
+
     context = {
-        "yachts": yachts,
-        "events": events,
+        "today": today,
+        "upcoming": upcoming,
+        "recent": recent,
         "series": series,
+        "fleet_page": fleet_page,
+        "page_number": page_number,
+        "versions": fragments.versions(),
+        "cache_ttl": settings.RACING_HOME_CACHE_TTL,
     }
     return render(request, "racing/racing_home.html", context)
 
 
 def list_yachts(request):
-    """View lists all yacht profiles"""
+    """
+    View lists yacht profiles (?active=1: active yachts only) a page at a time, seeking on yacht_name (?after= /
+    ?before=, sbyra_src.utils.pagination), so deep pages cost the same single query as the first one. Responses
+    carry an ETag and Last-Modified of the listed rows, their clubs and spinnaker classes: a revalidating browser
+    or proxy gets a 304 without a render.
 
-    all_yachts = Yacht.objects.all()
-    active_yachts = Yacht.active.all()
+    """
+    active = request.GET.get("active") == "1"
+    yachts = (Yacht.active if active else Yacht.objects).select_related(
+        "yacht_club", "spinnaker_class"
+    )
+    page = KeysetPage(
+        yachts,
+        "yacht_name",
+        settings.YACHT_LIST_PAGE_SIZE,
+        after=request.GET.get("after"),
+        before=request.GET.get("before"),
+    )
+    etag, last_modified = page_validators(
+        page, active, related=("yacht_club", "spinnaker_class")
+    )
+    timestamp = last_modified and int(last_modified.timestamp())
 
-    template = "racing/list_yachts.html"
-    context = {
-        "all_yachts": all_yachts,
-        "active_yachts": active_yachts,
-    }
-
-    return render(request, template, context)
+    response = get_conditional_response(
+        request, etag=etag, last_modified=timestamp
+    )
+    if response is None:
+        template = "racing/list_yachts.html"
+        context = {
+            "page": page,
+            "active": active,
+        }
+        response = render(request, template, context)
+    response.headers["ETag"] = etag
+    if timestamp:
+        response.headers["Last-Modified"] = http_date(timestamp)
+    patch_cache_control(response, no_cache=True)  # always revalidate
+    return response
 
 
 def yacht_register(request):
@@ -58,20 +140,177 @@ def yacht_register(request):
 
 
 def yacht_details(request, slug):  # slug being passed to view by yacht-details url
-    """View shows yacht details based on slug from URL pattern"""
+    """View shows yacht details based on slug from URL pattern, with its season rollups (racing.rollups)"""
 
     yacht = get_object_or_404(Yacht, slug=slug)
+    season_stats = yacht.season_stats.all()
+    year = request.GET.get("year", "")
+    if not year.isdigit():  # latest season sailed
+        year = season_stats.values_list("year", flat=True).first()
+    head_to_head = yacht.head_to_head.filter(year=year).select_related(
+        "rival"
+    )
     template = "racing/yacht_details.html"
     context = {
         "yacht": yacht,
         "slug": slug,
+        "season_stats": season_stats,
+        "year": year,
+        "head_to_head": head_to_head,
+    }
+    return render(request, template, context)
+
+
+@staff_member_required
+def record_finishes(request, event_id):
+    """
+    Batch finish recording for race committees: many finishes per request, validated together, written in one
+    transaction and scored once (racing.finishes). Accepts the formset (HTML) or a JSON body:
+    {"finishes": [{"yacht": "sail number or name", "finish_time": "19:02:31", "order_over_line": 1, "version": 0}]}
+
+    """
+    event = get_object_or_404(
+        Event.objects.select_related("series"), pk=event_id
+    )
+    as_json = request.content_type == "application/json"
+
+    if request.method == "POST":
+        if as_json:
+            try:
+                rows = json.loads(request.body)["finishes"]
+                data = finish_formset_data(rows)
+            except (ValueError, KeyError, TypeError, AttributeError):
+                return JsonResponse(
+                    {"errors": ["expected {'finishes': [...]}"]},
+                    status=400,
+                )
+        else:
+            data = request.POST
+        formset = FinishFormSet(data)
+
+        if formset.is_valid():
+            try:
+                recorded = save_finishes(event, formset.finishes)
+            except StaleFinishError as error:
+                if as_json:
+                    return JsonResponse(
+                        {"stale": [str(y) for y in error.yachts]},
+                        status=409,
+                    )
+                formset.non_form_errors().append(
+                    f"{error} (reload the page to see their changes)"
+                )
+            else:
+                if as_json:
+                    return JsonResponse({"recorded": recorded})
+                return redirect(
+                    f"{request.path}?recorded={recorded}"
+                )
+        elif as_json:
+            return JsonResponse(
+                {
+                    "errors": formset.non_form_errors(),
+                    "rows": formset.errors,
+                },
+                status=400,
+            )
+    else:
+        results = Result.objects.filter(event=event).select_related(
+            "yacht"
+        )
+        formset = FinishFormSet(
+            initial=[
+                {
+                    "yacht": r.yacht.sail_num or r.yacht.yacht_name,
+                    "finish_time": r.finish_time,
+                    "order_over_line": r.order_over_line,
+                    "version": r.version,
+                }
+                for r in results.order_by("order_over_line", "pk")
+            ],
+        )
+
+    template = "racing/record_finishes.html"
+    context = {
+        "event": event,
+        "formset": formset,
+        "recorded": request.GET.get("recorded"),
     }
     return render(request, template, context)
 
 
 def list_results(request):
-    """View lists all results"""
-    pass
+    """
+    View lists current season results by event and yacht class. Positions are ranked by the database
+    (Result.objects.with_class_rank()): the whole page is one query. Optional ?event=<id> shows a single event.
+    Archived seasons are listed by season_archive.
+
+    """
+    results = (
+        Result.objects.current()
+        .with_class_rank()
+        .select_related("event__series", "yacht__spinnaker_class")
+        .order_by(
+            "-event__event_date",
+            "event",
+            "yacht__yacht_class",
+            "class_row",
+        )
+    )
+    event_id = request.GET.get("event")
+    if event_id:
+        if not event_id.isdigit():
+            raise Http404("Event does not exist")
+        results = results.filter(event_id=event_id)
+
+    template = "racing/list_results.html"
+    context = {
+        "results": results,
+    }
+    return render(request, template, context)
+
+
+def season_archive(request, series_id=None):
+    """Read-only archived seasons: list of archived series, or the results of one (racing.seasons, cached)"""
+    if series_id is None:
+        series = archived_series()
+        context = {"archived_series": series}
+    else:
+        results = archived_results(series_id)
+        if results is None:
+            raise Http404("Archived series does not exist")
+        context = {"results": results}
+    template = "racing/season_archive.html"
+    return render(request, template, context)
+
+
+def export_results(request):
+    """
+    Streams results as CSV (default) or NDJSON (?format=ndjson), filtered by ?series=<id>, ?event=<id> and/or
+    ?class=<yacht class>. Rows are encoded as they are read (racing.exports), nothing is held in memory.
+
+    """
+    export_format = request.GET.get("format", "csv")
+    ids = [request.GET.get(key) for key in ("series", "event")]
+    if export_format not in EXPORT_FORMATS or not all(
+        value is None or value.isdigit() for value in ids
+    ):
+        return HttpResponseBadRequest(
+            "format must be csv or ndjson, series and event numeric"
+        )
+
+    series, event = ids
+    results = results_for_export(
+        series=series, event=event, yacht_class=request.GET.get("class")
+    )
+    response = StreamingHttpResponse(
+        export_lines(results, export_format),
+        content_type=EXPORT_FORMATS[export_format],
+    )
+    response[
+        "Content-Disposition"
+    ] = f'attachment; filename="sbyra-results.{export_format}"'
+    return response
 
 
 """
@@ -88,4 +327,10 @@ NOTES:
     To bind a value to a form; 
         form = FormName({'name': 'Julien'})
 
+    Sync views under ASGI:
+    the read-only views (racing_home, list_yachts, yacht_details, list_results, season_archive) stay synchronous.
+    The ORM is synchronous (Django 4.0) and their templates evaluate lazy querysets, so an async view would hand
+    the render to sync_to_async anyway. The ASGI handler runs each sync view in its own thread, which also owns
+    the database connection; only the live leaderboard (racing.live) is served on the event loop.
+
 """
@@ -166,6 +166,52 @@ ACCOUNT_AUTHENTICATION_METHOD = "email"
 ACCOUNT_UNIQUE_EMAIL = True
 
 
+### -------------------- CACHE SETTINGS -------------------- ###
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    # archived seasons (racing.seasons): read-only data, cached apart from live data
+    "archive": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "archive",
+    },
+}
+ARCHIVE_CACHE_TTL = 7 * 24 * 3600
+# racing home page (racing.fragments): fragments are invalidated on save, the TTL only bounds stale copies
+RACING_HOME_CACHE_TTL = 24 * 3600
+RACING_HOME_PAGE_SIZE = 25  # active yachts per page
+RACING_HOME_EVENTS = 5  # upcoming and recent events shown
+YACHT_LIST_PAGE_SIZE = 50  # yachts per list_yachts page (keyset pagination)
+
+
+### -------------------- WEATHER SETTINGS -------------------- ###
+
+# seconds a weather payload is served before a background refresh is triggered
+WEATHER_CACHE_TTL = env.int("WEATHER_CACHE_TTL", default=600)
+# seconds a failed or empty weather load is remembered before the loader is called again
+WEATHER_ERROR_TTL = env.int("WEATHER_ERROR_TTL", default=30)
+
+
+### -------------------- SCORING SETTINGS -------------------- ###
+
+# results rescored per BatchScorer run after rating/spinnaker edits (inline, once committed: racing.rescoring)
+RESCORE_BATCH_SIZE = 500
+
+# time on time constants: corrected = elapsed * numerator / (base + phrf_rating)
+HANDICAP_TIME_ON_TIME = (650, 520)
+
+# live leaderboard (racing.live): "memory" for a single process, "redis://host:6379/0" to fan out across processes
+LIVE_BROKER = env("LIVE_BROKER", default="memory")
+LIVE_KEEPALIVE = 15  # seconds between keep-alive comments
+LIVE_QUEUE_SIZE = 100  # messages buffered per subscriber before a resync
+LIVE_SNAPSHOT_TTL = 24 * 3600  # last published leaderboards (kept by the broker)
+
+# result exports (racing.exports): rows fetched per database round trip while streaming
+EXPORT_CHUNK_SIZE = 2000
+
+
 # ### -------------------- EMAIL SETTINGS -------------------- ###
 
 EMAIL_BACKEND = "django.core.mail.backends.console.EmailBackend"
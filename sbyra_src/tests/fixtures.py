@@ -1,4 +1,5 @@
 import pytest
+from django.core.cache import caches
 from django.core.management import call_command
 
 
@@ -10,6 +11,12 @@ def create_admin_user(django_user_model):
     )
 
 
+@pytest.fixture(autouse=True)
+def clear_archive_cache():
+    """archived seasons are cached by series id, and ids repeat between tests"""
+    caches["archive"].clear()
+
+
 @pytest.fixture(scope="session")
 def load_db_fixtures(
     django_db_setup, django_db_blocker
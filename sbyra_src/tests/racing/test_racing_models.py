@@ -1,9 +1,43 @@
 import datetime
+from decimal import Decimal
+from io import StringIO
 
+import numpy as np
 import pytest
-from django.db import IntegrityError
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import IntegrityError, connection
+from django.forms import model_to_dict
+from django.test.utils import CaptureQueriesContext
 from django.utils.text import slugify
-from sbyra_src.racing.models import Event, Result, Series, Yacht
+from hypothesis import given
+from hypothesis import strategies as st
+from sbyra_src.racing.models import (
+    Event,
+    EventClassStart,
+    RatingCertificate,
+    Result,
+    Series,
+    Spinnaker,
+    SeriesStanding,
+    Yacht,
+)
+from sbyra_src.racing.handicaps import (
+    TimeOnTime,
+    coefficient_key,
+    get_system,
+    rating_coefficients,
+)
+from sbyra_src.racing.forms import YachtAdminForm
+from sbyra_src.racing.scoreboard import Scoreboard
+from sbyra_src.racing.scoring import BatchScorer
+from sbyra_src.racing.signals import results_scored
+from sbyra_src.racing.seasons import archived_results, archived_series
+from sbyra_src.racing.standings import (
+    rebuild_standings,
+    verify_standings,
+)
+from sbyra_src.utils.time_conversions import convert_to_time_object
 
 """ 
 Specifications: 
@@ -13,6 +47,20 @@ Specifications:
 3. Test that a Yacht created with phrf_rating and yacht_class has is_active == True
 4. Test that a Yacht created with no phrf_rating or yacht_class can be updated with both and is_active == True
 5. Test that slug takes name as input 
+6. Test that bulk event scoring matches the per-row Result.save() path in a constant number of queries
+7. Property test: vectorized (NumPy) rescoring matches Result.calc_corrected_time for any input
+8. Test that series standings follow result saves, deletes and yacht class changes and match a full rebuild
+9. Test that phrf and spinnaker adjustment edits rescore only the affected results, and other saves rescore nothing
+10. Test that handicap coefficients are cached per system, rating and spinnaker adjustment
+11. Test that elapsed and corrected seconds are stored (beyond 24 hours too), ordered and backfilled in chunks
+12. Test that class starts are looked up per yacht class from EventClassStart with one query per event, and are
+    backfilled from the legacy Event columns
+13. Test that the with_corrected_time() database annotation agrees with Result.calc_seconds and can be ordered
+14. Test that the season rollover archives past series, their events and results, and archives are read cached;
+    other series saves leave the archive flags alone
+15. Test that rating changes are kept as certificates and results stay scored with the rating valid on their date,
+    also when an admin edit moves a certificate, and that an admin effective from date rescores past results
+16. Test that series standings discard each yacht's worst races (throwouts) and break ties by countback
 
 """
 yachtclub_data = []
@@ -152,6 +200,755 @@ def test_name_unique():
         new_series_2.save()
 
 
+@pytest.mark.django_db
+def test_rollover_archives_past_seasons(django_assert_num_queries):
+    past = create_scored_event(3)
+    current = Series.objects.create(name="Summer", year=2026)
+    Event.objects.create(
+        event_date=datetime.date(2026, 6, 3), series=current
+    )
+    out = StringIO()
+
+    call_command(
+        "rollover_seasons", "--today", "2026-01-15", stdout=out
+    )
+    call_command(
+        "rollover_seasons", "--today", "2026-01-15", stdout=out
+    )
+
+    assert out.getvalue().splitlines()[-2:] == [
+        "1 series archived",
+        "0 series archived",
+    ]
+    past.refresh_from_db()
+    assert past.archived and not past.series.current_year
+    assert list(Series.current.all()) == [current]
+    assert Result.objects.current().count() == 0
+    assert Result.objects.filter(archived=True).count() == 3
+
+    rows, index = archived_results(past.series_id), archived_series()
+    with django_assert_num_queries(0):  # archive cache
+        assert archived_results(past.series_id) == rows
+        assert archived_series() == index
+    assert len(rows) == 3
+    assert [series["id"] for series in index] == [past.series_id]
+    assert archived_results(current.pk) is None
+
+    late = Result.objects.create(
+        event=past,
+        yacht=Yacht.objects.create(yacht_name="Late", sail_num="late"),
+    )
+    assert late.archived  # copied from the event on save
+
+    with CaptureQueriesContext(connection) as queries:
+        current.notes = "renamed"  # current_year unchanged
+        current.save()
+    assert not any("racing_result" in q["sql"] for q in queries)
+
+    past.series.current_year = True  # admin edit restores the season
+    past.series.save()
+    assert Result.objects.current().count() == 4
+    assert archived_results(past.series_id) is None
+
+
 # ------------------- MODEL: EVENT -------------------- #
 
+
+@pytest.mark.django_db
+def test_class_start_lookup_one_query():
+    """Test that every class has its own start and all lookups share one query"""
+    series = Series.objects.create(name="Starts", year=2022)
+    event = Event.objects.create(
+        event_date=datetime.date(2022, 6, 1), series=series
+    )
+    add_class_starts(
+        event,
+        A=datetime.time(18, 0),
+        A1=datetime.time(18, 2),
+        J=datetime.time(18, 15),
+    )
+    event = Event.objects.get(pk=event.pk)
+
+    with CaptureQueriesContext(connection) as queries:
+        assert event.class_start("A1") == datetime.time(18, 2)
+        assert event.class_start("J") == datetime.time(18, 15)
+        assert event.class_start("C") is None
+    assert len(queries) == 1
+
+
 # ------------------- MODEL: RESULT ------------------- #
+
+
+def add_class_starts(event, **starts):
+    EventClassStart.objects.bulk_create(
+        EventClassStart(
+            event=event, yacht_class=yacht_class, start=start
+        )
+        for yacht_class, start in starts.items()
+    )
+
+
+def create_scored_event(entries):
+    """Event with class starts and one completed result per yacht (spinnaker used on every other yacht)"""
+    spinnaker = Spinnaker.objects.create(
+        spinnaker_class_name="S1", adjustment_value=6
+    )
+    series = Series.objects.create(name=f"Scoring {entries}", year=2022)
+    event = Event.objects.create(
+        event_date=datetime.date(2022, 6, 1), series=series
+    )
+    add_class_starts(
+        event, A=datetime.time(18, 0), B=datetime.time(18, 5)
+    )
+    for i in range(entries):
+        yacht = Yacht.objects.create(
+            yacht_name=f"Scoring {entries} {i}",
+            sail_num=f"{entries}-{i}",
+            yacht_class="A" if i % 2 else "B",
+            phrf_rating=Decimal("150.5") + i * 7,
+            spinnaker_class=spinnaker,
+        )
+        Result.objects.create(
+            event=event,
+            yacht=yacht,
+            finish_time=datetime.time(19, i % 60, (i * 7) % 60),
+            time_penalty=datetime.time(0, 2, 0) if i == 1 else None,
+            used_spinnaker=bool(i % 2),
+        )
+    return event
+
+
+def unscore(results):
+    results.update(
+        elapsed_seconds=None, corrected_seconds=None, posted_time=None
+    )
+
+
+@pytest.mark.django_db
+def test_score_event_matches_per_row_path():
+    """Test that bulk scoring stores exactly the posted times computed by Result.calc_corrected_time"""
+    event = create_scored_event(6)
+    expected = {
+        result.pk: result.calc_corrected_time
+        for result in Result.objects.filter(event=event)
+    }
+    unscore(Result.objects.filter(event=event))
+
+    changed = Result.objects.score_event(event)
+
+    assert len(changed) == 6
+    assert (
+        dict(
+            Result.objects.filter(event=event).values_list(
+                "pk", "posted_time"
+            )
+        )
+        == expected
+    )
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("entries", [2, 20])
+def test_score_event_constant_queries(
+    entries, django_assert_num_queries
+):
+    """Test that scoring an event costs the same number of queries regardless of fleet size"""
+    event = create_scored_event(entries)
+    unscore(Result.objects.filter(event=event))
+
+    # results (joined yachts and spinnakers), class starts, certificates,
+    # savepoint, bulk_update, release; standings (results_scored): event
+    # classes, then 7 per class (A and B): the standings are unchanged
+    # so only the stored rows are read, nothing is written
+    with django_assert_num_queries(7 + 2 * 7):
+        Result.objects.score_event(event)
+
+
+@st.composite
+def scoring_inputs(draw):
+    """In-memory Result (with Yacht, Spinnaker and Event) covering every scoring branch"""
+    start = draw(st.integers(6 * 3600, 14 * 3600))
+    finish = start + 600 + draw(st.integers(0, 8 * 3600))
+    penalty = draw(st.one_of(st.none(), st.integers(0, 3600)))
+    yacht = Yacht(
+        yacht_class=draw(
+            st.sampled_from(["A", "A1", "B", "C", "J", ""])
+        ),
+        phrf_rating=draw(
+            st.decimals(
+                min_value=-50, max_value=300, places=1, allow_nan=False
+            )
+        ),
+        is_active=draw(st.booleans()),
+        spinnaker_class=Spinnaker(
+            adjustment_value=draw(st.integers(0, 30))
+        ),
+    )
+    event = Event(
+        series=Series(
+            handicap_system=draw(st.sampled_from(["TOT", "TOD", "OD"]))
+        ),
+        distance=draw(
+            st.decimals(
+                min_value=0, max_value=30, places=2, allow_nan=False
+            )
+        ),
+    )
+    event.starts = {  # in-memory class starts (no EventClassStart rows)
+        "A": convert_to_time_object(start),
+        "A1": convert_to_time_object(start),
+        "B": convert_to_time_object(start + 300),
+        "C": convert_to_time_object(start + 600),
+        "J": draw(
+            st.one_of(st.none(), st.just(convert_to_time_object(start)))
+        ),
+    }
+    return Result(
+        yacht=yacht,
+        event=event,
+        completed_status=draw(st.sampled_from(["CMP", "DNC", "DSQ"])),
+        finish_time=convert_to_time_object(finish),
+        time_penalty=(
+            None if penalty is None else convert_to_time_object(penalty)
+        ),
+        used_spinnaker=draw(st.booleans()),
+    )
+
+
+@given(st.lists(scoring_inputs(), min_size=1, max_size=20))
+def test_batch_scorer_matches_calc_corrected_time(results):
+    """Property: vectorized scoring equals the scalar reference implementation for every row"""
+    cache.clear()
+    scorer = BatchScorer(Result.objects.none())
+    scorer.class_starts = {
+        (i, yacht_class): start
+        for i, r in enumerate(results)
+        for yacht_class, start in r.event.starts.items()
+    }
+    scorer.rows = [
+        (
+            i,
+            None,
+            None,
+            None,
+            None,
+            r.completed_status,
+            r.finish_time,
+            r.time_penalty,
+            r.used_spinnaker,
+            i,
+            r.yacht.is_active,
+            r.yacht.yacht_class,
+            r.yacht.phrf_rating,
+            r.yacht.spinnaker_class.adjustment_value,
+            r.event.distance,
+            r.event.series.handicap_system,
+            i,
+            r.event.event_date,
+        )
+        for i, r in enumerate(results)
+    ]
+
+    elapsed, corrected = scorer.score(
+        [scorer.rating(row) for row in scorer.rows]
+    )
+    vectorized = [
+        tuple(None if np.isnan(s) else int(s) for s in pair)
+        for pair in zip(elapsed.tolist(), corrected.tolist())
+    ]
+
+    assert vectorized == [r.calc_seconds for r in results]
+
+
+@pytest.mark.django_db
+def test_rescore_series_writes_only_changed_rows():
+    event = create_scored_event(4)
+    expected = {
+        result.pk: result.posted_time
+        for result in Result.objects.filter(event=event)
+    }
+    stale = Result.objects.filter(event=event).first()
+    unscore(Result.objects.filter(pk=stale.pk))
+    scored = []
+
+    def receiver(sender, events, **kwargs):
+        scored.extend(events)
+
+    results_scored.connect(receiver)
+    try:
+        changed = Result.objects.rescore_series(event.series)
+    finally:
+        results_scored.disconnect(receiver)
+    assert scored == [event]
+    assert Event.series.is_cached(scored[0])  # no query per event
+
+    assert [result.pk for result in changed] == [stale.pk]
+    assert (
+        dict(
+            Result.objects.filter(event=event).values_list(
+                "pk", "posted_time"
+            )
+        )
+        == expected
+    )
+
+
+@pytest.mark.django_db
+def test_phrf_change_rescores_only_that_yacht(
+    django_capture_on_commit_callbacks,
+):
+    with django_capture_on_commit_callbacks(execute=True):
+        event = create_scored_event(3)
+    # rating changes apply from today on (RatingCertificate)
+    Event.objects.filter(pk=event.pk).update(
+        event_date=datetime.date.today()
+    )
+    yacht = Yacht.objects.get(sail_num="3-1")
+    before = dict(
+        Result.objects.values_list("yacht__sail_num", "updated")
+    )
+
+    with django_capture_on_commit_callbacks(execute=True) as callbacks:
+        yacht.yacht_type = "J/30"
+        yacht.save()
+    assert len(callbacks) == 1  # racing home fleet section, no rescore
+
+    with django_capture_on_commit_callbacks(execute=True) as callbacks:
+        yacht.phrf_rating = 100
+        yacht.save()
+    # home fleet section, then the rescore's rollups and leaderboard push
+    assert len(callbacks) == 3
+
+    result = Result.objects.get(yacht=yacht)
+    assert result.posted_time == result.calc_corrected_time
+    after = dict(
+        Result.objects.values_list("yacht__sail_num", "updated")
+    )
+    assert after["3-1"] != before["3-1"]
+    assert (
+        after["3-0"] == before["3-0"] and after["3-2"] == before["3-2"]
+    )
+
+
+@pytest.mark.django_db
+def test_rating_certificates_keep_past_results(
+    django_capture_on_commit_callbacks,
+):
+    event = create_scored_event(3)
+    yacht = Yacht.objects.get(sail_num="3-1")
+    before = dict(Result.objects.values_list("pk", "posted_time"))
+    today = datetime.date.today()
+
+    with django_capture_on_commit_callbacks(execute=True):
+        yacht.phrf_rating = 100
+        yacht.save()
+
+    assert list(
+        yacht.certificates.values_list(
+            "phrf_rating", "valid_from", "valid_to"
+        )
+    ) == [
+        (100, today, None),
+        (Decimal("157.5"), datetime.date.min, today),
+    ]
+    assert RatingCertificate.objects.as_of(
+        event.event_date
+    ).get().phrf_rating == Decimal("157.5")
+    past = Result.objects.get(event=event, yacht=yacht)
+    assert past.scored_phrf_rating == Decimal("157.5")
+    assert past.scored_spinnaker_adjustment == 6
+    # every scoring path resolves the 2022 rating: nothing to recompute
+    assert Result.objects.score_event(event) == []
+    assert Result.objects.rescore_series(event.series) == []
+    assert (
+        dict(Result.objects.values_list("pk", "posted_time")) == before
+    )
+    assert all(
+        result.calc_corrected == result.corrected_seconds
+        for result in Result.objects.with_corrected_time()
+    )
+
+    later = Event.objects.create(event_date=today, series=event.series)
+    add_class_starts(later, A=datetime.time(18, 0))
+    result = Result.objects.create(
+        event=later,
+        yacht=yacht,
+        finish_time=datetime.time(19, 0),
+        used_spinnaker=True,
+    )
+    assert result.scored_phrf_rating == 100
+    assert result.scored_spinnaker_adjustment == 6
+
+    # admin edits rescore the results entering and leaving the range
+    current = yacht.certificates.get(valid_to=None)
+    for valid_from, rating in [
+        (event.event_date, 100),
+        (today, Decimal("157.5")),
+    ]:
+        with django_capture_on_commit_callbacks(execute=True):
+            current.valid_from = valid_from
+            current.save()
+        past.refresh_from_db()
+        assert past.scored_phrf_rating == rating
+
+
+@pytest.mark.django_db
+def test_rating_effective_from_rescores_past_results(
+    django_capture_on_commit_callbacks,
+):
+    event = create_scored_event(3)
+    yacht = Yacht.objects.get(sail_num="3-1")
+
+    with django_capture_on_commit_callbacks(execute=True):
+        yacht.phrf_rating = 100
+        yacht._rating_effective_from = event.event_date  # admin form
+        yacht.save()
+
+    assert list(
+        yacht.certificates.values_list(
+            "phrf_rating", "valid_from", "valid_to"
+        )
+    ) == [
+        (100, event.event_date, None),
+        (Decimal("157.5"), datetime.date.min, event.event_date),
+    ]
+    past = Result.objects.get(event=event, yacht=yacht)
+    assert past.scored_phrf_rating == 100
+    assert past.posted_time == past.calc_corrected_time
+
+    data = model_to_dict(yacht)
+    data["rating_effective_from"] = (
+        event.event_date - datetime.timedelta(days=1)
+    )
+    form = YachtAdminForm(data, instance=yacht)
+    assert not form.is_valid()
+    assert "rating_effective_from" in form.errors
+
+
+@pytest.mark.django_db
+def test_spinnaker_adjustment_change_rescores_spinnaker_results(
+    django_capture_on_commit_callbacks,
+):
+    event = create_scored_event(4)  # spinnaker used by yachts 1 and 3
+    spinnaker = Spinnaker.objects.get()
+    before = dict(
+        Result.objects.values_list("yacht__sail_num", "posted_time")
+    )
+
+    with django_capture_on_commit_callbacks(execute=True):
+        spinnaker.adjustment_value = 30
+        spinnaker.save()
+
+    after = dict(
+        Result.objects.values_list("yacht__sail_num", "posted_time")
+    )
+    changed = {sail for sail in after if after[sail] != before[sail]}
+    assert changed == {"4-1", "4-3"}
+
+
+def test_coefficient_cache_keyed_on_rating():
+    cache.clear()
+    tot = get_system("TOT")
+
+    first = rating_coefficients(
+        tot, [(120, 0), (Decimal("120.0"), None)]
+    )
+    assert first == {
+        (120, 0): (650 / 640, 650 / 640),
+        (120, None): (650 / 640, 650 / 640),
+    }
+    assert cache.get(coefficient_key(tot, 120, 0)) == first[120, 0]
+    assert get_system("OD").coefficient(999) == 1.0
+
+    # a new rating reads a new key: no invalidation, nothing stale
+    assert rating_coefficients(tot, [(150, 0), (None, 0)]) == {
+        (150, 0): (650 / 670, 650 / 670)
+    }
+    assert coefficient_key(tot, 120, 0) != coefficient_key(tot, 120, 6)
+
+
+def test_time_on_time_constants():
+    assert TimeOnTime(600, 480).coefficient(120) == 1.0
+
+
+@pytest.mark.django_db
+def test_seconds_stored_and_ordered_beyond_24_hours():
+    """Test that corrected times of 24 hours or more are stored in seconds (no display time) and ordered"""
+    event = create_scored_event(2)
+    # 55 min * 650 / 20: over a day (update(): no certificate history)
+    Yacht.objects.filter(sail_num="2-0").update(phrf_rating=-500)
+    long_race = Result.objects.get(yacht__sail_num="2-0")
+    long_race.save()
+
+    long_race.refresh_from_db()
+    assert long_race.corrected_seconds >= 24 * 3600
+    assert long_race.elapsed_seconds == 55 * 60
+    assert long_race.posted_time is None
+    assert list(
+        Result.objects.filter(event=event).values_list(
+            "yacht__sail_num", flat=True
+        )
+    ) == ["2-1", "2-0"]
+    # default ordering is on result_event_corrected_idx: no join
+    assert "racing_event" not in str(Result.objects.all().query)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("system", ["TOT", "TOD", "OD"])
+def test_with_corrected_time_matches_calc_seconds(system):
+    """Test that the database annotation agrees with Result.calc_seconds for every handicap system"""
+    event = create_scored_event(9)
+    Series.objects.filter(pk=event.series_id).update(
+        handicap_system=system
+    )
+    Event.objects.filter(pk=event.pk).update(distance=Decimal("4.35"))
+    Result.objects.filter(yacht__sail_num="9-4").update(
+        completed_status="DNC"
+    )
+    Yacht.objects.filter(sail_num="9-6").update(phrf_rating=-35.5)
+    Yacht.objects.filter(sail_num="9-8").update(yacht_class="C")
+
+    annotated = {
+        pk: (elapsed, corrected)
+        for pk, elapsed, corrected in Result.objects.with_corrected_time()
+        .order_by()
+        .values_list("pk", "calc_elapsed", "calc_corrected")
+    }
+    expected = {
+        result.pk: result.calc_seconds
+        for result in Result.objects.select_related(
+            "event__series", "yacht__spinnaker_class"
+        )
+    }
+
+    assert annotated == expected
+    assert annotated[Result.objects.get(yacht__sail_num="9-4").pk] == (
+        None,
+        None,
+    )
+    assert list(
+        Result.objects.with_corrected_time()
+        .filter(calc_corrected__isnull=False)
+        .order_by("calc_corrected")
+        .values_list("calc_corrected", flat=True)
+    ) == sorted(
+        corrected
+        for elapsed, corrected in expected.values()
+        if corrected is not None
+    )
+
+
+@pytest.mark.django_db
+def test_backfill_result_seconds_command():
+    event = create_scored_event(5)
+    expected = set(
+        Result.objects.values_list(
+            "pk", "elapsed_seconds", "corrected_seconds"
+        )
+    )
+    Result.objects.filter(event=event).update(
+        elapsed_seconds=None, corrected_seconds=None
+    )
+    out = StringIO()
+
+    call_command("backfill_result_seconds", batch_size=2, stdout=out)
+
+    assert "backfilled 5 of 5 results" in out.getvalue()
+    assert (
+        set(
+            Result.objects.values_list(
+                "pk", "elapsed_seconds", "corrected_seconds"
+            )
+        )
+        == expected
+    )
+
+
+@pytest.mark.django_db
+def test_backfill_class_starts_command():
+    series = Series.objects.create(name="Legacy", year=2021)
+    events = [
+        Event.objects.create(
+            event_date=datetime.date(2021, 6, day), series=series
+        )
+        for day in (2, 9, 16)
+    ]
+    add_class_starts(events[2], B=datetime.time(18, 30))  # kept
+    with connection.cursor() as cursor:  # columns before user-013
+        for column in ("first_flag_A", "start_A", "start_B", "start_J"):
+            cursor.execute(
+                f"ALTER TABLE racing_event ADD COLUMN {column} time NULL"
+            )
+        cursor.execute(
+            "UPDATE racing_event SET first_flag_A = '17:55:00', "
+            "start_A = '18:00:00', start_B = '18:05:00' WHERE id IN "
+            f"({events[0].pk}, {events[2].pk})"
+        )
+        cursor.execute(
+            "UPDATE racing_event SET start_J = '18:10:00' "
+            f"WHERE id = {events[1].pk}"
+        )
+    out = StringIO()
+
+    call_command("backfill_class_starts", batch_size=2, stdout=out)
+    call_command("backfill_class_starts", stdout=out)  # idempotent
+
+    assert "backfilled 6 class starts from 3 events" in out.getvalue()
+    assert "backfilled 0 class starts from 3 events" in out.getvalue()
+    starts = set(
+        EventClassStart.objects.values_list(
+            "event", "yacht_class", "first_flag", "start"
+        )
+    )
+    flag, a, b = (
+        datetime.time(17, 55),
+        datetime.time(18, 0),
+        datetime.time(18, 5),
+    )
+    assert starts == {
+        (events[0].pk, "A", flag, a),
+        (events[0].pk, "A1", flag, a),
+        (events[0].pk, "B", None, b),
+        (events[1].pk, "J", None, datetime.time(18, 10)),
+        (events[2].pk, "A", flag, a),
+        (events[2].pk, "A1", flag, a),
+        (events[2].pk, "B", None, datetime.time(18, 30)),
+    }
+
+
+# ------------------- MODEL: SERIESSTANDING ------------------- #
+
+
+@pytest.mark.django_db
+def test_standings_follow_result_saves_and_deletes(
+    django_assert_num_queries,
+):
+    event = create_scored_event(
+        4
+    )  # class B: yachts 0 and 2, class A: 1 and 3
+    second = Event.objects.create(
+        event_date=datetime.date(2022, 6, 8), series=event.series
+    )
+    add_class_starts(
+        second, A=datetime.time(18, 0), B=datetime.time(18, 5)
+    )
+    for result in Result.objects.filter(event=event):
+        Result.objects.create(
+            event=second,
+            yacht=result.yacht,
+            finish_time=datetime.time(20, 0),
+            completed_status=(
+                "DNC" if result.yacht.sail_num == "4-0" else "CMP"
+            ),
+        )
+
+    b_class = {
+        s.yacht.sail_num: (s.points, s.races_sailed, s.rank)
+        for s in SeriesStanding.objects.filter(yacht_class="B")
+    }
+    assert b_class == {"4-0": (4, 1, 2), "4-2": (3, 2, 1)}
+
+    Result.objects.filter(event=second, yacht__sail_num="4-0").delete()
+    assert SeriesStanding.objects.get(yacht__sail_num="4-0").points == 1
+    assert verify_standings() == []
+
+    # cascade: one refresh per class, not one per deleted result
+    # (collect results, their classes, 4 deletes, then 6 per class)
+    with django_assert_num_queries(6 + 2 * 6):
+        second.delete()
+    b_class = {
+        s.yacht.sail_num: (s.points, s.races_sailed, s.rank)
+        for s in SeriesStanding.objects.filter(yacht_class="B")
+    }
+    assert b_class == {"4-0": (1, 1, 1), "4-2": (2, 1, 2)}
+
+    assert verify_standings() == []
+    before = set(
+        SeriesStanding.objects.values_list("yacht", "points", "rank")
+    )
+    rebuild_standings()
+    after = set(
+        SeriesStanding.objects.values_list("yacht", "points", "rank")
+    )
+    assert after == before
+
+
+@pytest.mark.django_db
+def test_standings_follow_yacht_class_change(
+    django_capture_on_commit_callbacks,
+):
+    event = create_scored_event(4)  # class B: yachts 0 and 2
+    yacht = Yacht.objects.get(sail_num="4-0")
+
+    with django_capture_on_commit_callbacks(execute=True):
+        yacht.yacht_class = "A"
+        yacht.save()
+
+    standings = {
+        (s.yacht.sail_num, s.yacht_class): s.rank
+        for s in SeriesStanding.objects.filter(series=event.series)
+    }
+    assert ("4-0", "B") not in standings
+    assert standings[("4-2", "B")] == 1
+    assert ("4-0", "A") in standings
+    assert verify_standings() == []
+
+
+def test_scoreboard_throwouts_and_countback():
+    # races sailed in the order 30, 10, 20; (yacht, race, points, position)
+    rows = [
+        (1, 30, 1, 1),
+        (2, 30, 2, 2),
+        (3, 30, 4, 4),
+        (4, 30, 3, 3),
+        (1, 10, 3, 3),
+        (2, 10, 2, 2),
+        (4, 10, 4, 4),
+        (1, 20, 4, 4),
+        (2, 20, 5, None),
+        (4, 20, 1, 1),
+    ]
+    board = Scoreboard.from_rows(rows, throwouts=1)
+
+    # all on 4 net points: 4 and 1 keep (1, 3), 4 won the last race;
+    # 3 sailed once and keeps its only race
+    assert board.standings() == [
+        (4, 4, 8, 3, 1),
+        (1, 4, 8, 3, 2),
+        (2, 4, 9, 2, 3),
+        (3, 4, 4, 1, 4),
+    ]
+
+    board = Scoreboard.from_rows(rows + [(3, 10, 1, 1)], 1)
+    assert board.standings()[0] == (3, 1, 5, 2, 1)
+
+
+@pytest.mark.django_db
+def test_series_throwouts_refresh_standings():
+    event = create_scored_event(4)  # class A: yachts 1 and 3
+    second = Event.objects.create(
+        event_date=datetime.date(2022, 6, 8), series=event.series
+    )
+    add_class_starts(second, A=datetime.time(18, 0))
+    for sail_num, finish in [("4-1", 19), ("4-3", 20)]:
+        Result.objects.create(
+            event=second,
+            yacht=Yacht.objects.get(sail_num=sail_num),
+            finish_time=datetime.time(finish, 0),
+        )
+    a_class = SeriesStanding.objects.filter(yacht_class="A")
+
+    def standings():
+        return [
+            (s.yacht.sail_num, s.points, s.gross_points, s.rank)
+            for s in a_class.order_by("rank")
+        ]
+
+    # one win each: countback goes to the winner of the last race
+    assert standings() == [("4-1", 3, 3, 1), ("4-3", 3, 3, 2)]
+
+    event.series.throwouts = 1
+    event.series.save()
+
+    assert standings() == [("4-1", 1, 3, 1), ("4-3", 1, 3, 2)]
+    assert verify_standings() == []
@@ -0,0 +1,955 @@
+import asyncio
+import csv
+import datetime
+import io
+import json
+
+import pytest
+from asgiref.sync import async_to_sync, sync_to_async
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.test import AsyncClient
+from django.urls import reverse
+from sbyra_src.racing import rollups
+from sbyra_src.racing.imports import ResultImportError, import_results
+from sbyra_src.racing.live import (
+    RESYNC,
+    InProcessBroker,
+    leaderboard_delta,
+    live_application,
+    publish_leaderboard,
+)
+from sbyra_src.racing.models import (
+    Event,
+    EventClassStart,
+    HeadToHead,
+    Result,
+    Series,
+    Yacht,
+    YachtClub,
+    YachtSeasonStats,
+)
+from sbyra_src.racing.rollups import rebuild_rollups
+from sbyra_src.utils.asgi_handler import StreamingASGIHandler
+
+"""
+Specifications:
+
+1. Test that the read-only views render through the ASGI request path
+2. Test that yacht_details returns 404 for an unknown slug on the ASGI path
+3. Test that a batch of finishes is written in one request and the event is scored
+4. Test that batch errors are reported together, and stale versions or entries another timekeeper made meanwhile are
+   rejected without writing anything
+5. Test that only staff can record finishes
+6. Test that the live leaderboard stream sends a snapshot, then only deltas, and 404s unknown events; the last
+   published leaderboard is kept by the broker, shared by every publishing process
+7. Test that leaderboard deltas are empty when nothing changed and slow subscribers are resynced
+8. Test that list_results ranks per event and class in one query, DNC/DSQ last
+9. Test that result exports stream CSV and NDJSON (view, ASGI handler and management command), filtered
+10. Test that CSV imports report every bad row at once, write nothing on errors and score valid files
+11. Test that archived seasons are listed and readable, current seasons are not served by the archive
+12. Test that season stats and head-to-head records follow scored results (each season and class refreshed once per
+    transaction, the old class too on a class change, only the yachts and pairs of the changed event otherwise) and
+    the yacht page reads them directly
+13. Test that the racing home page runs a fixed number of queries, pages the fleet and serves cached sections until
+    their models are saved
+14. Test that the yacht list pages by yacht_name in one query at any depth and answers revalidation with a 304
+    until a listed yacht or its club changes
+
+"""
+
+
+@pytest.mark.django_db
+def test_read_views_render_on_asgi():
+    Yacht.objects.create(
+        yacht_name="Yacht1", slug="yacht1", yacht_class="A"
+    )
+
+    @async_to_sync
+    async def get_all():
+        client = AsyncClient()
+        return [
+            await client.get(reverse("racing:racing-home")),
+            await client.get(reverse("racing:list-yachts")),
+            await client.get(
+                reverse("racing:yacht-details", args=["yacht1"])
+            ),
+        ]
+
+    for response in get_all():
+        assert response.status_code == 200
+
+
+@pytest.mark.django_db
+def test_yacht_details_404_on_asgi():
+    @async_to_sync
+    async def get():
+        return await AsyncClient().get(
+            reverse("racing:yacht-details", args=["missing"])
+        )
+
+    assert get().status_code == 404
+
+
+# ------------------- VIEW: record_finishes ------------------- #
+
+
+@pytest.fixture
+def race_night(db):
+    series = Series.objects.create(name="Wednesday", year=2022)
+    event = Event.objects.create(
+        event_date=datetime.date(2022, 6, 1), series=series
+    )
+    EventClassStart.objects.create(
+        event=event, yacht_class="A", start=datetime.time(18, 0)
+    )
+    for i in range(3):
+        Yacht.objects.create(
+            yacht_name=f"Finisher {i}",
+            slug=f"finisher-{i}",
+            sail_num=f"CAN {i}",
+            yacht_class="A",
+            phrf_rating=120 + i * 10,
+        )
+    return event
+
+
+@pytest.fixture
+def staff_client(client, django_user_model):
+    timekeeper = django_user_model.objects.create_user(
+        "timekeeper@sbyra.ca",
+        "Time",
+        "Keeper",
+        "password",
+        is_staff=True,
+        is_active=True,
+    )
+    client.force_login(timekeeper)
+    return client
+
+
+def post_finishes(client, event, finishes):
+    return client.post(
+        reverse("racing:record-finishes", args=[event.pk]),
+        json.dumps({"finishes": finishes}),
+        content_type="application/json",
+    )
+
+
+def test_record_finishes_batch_scores_event(staff_client, race_night):
+    existing = Result.objects.create(
+        event=race_night, yacht=Yacht.objects.get(sail_num="CAN 0")
+    )
+
+    response = post_finishes(
+        staff_client,
+        race_night,
+        [
+            {
+                "yacht": "CAN 0",
+                "finish_time": "19:10:00",
+                "order_over_line": 2,
+                "version": existing.version,
+            },
+            {"yacht": "Finisher 1", "finish_time": "19:05:00"},
+            {
+                "yacht": "CAN 2",
+                "finish_time": "19:20:00",
+                "order_over_line": 3,
+            },
+        ],
+    )
+
+    assert response.status_code == 200
+    assert response.json() == {"recorded": 3}
+    results = Result.objects.filter(event=race_night)
+    assert results.count() == 3
+    assert all(result.corrected_seconds for result in results)
+    existing.refresh_from_db()
+    assert existing.finish_time == datetime.time(19, 10)
+    assert existing.version == 1
+
+
+def test_record_finishes_reports_all_errors(staff_client, race_night):
+    response = post_finishes(
+        staff_client,
+        race_night,
+        [
+            {"yacht": "CAN 0", "finish_time": "19:10:00"},
+            {"yacht": "Unknown", "finish_time": "19:11:00"},
+            {"yacht": "Finisher 0", "finish_time": "19:12:00"},
+            {"yacht": "CAN 1", "finish_time": "25:00:00"},
+        ],
+    )
+
+    assert response.status_code == 400
+    rows = response.json()["rows"]
+    assert [sorted(row) for row in rows] == [
+        [],
+        ["yacht"],
+        ["yacht"],
+        ["finish_time"],
+    ]
+    assert not Result.objects.exists()
+
+
+def test_record_finishes_rejects_stale_version(
+    staff_client, race_night
+):
+    result = Result.objects.create(
+        event=race_night,
+        yacht=Yacht.objects.get(sail_num="CAN 0"),
+        finish_time=datetime.time(19, 10),
+    )
+    loaded_version = result.version
+    result.finish_time = datetime.time(19, 11)  # other timekeeper
+    result.save()
+
+    response = post_finishes(
+        staff_client,
+        race_night,
+        [
+            {"yacht": "CAN 1", "finish_time": "19:05:00"},
+            {
+                "yacht": "CAN 0",
+                "finish_time": "19:09:00",
+                "version": loaded_version,
+            },
+        ],
+    )
+
+    assert response.status_code == 409
+    assert response.json() == {"stale": ["Finisher 0"]}
+    result.refresh_from_db()
+    assert result.finish_time == datetime.time(19, 11)
+    assert Result.objects.count() == 1
+
+
+def test_record_finishes_rejects_entry_made_meanwhile(
+    staff_client, race_night
+):
+    # both timekeepers loaded the page before CAN 0 had a result
+    Result.objects.create(
+        event=race_night,
+        yacht=Yacht.objects.get(sail_num="CAN 0"),
+        finish_time=datetime.time(19, 10),
+    )
+
+    response = post_finishes(
+        staff_client,
+        race_night,
+        [{"yacht": "CAN 0", "finish_time": "19:09:00"}],
+    )
+
+    assert response.status_code == 409
+    assert Result.objects.get().finish_time == datetime.time(19, 10)
+
+
+def test_record_finishes_staff_only(client, race_night):
+    response = post_finishes(
+        client, race_night, [{"yacht": "CAN 0", "finish_time": "19:10"}]
+    )
+
+    assert response.status_code == 302
+    assert not Result.objects.exists()
+
+
+def test_record_finishes_form_page(staff_client, race_night):
+    url = reverse("racing:record-finishes", args=[race_night.pk])
+    data = {
+        "form-TOTAL_FORMS": 2,
+        "form-INITIAL_FORMS": 0,
+        "form-0-yacht": "CAN 0",
+        "form-0-finish_time": "19:10:00",
+        "form-1-yacht": "",
+        "form-1-finish_time": "",
+    }
+
+    response = staff_client.post(url, data)
+
+    assert response.status_code == 302
+    assert staff_client.get(response.url).status_code == 200
+    assert Result.objects.get().finish_time == datetime.time(19, 10)
+
+
+# ------------------- VIEW: list_results ------------------- #
+
+
+def test_list_results_ranks_by_class_in_one_query(
+    client, race_night, django_assert_num_queries
+):
+    EventClassStart.objects.create(
+        event=race_night, yacht_class="B", start=datetime.time(18, 5)
+    )
+    b = Yacht.objects.create(
+        yacht_name="B boat",
+        slug="b-boat",
+        sail_num="B",
+        yacht_class="B",
+    )
+    late = Yacht.objects.create(
+        yacht_name="Late", slug="late", sail_num="L", yacht_class="A"
+    )
+    finishes = [
+        ("CAN 0", datetime.time(19, 20), "CMP"),
+        ("CAN 1", datetime.time(19, 5), "DSQ"),
+        ("CAN 2", datetime.time(19, 10), "CMP"),
+    ]
+    for sail_num, finish_time, status in finishes:
+        Result.objects.create(
+            event=race_night,
+            yacht=Yacht.objects.get(sail_num=sail_num),
+            finish_time=finish_time,
+            completed_status=status,
+        )
+    Result.objects.create(
+        event=race_night, yacht=late, completed_status="DNC"
+    )
+    Result.objects.create(
+        event=race_night, yacht=b, finish_time=datetime.time(19, 30)
+    )
+
+    with django_assert_num_queries(1):
+        response = client.get(reverse("racing:list-results"))
+
+    assert response.status_code == 200
+    ranked = [
+        (r.yacht.yacht_name, r.yacht.yacht_class, r.class_rank)
+        for r in response.context["results"]
+    ]
+    assert ranked == [
+        ("Finisher 2", "A", 1),
+        ("Finisher 0", "A", 2),
+        ("Late", "A", 3),  # DNC, then DSQ
+        ("Finisher 1", "A", 4),
+        ("B boat", "B", 1),
+    ]
+
+
+# ------------------- VIEW: export_results ------------------- #
+
+
+@pytest.fixture
+def finished_night(race_night):
+    for i, sail_num in enumerate(["CAN 0", "CAN 1", "CAN 2"]):
+        Result.objects.create(
+            event=race_night,
+            yacht=Yacht.objects.get(sail_num=sail_num),
+            finish_time=datetime.time(19, 20 - i * 5),
+        )
+    return race_night
+
+
+def test_export_results_streams_csv(client, finished_night):
+    response = client.get(
+        reverse("racing:export-results"),
+        {"event": finished_night.pk},
+    )
+
+    assert response.status_code == 200
+    assert response.streaming
+    assert response["Content-Type"] == "text/csv"
+    rows = list(
+        csv.DictReader(
+            io.StringIO(b"".join(response.streaming_content).decode())
+        )
+    )
+    assert [(row["sail_num"], row["position"]) for row in rows] == [
+        ("CAN 2", "1"),
+        ("CAN 1", "2"),
+        ("CAN 0", "3"),
+    ]
+    assert rows[0]["series"] == "Wednesday"
+
+
+def test_export_results_ndjson_and_bad_request(client, finished_night):
+    response = client.get(
+        reverse("racing:export-results"),
+        {"format": "ndjson", "class": "B"},
+    )
+    assert b"".join(response.streaming_content) == b""
+
+    response = client.get(
+        reverse("racing:export-results"), {"format": "xml"}
+    )
+    assert response.status_code == 400
+
+
+def test_export_results_streams_on_asgi(finished_night, settings):
+    """Test that the ASGI handler reads streamed rows outside the event loop (no SynchronousOnlyOperation)"""
+    settings.ALLOWED_HOSTS = ["testserver"]
+    sent = []
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {
+        "type": "http",
+        "method": "GET",
+        "path": reverse("racing:export-results"),
+        "query_string": b"format=ndjson",
+        "headers": [(b"host", b"testserver")],
+    }
+    async_to_sync(StreamingASGIHandler())(scope, receive, send)
+
+    assert sent[0]["status"] == 200
+    body = b"".join(message.get("body", b"") for message in sent[1:])
+    rows = [json.loads(line) for line in body.splitlines()]
+    assert [row["sail_num"] for row in rows] == [
+        "CAN 2",
+        "CAN 1",
+        "CAN 0",
+    ]
+    assert sent[-1] == {"type": "http.response.body"}
+
+
+def test_export_results_command(finished_night):
+    out = io.StringIO()
+
+    call_command(
+        "export_results",
+        "--series",
+        str(finished_night.series_id),
+        "--chunk-size",
+        "2",
+        stdout=out,
+    )
+
+    lines = out.getvalue().splitlines()
+    assert lines[0].startswith("series,year,event,event_date")
+    assert len(lines) == 4
+
+
+# ------------------- IMPORT: CSV results ------------------- #
+
+
+def test_import_results_creates_and_scores(race_night):
+    csv_file = io.StringIO(
+        "event,sail_num,finish_time,notes\n"
+        f"{race_night.pk},CAN 0,19:20:00,\n"
+        f"{race_night.pk},CAN 1,19:10:00,\n"
+        f"{race_night.pk},Finisher 2,19:15:00,by name\n"
+    )
+
+    with CaptureQueriesContext(connection) as queries:
+        assert import_results(csv_file) == 3
+
+    reads = [q["sql"] for q in queries][:4]
+    assert reads[3].startswith(
+        "SAVEPOINT"
+    )  # validation: events, yachts, existing results, whatever the size
+
+    results = Result.objects.filter(event=race_night).order_by(
+        "position"
+    )
+    assert [r.yacht.sail_num for r in results] == [
+        "CAN 1",
+        "CAN 2",
+        "CAN 0",
+    ]
+    assert all(r.corrected_seconds for r in results)
+    assert results[1].notes == "by name"
+
+
+def test_import_results_reports_every_bad_row(race_night):
+    Result.objects.create(
+        event=race_night, yacht=Yacht.objects.get(sail_num="CAN 2")
+    )
+    csv_file = io.StringIO(
+        "event,sail_num,status,finish_time\n"
+        f"{race_night.pk},CAN 0,CMP,19:20:00\n"
+        f"{race_night.pk},Unknown,CMP,19:21:00\n"
+        f"{race_night.pk},CAN 1,XXX,25:00\n"
+        f"{race_night.pk},CAN 0,CMP,19:22:00\n"
+        f"{race_night.pk},CAN 2,CMP,19:23:00\n"
+        "999,CAN 1,CMP,19:24:00\n"
+    )
+
+    with pytest.raises(ResultImportError) as error:
+        import_results(csv_file)
+
+    lines = [line for line, message in error.value.errors]
+    assert lines == [3, 4, 4, 5, 6, 7]
+    assert Result.objects.count() == 1  # nothing written
+
+
+@pytest.fixture
+def superuser_client(client, django_user_model):
+    commodore = django_user_model.objects.create_superuser(
+        "commodore@sbyra.ca", "Race", "Commodore", "password"
+    )
+    client.force_login(commodore)
+    return client
+
+
+def test_admin_result_import(superuser_client, race_night):
+    url = reverse("admin:racing_result_import")
+    upload = SimpleUploadedFile(
+        "results.csv",
+        f"event,yacht\n{race_night.pk},Finisher 0\n".encode(),
+    )
+
+    assert superuser_client.get(url).status_code == 200
+    response = superuser_client.post(url, {"csv_file": upload})
+
+    assert response.status_code == 302
+    assert Result.objects.filter(event=race_night).count() == 1
+
+
+# ------------------- VIEW: season_archive ------------------- #
+
+
+def test_season_archive_pages(client, finished_night):
+    series = finished_night.series
+    url = reverse("racing:archived-series", args=[series.pk])
+    assert client.get(url).status_code == 404  # still current
+
+    series.current_year = False
+    series.save()
+    index = client.get(reverse("racing:season-archive"))
+    archived = client.get(url)
+
+    assert url.encode() in index.content
+    assert archived.status_code == 200
+    assert b"Finisher 2" in archived.content
+    assert (
+        list(
+            client.get(reverse("racing:list-results")).context[
+                "results"
+            ]
+        )
+        == []
+    )
+
+
+# ------------------- VIEW: racing_home ------------------- #
+
+
+@pytest.mark.django_db
+def test_racing_home_bounded_and_cached(
+    client, settings, django_capture_on_commit_callbacks
+):
+    settings.RACING_HOME_PAGE_SIZE = 2
+    cache.clear()
+    series = Series.objects.create(name="Wednesday", year=2022)
+    today = datetime.date.today()
+    for days in (-14, -7, 7):
+        Event.objects.create(
+            event_date=today + datetime.timedelta(days=days),
+            series=series,
+        )
+    for i, name in enumerate(["Cassiopeia", "Amarok", "Blue Note"]):
+        Yacht.objects.create(
+            yacht_name=name,
+            slug=name.lower().replace(" ", "-"),
+            sail_num=f"CAN {i}",
+            yacht_class="A",
+            phrf_rating=120,
+        )
+    Yacht.objects.create(
+        yacht_name="Laid Up", slug="laid-up", sail_num="CAN 9"
+    )
+    url = reverse("racing:racing-home")
+
+    with CaptureQueriesContext(connection) as queries:
+        first = client.get(url)
+    assert len(queries) == 5  # upcoming, recent, series, count, page
+    fleet = [yacht.yacht_name for yacht in first.context["fleet_page"]]
+    assert fleet == ["Amarok", "Blue Note"]
+    assert len(first.context["recent"]) == 2
+    assert b"?page=2" in first.content
+
+    with CaptureQueriesContext(connection) as queries:
+        cached = client.get(url)
+    assert len(queries) == 0
+    assert cached.content == first.content
+
+    assert b"Cassiopeia" in client.get(url, {"page": "2"}).content
+    with django_capture_on_commit_callbacks(execute=True):
+        Yacht.objects.get(yacht_name="Amarok").delete()
+        # not committed yet: the cached section is still current
+        assert client.get(url).content == first.content
+    after = client.get(url)  # invalidated on commit
+    assert b"Amarok" not in after.content
+    assert b"Cassiopeia" in after.content
+    assert b"Laid Up" not in after.content  # inactive
+
+
+# ------------------- VIEW: list_yachts ------------------- #
+
+
+@pytest.mark.django_db
+def test_list_yachts_keyset_pages_and_conditional_get(client, settings):
+    settings.YACHT_LIST_PAGE_SIZE = 2
+    club = YachtClub.objects.create(yacht_club_name="Nepean")
+    for i in range(5):
+        Yacht.objects.create(
+            yacht_name=f"Yacht {i}",
+            slug=f"yacht-{i}",
+            sail_num=f"CAN {i}",
+            yacht_club=club if i == 1 else None,
+        )
+    url = reverse("racing:list-yachts")
+
+    names, params, counts = [], {}, []
+    while params is not None:
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(url, params)
+        counts.append(len(queries))
+        page = response.context["page"]
+        names += [yacht.yacht_name for yacht in page]
+        params = {"after": page.next_key} if page.next_key else None
+    assert names == [f"Yacht {i}" for i in range(5)]
+    assert counts == [1, 1, 1]  # the last page costs the first's
+
+    previous = client.get(url, {"before": "Yacht 3"}).context["page"]
+    names = [yacht.yacht_name for yacht in previous]
+    assert names == ["Yacht 1", "Yacht 2"]
+    assert previous.previous_key == "Yacht 1"
+
+    first = client.get(url)
+    with CaptureQueriesContext(connection) as queries:
+        cached = client.get(url, HTTP_IF_NONE_MATCH=first["ETag"])
+    assert cached.status_code == 304
+    assert len(queries) == 1
+    assert (
+        client.get(
+            url, HTTP_IF_MODIFIED_SINCE=first["Last-Modified"]
+        ).status_code
+        == 304
+    )
+    assert "no-cache" in first["Cache-Control"]
+
+    yacht = Yacht.objects.get(yacht_name="Yacht 0")
+    yacht.yacht_type = "J/30"
+    yacht.save()
+    changed = client.get(url, HTTP_IF_NONE_MATCH=first["ETag"])
+    assert changed.status_code == 200
+    assert changed["ETag"] != first["ETag"]
+    assert (
+        client.get(
+            url, {"active": "1"}, HTTP_IF_NONE_MATCH=changed["ETag"]
+        ).status_code
+        == 200
+    )  # other listing
+
+    club.yacht_club_name = "Nepean Sailing Club"
+    club.save()  # rendered on the page, but not a yacht row
+    renamed = client.get(url, HTTP_IF_NONE_MATCH=changed["ETag"])
+    assert renamed.status_code == 200
+    assert b"Nepean Sailing Club" in renamed.content
+
+
+# ------------------- VIEW: yacht_details ------------------- #
+
+
+def test_yacht_details_season_rollups(
+    client,
+    race_night,
+    monkeypatch,
+    django_capture_on_commit_callbacks,
+):
+    refreshed = []
+    refresh_rollups = rollups.refresh_rollups
+
+    def counting_refresh(year, yacht_class, *scope):
+        refreshed.append((year, yacht_class))
+        return refresh_rollups(year, yacht_class, *scope)
+
+    monkeypatch.setattr(rollups, "refresh_rollups", counting_refresh)
+    second = Event.objects.create(
+        event_date=datetime.date(2022, 6, 8), series=race_night.series
+    )
+    EventClassStart.objects.create(
+        event=second, yacht_class="A", start=datetime.time(18, 0)
+    )
+    finishes = [
+        (race_night, "CAN 0", datetime.time(19, 20)),
+        (race_night, "CAN 1", datetime.time(19, 15)),
+        (race_night, "CAN 2", datetime.time(19, 10)),
+        (second, "CAN 0", datetime.time(19, 0)),
+        (second, "CAN 1", datetime.time(19, 30)),
+    ]
+    with django_capture_on_commit_callbacks(execute=True):
+        for event, sail_num, finish_time in finishes:
+            Result.objects.create(
+                event=event,
+                yacht=Yacht.objects.get(sail_num=sail_num),
+                finish_time=finish_time,
+            )
+    assert refreshed == [(2022, "A")]  # once for the transaction
+
+    stats = YachtSeasonStats.objects.get(yacht__sail_num="CAN 0")
+    assert (stats.year, stats.races, stats.wins) == (2022, 2, 1)
+    assert stats.avg_position == 2.0
+    records = {
+        record.rival.sail_num: (
+            record.races,
+            record.wins,
+            record.losses,
+        )
+        for record in HeadToHead.objects.filter(yacht__sail_num="CAN 0")
+    }
+    assert records == {"CAN 1": (2, 1, 1), "CAN 2": (1, 0, 1)}
+
+    stored = set(
+        HeadToHead.objects.values_list("yacht", "rival", "wins")
+    )
+    assert rebuild_rollups() == (3, 6)
+    assert (
+        set(HeadToHead.objects.values_list("yacht", "rival", "wins"))
+        == stored
+    )
+
+    url = reverse("racing:yacht-details", args=["finisher-0"])
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(url)
+    assert len(queries) == 4  # yacht, latest season, stats, records
+    assert response.context["year"] == 2022
+    assert b"Finisher 1" in response.content
+
+    # a class change refreshes the old class too
+    refreshed.clear()
+    yacht = Yacht.objects.get(sail_num="CAN 2")
+    with django_capture_on_commit_callbacks(execute=True):
+        yacht.yacht_class = "B"
+        yacht.save()
+    assert set(refreshed) == {(2022, "A"), (2022, "B")}
+    assert not HeadToHead.objects.filter(
+        yacht_class="A", rival__sail_num="CAN 2"
+    ).exists()
+    assert YachtSeasonStats.objects.get(yacht=yacht).yacht_class == "B"
+
+
+def rollup_rows():
+    return set(
+        YachtSeasonStats.objects.values_list(
+            "yacht", "races", "finishes", "wins", "total_position"
+        )
+    ), set(
+        HeadToHead.objects.values_list(
+            "yacht", "rival", "races", "wins"
+        )
+    )
+
+
+def test_rollups_update_only_the_scored_event(
+    race_night, django_capture_on_commit_callbacks
+):
+    second = Event.objects.create(
+        event_date=datetime.date(2022, 6, 8), series=race_night.series
+    )
+    EventClassStart.objects.create(
+        event=second, yacht_class="A", start=datetime.time(18, 0)
+    )
+    yachts = {y.sail_num: y for y in Yacht.objects.all()}
+    with django_capture_on_commit_callbacks(execute=True):
+        for i, sail_num in enumerate(["CAN 0", "CAN 1", "CAN 2"]):
+            Result.objects.create(
+                event=race_night,
+                yacht=yachts[sail_num],
+                finish_time=datetime.time(19, 10 + i),
+            )
+        Result.objects.create(
+            event=second,
+            yacht=yachts["CAN 0"],
+            finish_time=datetime.time(19, 30),
+        )
+    before = rollup_rows()
+    untouched = set(  # CAN 2 did not sail the second race
+        HeadToHead.objects.filter(rival__sail_num="CAN 2").values_list(
+            "pk", "races", "wins"
+        )
+    )
+
+    with django_capture_on_commit_callbacks(execute=True):
+        late = Result.objects.create(
+            event=second,
+            yacht=yachts["CAN 1"],
+            finish_time=datetime.time(19, 20),
+        )
+    records = dict(
+        HeadToHead.objects.filter(yacht__sail_num="CAN 1").values_list(
+            "rival__sail_num", "races"
+        )
+    )
+    assert records == {"CAN 0": 2, "CAN 2": 1}
+    assert (
+        set(
+            HeadToHead.objects.filter(
+                rival__sail_num="CAN 2"
+            ).values_list("pk", "races", "wins")
+        )
+        == untouched
+    )
+    updated = rollup_rows()
+    rebuild_rollups()
+    assert rollup_rows() == updated
+
+    with django_capture_on_commit_callbacks(execute=True):
+        late.delete()
+    assert rollup_rows() == before
+
+
+# ------------------- ASGI: live leaderboard ------------------- #
+
+
+def test_leaderboard_delta_only_changed_rows():
+    row = {"result": 1, "position": 1, "corrected_seconds": 4000}
+    other = {"result": 2, "position": 2, "corrected_seconds": 4100}
+
+    assert leaderboard_delta([row, other], [row, other]) is None
+    assert leaderboard_delta(
+        [row, other], [row, dict(other, position=1)]
+    ) == {"rows": [dict(other, position=1)], "removed": []}
+    assert leaderboard_delta([row, other], [row]) == {
+        "rows": [],
+        "removed": [2],
+    }
+
+
+def test_slow_subscriber_is_resynced():
+    @async_to_sync
+    async def run():
+        broker = InProcessBroker(queue_size=2)
+        subscription = broker.subscribe("leaderboard:1:A")
+        for i in range(3):
+            broker.publish("leaderboard:1:A", str(i))
+        await asyncio.sleep(0)
+        messages = [await subscription.get()]
+        subscription.close()
+        return messages, broker.subscriber_count()
+
+    assert run() == ([RESYNC], 0)
+
+
+async def stream(path, until):
+    """Runs live_application for path until a body chunk contains each of until, then disconnects"""
+    sent, disconnect = [], asyncio.Event()
+
+    async def receive():
+        await disconnect.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        sent.append(message)
+
+    async def body_contains(text):
+        while not any(text in m.get("body", b"") for m in sent):
+            await asyncio.sleep(0.01)
+
+    app = live_application(None)
+    task = asyncio.ensure_future(
+        app(
+            {"type": "http", "method": "GET", "path": path},
+            receive,
+            send,
+        )
+    )
+    for text, action in until:
+        await asyncio.wait_for(body_contains(text), 5)
+        if action is not None:
+            await sync_to_async(action)()
+    disconnect.set()
+    await asyncio.wait_for(task, 5)
+    return sent
+
+
+@pytest.mark.django_db
+def test_live_leaderboard_snapshot_then_delta(race_night, monkeypatch):
+    monkeypatch.setattr(
+        "sbyra_src.racing.live._broker", InProcessBroker()
+    )
+    cache.clear()
+    Result.objects.create(
+        event=race_night,
+        yacht=Yacht.objects.get(sail_num="CAN 0"),
+        finish_time=datetime.time(19, 10),
+    )
+    publish_leaderboard(race_night.pk, "A")  # already published
+
+    def finish():  # signals publish on commit; tests run in a transaction
+        Result.objects.create(
+            event=race_night,
+            yacht=Yacht.objects.get(sail_num="CAN 1"),
+            finish_time=datetime.time(19, 5),
+        )
+        publish_leaderboard(race_night.pk, "A")
+
+    sent = async_to_sync(stream)(
+        f"/racing/live/{race_night.pk}/A",
+        [(b"event: snapshot", finish), (b"event: delta", None)],
+    )
+
+    assert sent[0]["status"] == 200
+    assert (b"content-type", b"text/event-stream") in sent[0]["headers"]
+    snapshot, delta = [
+        json.loads(m["body"].split(b"data: ")[1])
+        for m in sent[1:]
+        if m["body"].startswith(b"event:")
+    ]
+    assert [row["sail_num"] for row in snapshot] == ["CAN 0"]
+    assert [row["sail_num"] for row in delta["rows"]] == [
+        "CAN 1",
+        "CAN 0",
+    ]  # new finisher first, CAN 0 dropped to second
+
+
+class SharedSnapshotBroker(InProcessBroker):
+    """Stands for one process of several sharing a snapshot store (RedisBroker)"""
+
+    def __init__(self, store):
+        super().__init__()
+        self.store = store
+
+    def swap_snapshot(self, channel, rows):
+        previous = self.store.get(channel, [])
+        self.store[channel] = rows
+        return previous
+
+
+@pytest.mark.django_db
+def test_live_snapshot_shared_by_publishers(race_night, monkeypatch):
+    Result.objects.create(
+        event=race_night,
+        yacht=Yacht.objects.get(sail_num="CAN 0"),
+        finish_time=datetime.time(19, 10),
+    )
+    store = {}
+    deltas = []
+    for _ in range(2):  # the same finish published by two workers
+        monkeypatch.setattr(
+            "sbyra_src.racing.live._broker", SharedSnapshotBroker(store)
+        )
+        deltas.append(publish_leaderboard(race_night.pk, "A"))
+    assert [row["sail_num"] for row in deltas[0]["rows"]] == ["CAN 0"]
+    assert deltas[1] is None  # the other worker already published it
+
+
+@pytest.mark.django_db
+def test_live_leaderboard_unknown_event():
+    @async_to_sync
+    async def run():
+        sent = []
+
+        async def send(message):
+            sent.append(message)
+
+        await live_application(None)(
+            {
+                "type": "http",
+                "method": "GET",
+                "path": "/racing/live/999/A",
+            },
+            None,
+            send,
+        )
+        return sent
+
+    assert run()[0]["status"] == 404
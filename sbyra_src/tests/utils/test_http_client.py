@@ -0,0 +1,89 @@
+import pytest
+import requests
+from sbyra_src.utils.http_client import (
+    CircuitBreaker,
+    CircuitOpenError,
+    OutboundClient,
+)
+
+"""
+Specifications:
+
+1. Test that the breaker opens after repeated failures and short-circuits further calls
+2. Test that a half-open breaker lets one trial call through and closes again on success
+3. Test that every call is sent with the configured connect/read timeouts
+4. Test that latency and breaker state are reported by stats()
+
+"""
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeResponse:
+    def __init__(self, status_code=200):
+        self.status_code = status_code
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(self.status_code)
+
+
+def test_breaker_opens_and_short_circuits(monkeypatch):
+    client = OutboundClient("test", failure_threshold=2)
+    calls = []
+
+    def failing_get(url, **kwargs):
+        calls.append(url)
+        raise requests.ConnectionError("down")
+
+    monkeypatch.setattr(client.session, "get", failing_get)
+
+    for i in range(2):
+        with pytest.raises(requests.ConnectionError):
+            client.get("http://upstream")
+    with pytest.raises(CircuitOpenError):
+        client.get("http://upstream")
+
+    assert len(calls) == 2
+    assert client.stats()["state"] == CircuitBreaker.OPEN
+    assert client.stats()["short_circuits"] == 1
+
+
+def test_breaker_half_open_trial_call_closes():
+    clock = FakeClock()
+    breaker = CircuitBreaker(
+        failure_threshold=1, reset_timeout=30, clock=clock
+    )
+    breaker.record_failure()
+    assert not breaker.allow()
+
+    clock.now = 31
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow()
+    assert not breaker.allow()  # only one trial call at a time
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_client_uses_timeouts_and_reports_latency(monkeypatch):
+    client = OutboundClient("test", connect_timeout=1, read_timeout=2)
+    seen = {}
+
+    def get(url, **kwargs):
+        seen.update(kwargs)
+        return FakeResponse()
+
+    monkeypatch.setattr(client.session, "get", get)
+    client.get("http://upstream", params={"q": "Shediac"})
+
+    stats = client.stats()
+    assert seen["timeout"] == (1, 2)
+    assert stats["calls"] == 1
+    assert stats["avg_latency"] is not None
+    assert stats["state"] == CircuitBreaker.CLOSED
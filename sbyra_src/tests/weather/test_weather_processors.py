@@ -0,0 +1,286 @@
+import datetime
+
+import pytest
+from django.urls import reverse
+from django.utils import timezone
+from sbyra_src.racing.models import (
+    Event,
+    EventClassStart,
+    Result,
+    Series,
+    Yacht,
+)
+from sbyra_src.weather.conditions import (
+    mean_direction,
+    record_event_conditions,
+)
+from sbyra_src.weather.models import WeatherObservation
+from sbyra_src.weather.poller import poll_once
+from sbyra_src.weather.processors import (
+    UNKNOWN_WEATHER,
+    latest_weather,
+    weather_api,
+)
+from sbyra_src.weather.providers import CachedWeatherProvider
+
+"""
+Specifications:
+
+1. Test that a cold provider loads once (miss) and then serves the cached payload (hits)
+2. Test that a stale payload is served right away while a single background refresh runs
+3. Test that a failing loader keeps the last good payload, and that a cold failing or empty load is only retried
+   after error_ttl
+4. Test that the context processor falls back to unknown values when nothing could be loaded
+5. Test that the poller normalizes api responses into WeatherObservation rows (stubbed client, no network)
+6. Test that pages render the latest observation without any http call
+7. Test that pages which never use {{ weather }} make zero upstream loads
+8. Test that event conditions only keep observations between first flag and last finish, downsampled
+
+"""
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class CountingLoader:
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return {"temperature": self.calls}
+
+
+def test_provider_hits_after_first_load():
+    loader = CountingLoader()
+    provider = CachedWeatherProvider(loader, ttl=60, clock=FakeClock())
+
+    for i in range(5):
+        assert provider.get() == {"temperature": 1}
+
+    assert loader.calls == 1
+    assert provider.stats["misses"] == 1
+    assert provider.stats["hits"] == 4
+    assert provider.stats["refreshes"] == 1
+
+
+def test_provider_serves_stale_and_refreshes_in_background():
+    loader = CountingLoader()
+    clock = FakeClock()
+    provider = CachedWeatherProvider(loader, ttl=60, clock=clock)
+    provider.get()
+
+    clock.now = 61
+    assert provider.get() == {
+        "temperature": 1
+    }  # stale value, no blocking
+    provider.wait()
+    assert provider.get() == {"temperature": 2}
+    assert loader.calls == 2
+    assert provider.stats["refreshes"] == 2
+
+
+def test_provider_keeps_last_good_payload_on_error():
+    clock = FakeClock()
+    payloads = [{"temperature": 20}]
+
+    def loader():
+        if not payloads:
+            raise ConnectionError("upstream down")
+        return payloads.pop()
+
+    provider = CachedWeatherProvider(loader, ttl=60, clock=clock)
+    provider.get()
+    clock.now = 120
+    provider.get()
+    provider.wait()
+
+    assert provider.get() == {"temperature": 20}
+    assert provider.stats["errors"] == 1
+
+
+@pytest.mark.parametrize("fails", [True, False])
+def test_provider_remembers_cold_failures(fails):
+    clock = FakeClock()
+    calls = []
+
+    def loader():  # upstream down, or no observation recorded yet
+        calls.append(clock.now)
+        if fails:
+            raise ConnectionError("upstream down")
+        return None
+
+    provider = CachedWeatherProvider(
+        loader, ttl=60, error_ttl=10, clock=clock
+    )
+    for now in [0, 1, 9, 10, 15]:
+        clock.now = now
+        assert provider.get() is None
+
+    assert calls == [0, 10]  # once per error_ttl, not per request
+    assert provider.stats["errors"] == (2 if fails else 0)
+
+
+def test_weather_api_unknown_fallback(monkeypatch):
+    def loader():
+        raise ConnectionError("upstream down")
+
+    provider = CachedWeatherProvider(loader, ttl=60)
+    monkeypatch.setattr(
+        "sbyra_src.weather.processors.weather_provider", provider
+    )
+    assert weather_api(None) == {"weather": UNKNOWN_WEATHER}
+
+
+# ------------------- POLLER: WeatherObservation ------------------- #
+
+API_RESPONSE = {
+    "main": {"temp": 21.5},
+    "weather": [{"description": "clear sky", "icon": "01d"}],
+    "wind": {"speed": 5, "deg": 225, "gust": 8},
+}
+
+
+@pytest.mark.django_db
+def test_poll_once_records_normalized_observation():
+    """Test that the poller stores wind values in knots using a stubbed api client"""
+    observation = poll_once(fetch=lambda: API_RESPONSE)
+
+    assert WeatherObservation.objects.count() == 1
+    assert observation.temperature == 21.5
+    assert observation.wind_speed == 9.72
+    assert observation.wind_direction == 225
+    assert observation.wind_gust == 15.55
+
+
+@pytest.mark.django_db
+def test_poll_once_failure_records_nothing():
+    def fetch():
+        raise ConnectionError("upstream down")
+
+    assert poll_once(fetch=fetch) is None
+    assert WeatherObservation.objects.count() == 0
+
+
+@pytest.mark.django_db
+def test_home_page_renders_latest_observation_without_network(
+    client, monkeypatch
+):
+    """Test that rendering reads the latest observation and never calls the weather api"""
+
+    def no_network(*args, **kwargs):
+        raise AssertionError("template render made an http call")
+
+    monkeypatch.setattr("requests.Session.get", no_network)
+    monkeypatch.setattr(
+        "sbyra_src.weather.processors.weather_provider",
+        CachedWeatherProvider(latest_weather, ttl=60),
+    )
+    poll_once(fetch=lambda: API_RESPONSE)
+
+    response = client.get("/")
+
+    assert response.status_code == 200
+    assert b"Wind Speed: 9.72" in response.content
+
+
+# ------------------- PROCESSOR: lazy context ------------------- #
+
+
+@pytest.mark.django_db
+def test_page_without_weather_makes_no_upstream_call(
+    client, monkeypatch
+):
+    """Test that list_yachts (no {{ weather }} in template) never loads weather"""
+    loader = CountingLoader()
+    provider = CachedWeatherProvider(loader, ttl=60)
+    monkeypatch.setattr(
+        "sbyra_src.weather.processors.weather_provider", provider
+    )
+
+    response = client.get(reverse("racing:list-yachts"))
+
+    assert response.status_code == 200
+    assert loader.calls == 0
+    assert provider.stats["hits"] + provider.stats["misses"] == 0
+
+
+@pytest.mark.django_db
+def test_page_with_weather_loads_once_per_request(client, monkeypatch):
+    loader = CountingLoader()
+    provider = CachedWeatherProvider(loader, ttl=60)
+    monkeypatch.setattr(
+        "sbyra_src.weather.processors.weather_provider", provider
+    )
+
+    client.get("/")
+
+    assert provider.stats["hits"] + provider.stats["misses"] == 1
+
+
+# ------------------- CONDITIONS: EventConditions ------------------- #
+
+
+@pytest.mark.django_db
+def test_record_event_conditions_downsamples_window():
+    series = Series.objects.create(name="Wednesday", year=2022)
+    event = Event.objects.create(
+        event_date=datetime.date(2022, 6, 8), series=series
+    )
+    EventClassStart.objects.create(
+        event=event,
+        yacht_class="A",
+        first_flag=datetime.time(18, 0),
+        start=datetime.time(18, 5),
+    )
+    yacht = Yacht.objects.create(
+        yacht_name="Yacht1", yacht_class="A", phrf_rating=150
+    )
+    Result.objects.create(
+        event=event,
+        yacht=yacht,
+        completed_status="DNC",
+        finish_time=datetime.time(19, 30),
+    )
+
+    readings = [
+        ("17:50", 30, 90, 35),  # before first flag
+        ("18:00", 10, 350, 12),
+        ("18:05", 12, 10, 16),
+        ("18:12", 14, 20, 15),
+        ("19:30", 8, 40, 9),
+        ("19:40", 30, 90, 35),  # after last finish
+    ]
+    for clock, speed, direction, gust in readings:
+        hour, minute = map(int, clock.split(":"))
+        WeatherObservation.objects.create(
+            observed_at=timezone.make_aware(
+                datetime.datetime(2022, 6, 8, hour, minute)
+            ),
+            city="Shediac",
+            wind_speed=speed,
+            wind_direction=direction,
+            wind_gust=gust,
+        )
+
+    conditions = record_event_conditions(event, interval=10)
+
+    assert event.conditions == conditions
+    assert conditions.samples == [
+        [0, 11.0, 0, 16],
+        [10, 14.0, 20, 15],
+        [90, 8.0, 40, 9],
+    ]
+    assert conditions.wind_mean == 11.0
+    assert conditions.wind_max == 14
+    assert conditions.gust_max == 16
+    assert conditions.dominant_direction == "N"
+
+
+def test_mean_direction_wraps_north():
+    assert mean_direction([350, 10]) == 0
@@ -0,0 +1,64 @@
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIHandler
+
+"""
+ASGI handler for sbyra_src.asgi.
+
+Django 4.0 iterates streaming responses on the event loop, so a StreamingHttpResponse whose iterator reads the
+database (racing.exports) raises SynchronousOnlyOperation under ASGI. StreamingASGIHandler pulls the parts in a
+worker thread instead, a batch at a time, and sends them from the event loop (Django 4.2 behaves the same way).
+Non streaming responses are sent by Django unchanged.
+
+"""
+
+
+class StreamingASGIHandler(ASGIHandler):
+    """ASGIHandler that iterates streaming responses outside the event loop"""
+
+    parts_per_thread_hop = 256
+
+    async def send_response(self, response, send):
+        if not response.streaming:
+            return await super().send_response(response, send)
+
+        response_headers = [  # ResponseHeaders stores str
+            (header.encode("ascii"), value.encode("latin1"))
+            for header, value in response.items()
+        ]
+        for cookie in response.cookies.values():
+            response_headers.append(
+                (
+                    b"Set-Cookie",
+                    cookie.output(header="").encode("ascii").strip(),
+                )
+            )
+        await send(
+            {
+                "type": "http.response.start",
+                "status": response.status_code,
+                "headers": response_headers,
+            }
+        )
+
+        parts = iter(response)
+        next_parts = sync_to_async(
+            lambda: list(islice(parts, self.parts_per_thread_hop)),
+            thread_sensitive=True,
+        )
+        while True:
+            batch = await next_parts()
+            if not batch:
+                break
+            body = b"".join(batch)
+            for chunk, last in self.chunk_bytes(body):
+                await send(
+                    {
+                        "type": "http.response.body",
+                        "body": chunk,
+                        "more_body": True,
+                    }
+                )
+        await send({"type": "http.response.body"})
+        await sync_to_async(response.close, thread_sensitive=True)()
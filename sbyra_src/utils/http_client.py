@@ -0,0 +1,166 @@
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+"""
+Shared outbound HTTP client for all external integrations (weather api first).
+
+- One keep-alive requests.Session per named client: connections are pooled and reused instead of paying a new
+  TCP/TLS handshake on every call.
+- Every call is time bounded (connect, read) and idempotent GETs are retried a bounded number of times.
+- A circuit breaker opens after repeated failures. While open, calls fail immediately with CircuitOpenError so the
+  caller can fall back to cached or "unknown" values instead of tying up a worker on a hung upstream.
+- Breaker state and latency are available from client.stats()
+
+Usage:
+    client = get_client("openweathermap")
+    response = client.get(url, params=payload)
+
+"""
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an upstream while its circuit breaker is open"""
+
+
+class CircuitBreaker:
+    """Opens after failure_threshold consecutive failures and lets one trial call through after reset_timeout"""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half-open"
+
+    def __init__(
+        self,
+        failure_threshold=5,
+        reset_timeout=30,
+        clock=time.monotonic,
+    ):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.failures = 0
+        self.opened_at = None
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return self.CLOSED
+        if self.clock() - self.opened_at >= self.reset_timeout:
+            return self.HALF_OPEN
+        return self.OPEN
+
+    def allow(self):
+        """Returns True if a call may go through. Half-open lets a single trial call through"""
+        with self._lock:
+            state = self.state
+            if state == self.HALF_OPEN:
+                # block other callers until the trial call reports back
+                self.opened_at = self.clock()
+                return True
+            return state == self.CLOSED
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.failures >= self.failure_threshold:
+                self.opened_at = self.clock()
+
+
+class OutboundClient:
+    """Pooled, time bounded HTTP client guarded by a circuit breaker"""
+
+    def __init__(
+        self,
+        name,
+        connect_timeout=3.05,
+        read_timeout=10,
+        retries=2,
+        backoff_factor=0.3,
+        pool_size=10,
+        failure_threshold=5,
+        reset_timeout=30,
+    ):
+        self.name = name
+        self.timeout = (connect_timeout, read_timeout)
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=pool_size,
+            pool_maxsize=pool_size,
+            max_retries=Retry(
+                total=retries,
+                backoff_factor=backoff_factor,
+                status_forcelist=(502, 503, 504),
+                allowed_methods=("GET",),
+            ),
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.metrics = {
+            "calls": 0,
+            "failures": 0,
+            "short_circuits": 0,
+            "last_latency": None,
+            "total_latency": 0.0,
+        }
+        self._lock = threading.Lock()
+
+    def get(self, url, **kwargs):
+        """GET url and return the response. Raises CircuitOpenError or requests.RequestException on failure"""
+        if not self.breaker.allow():
+            with self._lock:
+                self.metrics["short_circuits"] += 1
+            raise CircuitOpenError(f"{self.name} circuit is open")
+
+        kwargs.setdefault("timeout", self.timeout)
+        start = time.monotonic()
+        try:
+            response = self.session.get(url, **kwargs)
+            response.raise_for_status()
+        except requests.RequestException:
+            self.breaker.record_failure()
+            with self._lock:
+                self.metrics["failures"] += 1
+            raise
+        else:
+            self.breaker.record_success()
+            return response
+        finally:
+            latency = time.monotonic() - start
+            with self._lock:
+                self.metrics["calls"] += 1
+                self.metrics["last_latency"] = latency
+                self.metrics["total_latency"] += latency
+
+    def stats(self):
+        """Returns a copy of the call metrics with breaker state and average latency (seconds)"""
+        with self._lock:
+            stats = dict(self.metrics)
+        total_latency = stats.pop("total_latency")
+        calls = stats["calls"]
+        stats["avg_latency"] = total_latency / calls if calls else None
+        stats["state"] = self.breaker.state
+        stats["consecutive_failures"] = self.breaker.failures
+        return stats
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_client(name, **options):
+    """Returns the process wide client registered under name, creating it with options on first use"""
+    with _clients_lock:
+        if name not in _clients:
+            _clients[name] = OutboundClient(name, **options)
+        return _clients[name]
@@ -0,0 +1,80 @@
+import hashlib
+
+"""
+Keyset (seek) pagination and conditional GET validators for listings.
+
+Offset pagination (LIMIT n OFFSET k) reads and discards k rows, so deep pages get slower as the table grows. A
+keyset page seeks from the last key of the previous page instead (WHERE key > last ORDER BY key LIMIT n + 1), which
+an index on the key answers in O(page size) at any depth. The key must be unique and match the index (for Yacht:
+yacht_name, unique and Meta.ordering).
+
+1. KeysetPage: one page after (or before) a key value, with has_next / has_previous from the extra row
+2. page_validators(): ETag and Last-Modified of a page from its rows' (and their related rows') pk and updated
+   timestamp, for django.utils.cache.get_conditional_response
+
+"""
+
+
+class KeysetPage:
+    """Page of queryset ordered by a unique key: rows after `after`, or before `before`, at most size rows"""
+
+    def __init__(self, queryset, key, size, after=None, before=None):
+        self.key = key
+        if before:
+            rows = list(
+                queryset.filter(**{f"{key}__lt": before}).order_by(
+                    f"-{key}"
+                )[: size + 1]
+            )
+            self.has_previous = len(rows) > size
+            self.has_next = True
+            self.object_list = rows[:size][::-1]
+        else:
+            if after:
+                queryset = queryset.filter(**{f"{key}__gt": after})
+            rows = list(queryset.order_by(key)[: size + 1])
+            self.has_previous = bool(after)
+            self.has_next = len(rows) > size
+            self.object_list = rows[:size]
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    @property
+    def next_key(self):
+        """?after= value of the next page"""
+        if self.has_next and self.object_list:
+            return getattr(self.object_list[-1], self.key)
+
+    @property
+    def previous_key(self):
+        """?before= value of the previous page"""
+        if self.has_previous and self.object_list:
+            return getattr(self.object_list[0], self.key)
+
+
+def page_validators(rows, *extra, related=()):
+    """
+    (ETag, Last-Modified) of rows with pk and updated (RacingCommon). The ETag covers which rows are listed, not
+    only the latest change, so rows moving in or out of the page change it too. related names the foreign keys the
+    page also renders (loaded with select_related): their rows are covered the same way. extra (filters, for
+    instance) is hashed in as well.
+
+    """
+    digest = hashlib.md5(usedforsecurity=False)
+    for value in extra:
+        digest.update(f"{value}|".encode())
+    stamps = []
+    for row in rows:
+        for obj in [row, *(getattr(row, name) for name in related)]:
+            updated = getattr(obj, "updated", None)
+            if updated is not None:
+                stamps.append(updated)
+            pk = "" if obj is None else obj.pk
+            digest.update(
+                f"{pk}:{updated and updated.isoformat()}|".encode()
+            )
+    return f'"{digest.hexdigest()}"', max(stamps, default=None)
@@ -1,5 +1,11 @@
 import datetime
 
+from django.db.models.functions import (
+    ExtractHour,
+    ExtractMinute,
+    ExtractSecond,
+)
+
 """ Utility functions to convert and manipulate datetime.time objects"""
 
 
@@ -18,3 +24,19 @@ def convert_to_time_object(seconds):
     min, sec = divmod(seconds, 60)
     hour, min = divmod(min, 60)
     return datetime.time(hour, min, sec)
+
+
+def convert_to_posted_time(seconds):
+    """Converts seconds to a datetime.time object for display. None if seconds is None or 24 hours or more"""
+    if seconds is None or not 0 <= seconds < 24 * 3600:
+        return None
+    return convert_to_time_object(seconds)
+
+
+def seconds_expression(field):
+    """ORM expression converting a TimeField (name or expression) to seconds, like convert_to_seconds()"""
+    return (
+        ExtractHour(field) * 3600
+        + ExtractMinute(field) * 60
+        + ExtractSecond(field)
+    )
@@ -1,3 +1,5 @@
 from django.contrib import admin
+from sbyra_src.weather import models
 
-# Register your models here.
+admin.site.register(models.WeatherObservation)
+admin.site.register(models.EventConditions)
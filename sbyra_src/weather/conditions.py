@@ -0,0 +1,130 @@
+import datetime
+import math
+from collections import Counter
+from statistics import fmean
+
+from django.db.models import Max
+from django.utils import timezone
+
+from sbyra_src.weather.models import EventConditions, WeatherObservation
+
+"""
+Per-event wind conditions built from recorded WeatherObservation rows.
+
+record_event_conditions(event) reads the observations between the event's first flag and its last finish with one
+indexed range query, downsamples them into fixed minute buckets and stores the samples together with precomputed
+aggregates (mean/max wind, max gust, dominant direction) in EventConditions. Storage per event stays bounded by
+the race length / bucket size no matter how often the poller runs.
+
+"""
+
+COMPASS_POINTS = ["N", "NE", "E", "SE", "S", "SW", "W", "NW"]
+
+
+def compass_point(degrees):
+    """Converts degrees into one of 8 compass points"""
+    return COMPASS_POINTS[int((degrees % 360) / 45 + 0.5) % 8]
+
+
+def mean_direction(directions):
+    """Circular mean of wind directions in degrees (350 and 10 average to 0, not 180)"""
+    if not directions:
+        return None
+    sin = sum(math.sin(math.radians(d)) for d in directions)
+    cos = sum(math.cos(math.radians(d)) for d in directions)
+    return round(math.degrees(math.atan2(sin, cos))) % 360
+
+
+def event_window(event):
+    """Returns (first flag, last finish) as aware datetimes, or None if the event has not been sailed"""
+    class_starts = list(
+        event.class_starts.values_list("first_flag", "start")
+    )
+    flags = [flag for flag, start in class_starts if flag is not None]
+    if not flags:  # no flags recorded, fall back to class starts
+        flags = [
+            start for flag, start in class_starts if start is not None
+        ]
+    last_finish = event.result_set.aggregate(Max("finish_time"))[
+        "finish_time__max"
+    ]
+    if not flags or last_finish is None:
+        return None
+
+    def aware(time_obj):
+        return timezone.make_aware(
+            datetime.datetime.combine(event.event_date, time_obj)
+        )
+
+    return aware(min(flags)), aware(last_finish)
+
+
+def downsample(observations, start, interval):
+    """
+    Buckets (observed_at, wind_speed, wind_direction, wind_gust) rows into interval minute samples:
+    [minutes after start, mean wind, mean direction, max gust]
+
+    """
+    buckets = {}
+    for observed_at, speed, direction, gust in observations:
+        index = int(
+            (observed_at - start).total_seconds() // (interval * 60)
+        )
+        buckets.setdefault(index, []).append((speed, direction, gust))
+
+    samples = []
+    for index in sorted(buckets):
+        rows = buckets[index]
+        speeds = [r[0] for r in rows if r[0] is not None]
+        gusts = [r[2] for r in rows if r[2] is not None]
+        samples.append(
+            [
+                index * interval,
+                round(fmean(speeds), 2) if speeds else None,
+                mean_direction(
+                    [r[1] for r in rows if r[1] is not None]
+                ),
+                max(gusts) if gusts else None,
+            ]
+        )
+    return samples
+
+
+def record_event_conditions(event, interval=10):
+    """Stores downsampled samples and aggregates for event. Returns the EventConditions or None if no window"""
+    window = event_window(event)
+    if window is None:
+        return None
+    start, end = window
+
+    observations = list(
+        WeatherObservation.objects.filter(
+            observed_at__range=(start, end)
+        )
+        .order_by("observed_at")
+        .values_list(
+            "observed_at", "wind_speed", "wind_direction", "wind_gust"
+        )
+    )
+    speeds = [o[1] for o in observations if o[1] is not None]
+    gusts = [o[3] for o in observations if o[3] is not None]
+    points = Counter(
+        compass_point(o[2]) for o in observations if o[2] is not None
+    )
+
+    conditions, created = EventConditions.objects.update_or_create(
+        event=event,
+        defaults={
+            "observed_from": start,
+            "observed_to": end,
+            "sample_interval": interval,
+            "samples": downsample(observations, start, interval),
+            "wind_mean": round(fmean(speeds), 2) if speeds else None,
+            "wind_max": max(speeds) if speeds else None,
+            "gust_max": max(gusts) if gusts else None,
+            "dominant_direction": (
+                points.most_common(1)[0][0] if points else ""
+            ),
+        },
+    )
+    return conditions
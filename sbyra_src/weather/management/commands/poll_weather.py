@@ -0,0 +1,31 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from sbyra_src.utils.http_client import get_client
+from sbyra_src.weather.poller import poll_once
+
+
+class Command(BaseCommand):
+    help = "Polls the weather api and records a WeatherObservation (once, or every --interval seconds)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--interval",
+            type=int,
+            default=0,
+            help="seconds between polls, 0 polls once and exits",
+        )
+
+    def handle(self, *args, **options):
+        interval = options["interval"]
+        while True:
+            observation = poll_once()
+            if observation is None:
+                stats = get_client("openweathermap").stats()
+                self.stderr.write(f"weather poll failed: {stats}")
+            else:
+                self.stdout.write(f"recorded {observation}")
+            if not interval:
+                break
+            time.sleep(interval)
@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from sbyra_src.racing.models import Event
+from sbyra_src.weather.conditions import record_event_conditions
+
+
+class Command(BaseCommand):
+    help = "Records downsampled wind conditions for events (default: today's events)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "event_ids", nargs="*", type=int, help="event primary keys"
+        )
+        parser.add_argument(
+            "--interval",
+            type=int,
+            default=10,
+            help="minutes per stored sample",
+        )
+
+    def handle(self, *args, **options):
+        if options["event_ids"]:
+            events = Event.objects.filter(pk__in=options["event_ids"])
+        else:
+            events = Event.objects.filter(
+                event_date=timezone.localdate()
+            )
+
+        for event in events:
+            conditions = record_event_conditions(
+                event, interval=options["interval"]
+            )
+            if conditions is None:
+                self.stderr.write(
+                    f"{event}: no flag or finish recorded"
+                )
+            else:
+                self.stdout.write(f"recorded {conditions}")
@@ -0,0 +1,114 @@
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+
+"""
+Weather observations recorded by the poll_weather management command. Templates never call the weather api
+directly: the context processor reads the latest observation (one indexed query) through a cached provider.
+
+- All wind values are stored in knots, temperature in Celcius and direction in degrees.
+- Values the api did not return are stored as null and displayed as "unknown".
+
+"""
+
+
+class WeatherObservation(models.Model):
+    """Normalized weather observation polled from openweathermap.org"""
+
+    observed_at = models.DateTimeField(
+        help_text=_("time the observation was recorded")
+    )
+    city = models.CharField(
+        max_length=100, help_text=_("city the observation applies to")
+    )
+    temperature = models.FloatField(
+        blank=True, null=True, help_text=_("degrees Celcius")
+    )
+    description = models.CharField(
+        max_length=100, blank=True, help_text=_("example: light rain")
+    )
+    icon = models.CharField(
+        max_length=10,
+        blank=True,
+        help_text=_("openweathermap icon code"),
+    )
+    wind_speed = models.FloatField(
+        blank=True, null=True, help_text=_("knots")
+    )
+    wind_direction = models.IntegerField(
+        blank=True, null=True, help_text=_("degrees")
+    )
+    wind_gust = models.FloatField(
+        blank=True, null=True, help_text=_("knots")
+    )
+
+    class Meta:
+        ordering = ["-observed_at"]
+        get_latest_by = "observed_at"
+        indexes = [
+            models.Index(
+                fields=["observed_at"], name="weather_observed_at_idx"
+            ),
+        ]
+        verbose_name_plural = "weather observations"
+
+    def __str__(self):
+        return f"{self.city} {self.observed_at}"
+
+    def as_context(self):
+        """Returns the template weather dictionary. Missing values are displayed as 'unknown'"""
+
+        def display(value):
+            return "unknown" if value is None else value
+
+        return {
+            "city": self.city,
+            "temperature": display(self.temperature),
+            "description": self.description or "unknown",
+            "icon": self.icon,
+            "wind_speed": display(self.wind_speed),
+            "wind_direction": display(self.wind_direction),
+            "wind_gust": display(self.wind_gust),
+        }
+
+
+class EventConditions(models.Model):
+    """
+    Wind conditions observed during an event (first flag to last finish). Samples are downsampled on ingest
+    into sample_interval minute buckets; aggregates are precomputed so series pages read them with one query
+    (Event.objects.select_related("conditions")).
+
+    samples format: [[minutes after observed_from, mean wind kt, direction deg, max gust kt], ...]
+
+    """
+
+    event = models.OneToOneField(
+        "racing.Event",
+        related_name="conditions",  # Event.conditions
+        on_delete=models.CASCADE,
+    )
+    observed_from = models.DateTimeField(help_text=_("first flag"))
+    observed_to = models.DateTimeField(help_text=_("last finish"))
+    sample_interval = models.PositiveSmallIntegerField(
+        default=10, help_text=_("minutes per sample")
+    )
+    samples = models.JSONField(
+        default=list, help_text=_("downsampled wind samples")
+    )
+    wind_mean = models.FloatField(
+        blank=True, null=True, help_text=_("knots")
+    )
+    wind_max = models.FloatField(
+        blank=True, null=True, help_text=_("knots")
+    )
+    gust_max = models.FloatField(
+        blank=True, null=True, help_text=_("knots")
+    )
+    dominant_direction = models.CharField(
+        max_length=3, blank=True, help_text=_("example: SW")
+    )
+
+    class Meta:
+        verbose_name_plural = "event conditions"
+
+    def __str__(self):
+        return f"{self.event}: {self.wind_mean} kt {self.dominant_direction}"
@@ -0,0 +1,37 @@
+import logging
+
+from django.utils import timezone
+
+from sbyra_src.utils.http_client import CircuitOpenError
+from sbyra_src.weather.models import WeatherObservation
+from sbyra_src.weather.processors import (
+    normalize_weather,
+    request_weather,
+)
+
+logger = logging.getLogger(__name__)
+
+"""
+Background weather polling. poll_once() is run on a schedule by the poll_weather management command (cron, celery beat
+or the command's own --interval loop) and stores one normalized WeatherObservation per successful poll.
+
+When the api fails or its circuit breaker is open nothing is recorded: templates keep serving the last observation
+(or "unknown" values when none exists).
+
+"""
+
+
+def poll_once(fetch=request_weather):
+    """Fetches the current weather and records it. Returns the new observation or None if the poll failed"""
+    try:
+        observation = normalize_weather(fetch())
+    except CircuitOpenError:
+        logger.warning("weather poll skipped: circuit open")
+        return None
+    except Exception:
+        logger.exception("weather poll failed")
+        return None
+
+    return WeatherObservation.objects.create(
+        observed_at=timezone.now(), **observation
+    )
@@ -1,76 +1,128 @@
 import environ
-import requests
-from django.contrib.sites.shortcuts import get_current_site
+from django.conf import settings
+from django.utils.functional import SimpleLazyObject
+
+from sbyra_src.utils.http_client import get_client
+from sbyra_src.weather.models import WeatherObservation
+from sbyra_src.weather.providers import CachedWeatherProvider
 
 env = environ.Env()
 environ.Env.read_env()
 
+CITY = "Shediac"
 
-def weather_api(request):
+WEATHER_URL = "http://api.openweathermap.org/data/2.5/weather"
 
-    """
-    API call to openweathermap.org and returns a context dictionary
+# conversion factor for meters/sec to knots
+MS_TO_KNOTS = float(1.9438444924)
 
-    Values returned in Metric (temp = Celcius, Wind speeds = meters/sec)
-    API does not always return key values. Functions check for keys:values to prevent errors and convert wind speed and wind gusts from meters/second to knots (kt, kn). Values rounded to 2 decimal places.
+# returned when no weather payload could be loaded yet
+UNKNOWN_WEATHER = {
+    "city": CITY,
+    "temperature": "unknown",
+    "description": "unknown",
+    "icon": "",
+    "wind_speed": "unknown",
+    "wind_direction": "unknown",
+    "wind_gust": "unknown",
+}
 
-    """
 
-    # request parameters (using params from the Request library instead of f formating the url string)
-    city = "Shediac"
-    units = "metric"
-    api_key = env("WEATHER_API")
-    payload = {
-        "q": city,
-        "units": units,
-        "appid": api_key,
+def weather_params():
+    """request parameters (using params from the Request library instead of f formating the url string)"""
+    return {
+        "q": CITY,
+        "units": "metric",
+        "appid": env("WEATHER_API"),
     }
-    r = requests.get(
-        "http://api.openweathermap.org/data/2.5/weather", params=payload
-    ).json()
 
-    # conversion factor for meters/sec to knots
-    conversion = float(1.9438444924)
 
-    def wind_speed():
-        """verifies that api returns a key:value and converts wind value from m/s to knots"""
-        key = "speed"
-        wind_speed = "unknown"
+def request_weather():
+    """
+    API call to openweathermap.org returning the raw json response. Called by the poller only, never by templates.
+    Goes through the shared outbound client: pooled connection, bounded timeouts/retries and a circuit breaker.
 
-        if key in r["wind"]:
-            wind_speed = float(r["wind"][key]) * conversion
-            return round(wind_speed, 2)
-        else:
-            return wind_speed
+    """
 
-    def wind_direction():
-        """verifies that api returns a value, and provides the verbose direction from degrees"""
-        key = "deg"
-        wind_direction = "unknown"
+    client = get_client("openweathermap")
+    return client.get(WEATHER_URL, params=weather_params()).json()
+
+
+def normalize_weather(r):
+    """
+    Normalizes an openweathermap.org response into WeatherObservation field values.
+
+    Values returned in Metric (temp = Celcius, Wind speeds = meters/sec)
+    API does not always return key values. Functions check for keys:values to prevent errors and convert wind speed and wind gusts from meters/second to knots (kt, kn). Values rounded to 2 decimal places.
+
+    """
 
-        if key in r["wind"]:
-            wind_direction = r["wind"][key]
-        return wind_direction
+    wind = r.get("wind", {})
 
-    def wind_gust():
-        """verifies that api returns a value and converts value from m/s to knots"""
-        key = "gust"
-        wind_gust = "unknown"
+    def knots(key):
+        """verifies that api returns a key:value and converts wind value from m/s to knots"""
+        if key in wind:
+            return round(float(wind[key]) * MS_TO_KNOTS, 2)
+        return None
 
-        if key in r["wind"]:
-            wind_gust = r["wind"]["gust"]
-        return wind_gust
+    def wind_direction():
+        """verifies that api returns a value for wind direction in degrees"""
+        if "deg" in wind:
+            return int(wind["deg"])
+        return None
 
-    weather = {
-        "city": city,
+    return {
+        "city": CITY,
         "temperature": r["main"]["temp"],
         "description": r["weather"][0]["description"],
         "icon": r["weather"][0]["icon"],
-        "wind_speed": wind_speed(),
+        "wind_speed": knots("speed"),
         "wind_direction": wind_direction(),
-        "wind_gust": wind_gust(),
+        "wind_gust": knots("gust"),
     }
 
+
+def latest_weather():
+    """Provider loader: latest recorded observation as a template dictionary (one indexed query)"""
+    try:
+        observation = WeatherObservation.objects.latest()
+    except WeatherObservation.DoesNotExist:
+        return None
+    return observation.as_context()
+
+
+# one provider per process: at most one observation read per WEATHER_CACHE_TTL seconds (WEATHER_ERROR_TTL while
+# nothing could be loaded)
+weather_provider = CachedWeatherProvider(
+    latest_weather,
+    ttl=settings.WEATHER_CACHE_TTL,
+    error_ttl=settings.WEATHER_ERROR_TTL,
+)
+
+
+def weather_api(request):
+    """
+    Context processor returning a lazy weather dictionary. Nothing is loaded until a template actually reads
+    {{ weather }}; the loaded value is memoized on the request so several renders share one load.
+
+    Stale payloads are served immediately while weather_provider refreshes them in the background.
+    Hit/miss/refresh counters: weather_provider.stats. Observations are recorded by the poll_weather
+    management command (see weather.poller).
+
+    """
+
+    def load():
+        weather = weather_provider.get()
+        if weather is None:
+            weather = UNKNOWN_WEATHER
+        return weather
+
+    if request is None:
+        return {"weather": SimpleLazyObject(load)}
+
+    if not hasattr(request, "_weather"):
+        request._weather = SimpleLazyObject(load)
+
     return {
-        "weather": weather,
+        "weather": request._weather,
     }
@@ -0,0 +1,123 @@
+import threading
+import time
+
+"""
+Process level weather providers. A provider wraps a loader function (the call that actually fetches weather data)
+and caches its payload so the context processor does not pay for an upstream call on every template render.
+
+Stale-while-revalidate:
+
+- first call (cold cache) blocks on the loader and is counted as a miss
+- calls within the TTL return the cached payload and are counted as hits
+- calls after the TTL return the stale payload right away and start a single background refresh
+
+Only one refresh runs at a time per provider, so each process makes at most one upstream fetch per TTL.
+
+A load that fails or returns None (nothing recorded yet) is remembered for error_ttl seconds: a cold provider returns
+None without calling the loader again (counted as a hit), and a stale one keeps its payload without starting another
+refresh, so a failing upstream is called at most once per error_ttl instead of on every request.
+
+"""
+
+
+class CachedWeatherProvider:
+    """Caches the payload returned by loader() for ttl seconds and refreshes it in the background once stale"""
+
+    def __init__(
+        self, loader, ttl=600, error_ttl=30, clock=time.monotonic
+    ):
+        self.loader = loader
+        self.ttl = ttl
+        self.error_ttl = error_ttl
+        self.clock = clock
+        self.stats = {
+            "hits": 0,
+            "misses": 0,
+            "refreshes": 0,
+            "errors": 0,
+        }
+        self._payload = None
+        self._fetched_at = None
+        self._failed_at = None
+        self._refresh_thread = None
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+
+    def get(self):
+        """Returns the cached payload, loading it on a cold cache and scheduling a refresh when stale"""
+        with self._lock:
+            if self._payload is None and self.failed_recently():
+                self.stats["hits"] += 1
+                return None
+            if self._payload is None:
+                self.stats["misses"] += 1
+                cold = True
+            else:
+                self.stats["hits"] += 1
+                cold = False
+                if (
+                    self.is_stale()
+                    and not self.refreshing
+                    and not self.failed_recently()
+                ):
+                    self._refresh_thread = threading.Thread(
+                        target=self.refresh, daemon=True
+                    )
+                    self._refresh_thread.start()
+
+        if cold:
+            with self._load_lock:  # concurrent cold callers share one load
+                if self._payload is None and not self.failed_recently():
+                    self.refresh()
+        return self._payload
+
+    def refresh(self):
+        """Calls the loader and stores its payload. Failed or empty loads keep the last good payload"""
+        try:
+            payload = self.loader()
+        except Exception:
+            with self._lock:
+                self.stats["errors"] += 1
+                self._failed_at = self.clock()
+            return None
+
+        with self._lock:
+            if payload is None:
+                self._failed_at = self.clock()
+                return None
+            self._failed_at = None
+            self.stats["refreshes"] += 1
+            self._payload = payload
+            self._fetched_at = self.clock()
+        return payload
+
+    def failed_recently(self):
+        return (
+            self._failed_at is not None
+            and self.clock() - self._failed_at < self.error_ttl
+        )
+
+    def is_stale(self):
+        if self._fetched_at is None:
+            return True
+        return self.clock() - self._fetched_at >= self.ttl
+
+    @property
+    def refreshing(self):
+        thread = self._refresh_thread
+        return thread is not None and thread.is_alive()
+
+    def wait(self, timeout=None):
+        """Blocks until a running background refresh finishes (used by tests and management commands)"""
+        thread = self._refresh_thread
+        if thread is not None:
+            thread.join(timeout)
+
+    def clear(self):
+        """Drops the cached payload and resets counters"""
+        with self._lock:
+            self._payload = None
+            self._fetched_at = None
+            self._failed_at = None
+            for key in self.stats:
+                self.stats[key] = 0